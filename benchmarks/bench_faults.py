@@ -0,0 +1,116 @@
+#################################################################################################
+# File:    bench_faults.py
+# Version: 1.0
+#
+# Description:
+#   Reliability benchmark: SET confirmation under injected transport faults.
+#   For each loss level the driver runs behind a FaultyPort ("faults" config section) on the
+#   in-process emulator and sends N relay SETs one at a time. Reported per level:
+#     - success rate, average attempts and retried commands
+#     - confirmations via EVENT vs. fallback GET
+#     - latency p50 / p95 / p99 / max
+#   A level L sets: frame checksum / truncation faults L/2 each, byte drops L/6 per byte
+#   in both directions (about L per frame), duplicated EVENTs and delayed ACKs at L.
+#
+# Usage:
+#   python benchmarks/bench_faults.py [--levels 0,0.01,0.05,0.1] [--commands 100] [--seed 1]
+#################################################################################################
+
+import argparse
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from run_all import start_driver, stop_driver  # noqa: E402
+from teletask.protocol import FUNC_RELAY, STATE_OFF, STATE_ON  # noqa: E402
+
+
+def fault_config(level: float, seed: int) -> Dict[str, Any]:
+    """Return the "faults" config section for a loss level."""
+    return {
+        "enabled": True,
+        "seed": seed,
+        "rx_drop_byte": level / 6.0,
+        "tx_drop_byte": level / 6.0,
+        "corrupt_checksum": level / 2.0,
+        "partial_frame": level / 2.0,
+        "duplicate_event": level,
+        "ack_delay_rate": level,
+        "ack_delay_ms": 200,
+    }
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100.0))], 1)
+
+
+def run_level(level: float, commands: int, latency_ms: float, gap_ms: int, seed: int) -> Dict[str, Any]:
+    """Send `commands` relay SETs one at a time behind the fault injector."""
+    drv = start_driver(latency_ms, gap_ms, {"faults": fault_config(level, seed)})
+    latencies: List[float] = []
+    attempts = retried = confirmed = via_get = 0
+    try:
+        for i in range(commands):
+            num = (i % 32) + 1
+            handle = drv.submit_set(FUNC_RELAY, num, STATE_ON if (i // 32) % 2 == 0 else STATE_OFF)
+            ok = handle.wait()
+            latencies.append(handle.elapsed_ms or 0.0)
+            attempts += handle.attempts
+            retried += handle.attempts > 1
+            confirmed += ok
+            via_get += ok and handle.confirmed_via == "GET"
+        injected = drv.ser.stats()["injected"]
+    finally:
+        stop_driver(drv)
+
+    return {
+        "level": level,
+        "commands": commands,
+        "success_rate": round(confirmed / commands, 4) if commands else 0.0,
+        "avg_attempts": round(attempts / commands, 3) if commands else 0.0,
+        "retried": retried,
+        "confirmed_via_get": via_get,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": round(max(latencies), 1) if latencies else 0.0,
+        "injected": injected,
+    }
+
+
+def run_levels(levels: List[float], commands: int, latency_ms: float, gap_ms: int, seed: int) -> Dict[str, Any]:
+    """Run every loss level; keys are the levels as strings."""
+    return {str(level): run_level(level, commands, latency_ms, gap_ms, seed) for level in levels}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="SET confirmation under injected transport faults")
+    ap.add_argument("--levels", default="0,0.01,0.05,0.1", help="comma separated loss levels (0-1)")
+    ap.add_argument("--commands", type=int, default=100, help="SETs per level")
+    ap.add_argument("--latency-ms", type=float, default=15.0)
+    ap.add_argument("--gap-ms", type=int, default=40)
+    ap.add_argument("--seed", type=int, default=1, help="fault RNG seed (reproducible runs)")
+    args = ap.parse_args()
+
+    levels = [float(level) for level in args.levels.split(",") if level]
+    t0 = time.perf_counter()
+    results = run_levels(levels, args.commands, args.latency_ms, args.gap_ms, args.seed)
+
+    print(f"commands={args.commands} latency={args.latency_ms}ms gap={args.gap_ms}ms seed={args.seed}")
+    print(f"{'level':>6} {'success':>8} {'attempts':>9} {'retried':>8} {'via GET':>8} "
+          f"{'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for r in results.values():
+        print(f"{r['level']:>6.3f} {r['success_rate']:>8.1%} {r['avg_attempts']:>9.2f} {r['retried']:>8} "
+              f"{r['confirmed_via_get']:>8} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} "
+              f"{r['p99_ms']:>8.1f} {r['max_ms']:>8.1f}")
+    print(f"total: {time.perf_counter() - t0:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
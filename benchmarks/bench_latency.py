@@ -0,0 +1,84 @@
+#################################################################################################
+# File:    bench_latency.py
+# Version: 1.0
+#
+# Description:
+#   Per-command latency benchmark against the in-process MICROS emulator.
+#   Measures one blocking set_relay() call at a time (median over N runs):
+#     - legacy:  the pre-V07.2 path: every frame followed by a post_send_gap_ms sleep,
+#                TOGGLE = GET (+ gap) then SET (+ gap, 100 ms ACK wait, EVENT wait)
+#     - current: set_relay() through the TxScheduler (caller wakes on the reply)
+#
+# Usage:
+#   python benchmarks/bench_latency.py [--runs 20] [--latency-ms 15]
+#################################################################################################
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from bench_scene import make_driver  # noqa: E402
+from teletask.framing import compose_frame  # noqa: E402
+from teletask.protocol import CMD_EVENT, CMD_GET, CMD_SET, FUNC_RELAY, STATE_OFF, STATE_ON  # noqa: E402
+
+
+def legacy_send(drv, frame: bytes) -> None:
+    drv._write_frame(frame)
+    time.sleep(drv.post_send_gap_ms / 1000.0)
+
+
+def legacy_set(drv, num: int, state: int) -> None:
+    ack = drv._waiters.add_ack()
+    event = drv._waiters.add(FUNC_RELAY, num, (CMD_EVENT,))
+    legacy_send(drv, compose_frame(CMD_SET, bytes([FUNC_RELAY, num, state])))
+    drv._await(ack, 100)
+    if drv._await(event, drv.confirm_timeout_ms) is None:
+        raise RuntimeError(f"relay {num} not confirmed")
+
+
+def legacy_toggle(drv, num: int) -> None:
+    waiter = drv._waiters.add(FUNC_RELAY, num, (CMD_GET, CMD_EVENT))
+    legacy_send(drv, compose_frame(CMD_GET, bytes([FUNC_RELAY, num])))
+    current = drv._await(waiter, drv.confirm_timeout_ms)
+    legacy_set(drv, num, STATE_OFF if current == STATE_ON else STATE_ON)
+
+
+def median_ms(fn, runs: int) -> float:
+    samples = []
+    for i in range(runs):
+        t0 = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--runs", type=int, default=20)
+    ap.add_argument("--latency-ms", type=float, default=15.0)
+    ap.add_argument("--gap-ms", type=int, default=40)
+    args = ap.parse_args()
+
+    drv = make_driver(args.latency_ms, args.gap_ms, 8)
+    try:
+        rows = [
+            ("ON/OFF  legacy", median_ms(lambda i: legacy_set(drv, 1, STATE_ON if i % 2 else STATE_OFF), args.runs)),
+            ("ON/OFF  current", median_ms(lambda i: drv.set_relay(1, "ON" if i % 2 else "OFF"), args.runs)),
+            ("TOGGLE  legacy", median_ms(lambda i: legacy_toggle(drv, 2), args.runs)),
+            ("TOGGLE  current", median_ms(lambda i: drv.set_relay(2, "TOGGLE"), args.runs)),
+        ]
+    finally:
+        drv.stop()
+        drv.emulator.stop()
+
+    print(f"runs={args.runs} latency={args.latency_ms}ms gap={args.gap_ms}ms post_send_gap=140ms")
+    for name, ms in rows:
+        print(f"{name:16s} {ms:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#################################################################################################
+# File:    bench_rx_parse.py
+# Version: 1.0
+#
+# Description:
+#   Micro-benchmark for the MicrosRS232 RX path.
+#   Compares the legacy 3-reads-per-frame loop (read(1) STX, read(1) LEN, read(ln-1))
+#   with the buffered FrameParser loop, both fed from an in-memory port.
+#
+# Usage:
+#   python benchmarks/bench_rx_parse.py [--frames 20000] [--chunk 64]
+#################################################################################################
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "custom_components", "teletask"))
+
+from teletask.framing import compose_frame  # noqa: E402
+from teletask.micros_rs232 import MicrosRS232  # noqa: E402
+from teletask.protocol import CMD_EVENT, FUNC_RELAY, STX  # noqa: E402
+
+
+class ReplayPort:
+    """Serial stand-in that returns a prepared byte stream, at most `chunk` bytes per read."""
+
+    def __init__(self, data: bytes, chunk: int, on_eof) -> None:
+        self._data = data
+        self._pos = 0
+        self._chunk = chunk
+        self._on_eof = on_eof
+        self.reads = 0
+
+    @property
+    def in_waiting(self) -> int:
+        return min(self._chunk, len(self._data) - self._pos)
+
+    def read(self, n: int = 1) -> bytes:
+        self.reads += 1
+        if self._pos >= len(self._data):
+            self._on_eof()
+            return b""
+        out = self._data[self._pos:self._pos + n]
+        self._pos += len(out)
+        return out
+
+
+def make_stream(frames: int) -> bytes:
+    """Build a burst of EVENT frames (mood switching many relays)."""
+    out = bytearray()
+    for i in range(frames):
+        out += compose_frame(CMD_EVENT, bytes([FUNC_RELAY, (i % 64) + 1, 255 if i & 1 else 0]))
+    return bytes(out)
+
+
+def make_driver() -> MicrosRS232:
+    """Create a driver from a throw-away config file."""
+    fd, path = tempfile.mkstemp(suffix=".json")
+    with os.fdopen(fd, "w") as f:
+        json.dump({"serial": {"port": "loop://"}, "reliability": {}}, f)
+    try:
+        return MicrosRS232(config_path=path)
+    finally:
+        os.remove(path)
+
+
+def legacy_rx_loop(drv: MicrosRS232) -> None:
+    """The pre-V06.4 RX loop: three blocking reads per frame."""
+    while not drv._stop_event.is_set():
+        first = drv.ser.read(1)
+        if len(first) < 1:
+            continue
+        if first[0] != STX:
+            continue
+        length_byte = drv.ser.read(1)
+        if len(length_byte) < 1:
+            continue
+        ln = length_byte[0]
+        if ln < 3 or ln > 64:
+            continue
+        payload = drv.ser.read(ln - 1)
+        if len(payload) < ln - 1:
+            continue
+        drv._handle_incoming_frame(bytes([STX, ln]) + payload)
+
+
+def run(loop_fn, stream: bytes, chunk: int) -> dict:
+    """Drain `stream` through `loop_fn` and return throughput figures."""
+    drv = make_driver()
+    count = [0]
+    drv._handle_incoming_frame = lambda frame: count.__setitem__(0, count[0] + 1)
+    drv._stop_event.clear()
+    drv.ser = ReplayPort(stream, chunk, drv._stop_event.set)
+
+    t0 = time.perf_counter()
+    loop_fn(drv)
+    elapsed = time.perf_counter() - t0
+
+    return {
+        "frames": count[0],
+        "reads": drv.ser.reads,
+        "seconds": round(elapsed, 6),
+        "frames_per_s": round(count[0] / elapsed) if elapsed else 0,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--frames", type=int, default=20000, help="frames in the burst")
+    ap.add_argument("--chunk", type=int, default=64, help="max bytes available per read")
+    args = ap.parse_args()
+
+    stream = make_stream(args.frames)
+    legacy = run(legacy_rx_loop, stream, args.chunk)
+    buffered = run(MicrosRS232._rx_loop, stream, args.chunk)
+
+    print(f"{'loop':<10} {'frames':>8} {'reads':>8} {'seconds':>10} {'frames/s':>12}")
+    for name, r in (("legacy", legacy), ("buffered", buffered)):
+        print(f"{name:<10} {r['frames']:>8} {r['reads']:>8} {r['seconds']:>10.4f} {r['frames_per_s']:>12}")
+    if legacy["seconds"]:
+        print(f"speedup: {legacy['seconds'] / buffered['seconds']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
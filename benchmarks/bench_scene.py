@@ -0,0 +1,119 @@
+#################################################################################################
+# File:    bench_scene.py
+# Version: 1.2
+#
+# Description:
+#   Scene completion benchmark against the in-process MICROS emulator.
+#   Switches N relays ON and measures wall-clock time until every SET is confirmed:
+#     - legacy:    the pre-scheduler path, one command at a time:
+#                  SET, post_send_gap_ms sleep, 100 ms ACK wait, EVENT wait
+#     - pipelined: submit_set() for all targets, then wait for all handles
+#   The emulator ACKs SETs like the MICROS, and make_driver() warms up the adaptive timing
+#   with a few SETs first, so the pipelined path runs at the tuned gap (bounded below by
+#   --gap-ms) instead of the static post_send_gap_ms of 140 ms the legacy path sleeps.
+#
+# Usage:
+#   python benchmarks/bench_scene.py [--devices 30] [--latency-ms 15] [--gap-ms 40]
+#################################################################################################
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "custom_components", "teletask"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "tools"))
+
+from micros_emulator import EmulatedPort, MicrosEmulator  # noqa: E402
+from teletask.micros_rs232 import MicrosRS232  # noqa: E402
+from teletask.framing import compose_frame  # noqa: E402
+from teletask.protocol import CMD_EVENT, CMD_SET, FUNC_RELAY, STATE_OFF, STATE_ON  # noqa: E402
+
+
+class EmulatedMicrosRS232(MicrosRS232):
+    """MicrosRS232 whose serial port is an in-process emulator."""
+
+    emulator: MicrosEmulator
+
+    def _open_serial(self):
+        return EmulatedPort(self.emulator, timeout=0.2)
+
+
+def make_driver(latency_ms: float, gap_ms: int, max_in_flight: int) -> EmulatedMicrosRS232:
+    """Start a driver connected to a fresh emulator."""
+    cfg = {
+        "serial": {"port": "emulator://"},
+        "reliability": {"retries": 3, "confirm_timeout_ms": 800, "post_send_gap_ms": 140},
+        "pipeline": {"min_frame_gap_ms": gap_ms, "max_in_flight": max_in_flight},
+    }
+    fd, path = tempfile.mkstemp(suffix=".json")
+    with os.fdopen(fd, "w") as f:
+        json.dump(cfg, f)
+    try:
+        drv = EmulatedMicrosRS232(config_path=path)
+    finally:
+        os.remove(path)
+
+    drv.emulator = MicrosEmulator(latency_ms=latency_ms, send_ack=True)
+    drv.emulator.start()
+    drv.start()
+    warm_up(drv)
+    return drv
+
+
+def warm_up(drv: MicrosRS232) -> None:
+    """Send ACKed SETs until the adaptive post-send gap replaces the static one."""
+    handles = [drv.submit_set(FUNC_RELAY, 250 - i, STATE_OFF) for i in range(drv.timing.min_samples)]
+    for h in handles:
+        h.wait()
+
+
+def scene_legacy(drv: MicrosRS232, nums, state: int) -> float:
+    t0 = time.perf_counter()
+    for num in nums:
+        ack = drv._waiters.add_ack()
+        event = drv._waiters.add(FUNC_RELAY, num, (CMD_EVENT,))
+        drv._write_frame(compose_frame(CMD_SET, bytes([FUNC_RELAY, num, state])))
+        time.sleep(drv.post_send_gap_ms / 1000.0)
+        drv._await(ack, 100)
+        if drv._await(event, drv.confirm_timeout_ms) is None:
+            raise RuntimeError(f"relay {num} not confirmed")
+    return time.perf_counter() - t0
+
+
+def scene_pipelined(drv: MicrosRS232, nums, state: int) -> float:
+    t0 = time.perf_counter()
+    handles = [drv.submit_set(FUNC_RELAY, num, state) for num in nums]
+    for h in handles:
+        h.wait()
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--devices", type=int, default=30)
+    ap.add_argument("--latency-ms", type=float, default=15.0)
+    ap.add_argument("--gap-ms", type=int, default=40)
+    ap.add_argument("--max-in-flight", type=int, default=8)
+    args = ap.parse_args()
+
+    drv = make_driver(args.latency_ms, args.gap_ms, args.max_in_flight)
+    nums = range(1, args.devices + 1)
+    try:
+        seq = scene_legacy(drv, nums, STATE_ON)
+        pipe = scene_pipelined(drv, nums, STATE_OFF)
+        stats = drv.scheduler_stats()
+    finally:
+        drv.stop()
+        drv.emulator.stop()
+
+    print(f"devices={args.devices} latency={args.latency_ms}ms gap={args.gap_ms}ms max_in_flight={args.max_in_flight}")
+    print(f"legacy:     {seq * 1000:8.1f} ms")
+    print(f"pipelined:  {pipe * 1000:8.1f} ms   ({seq / pipe:.1f}x)")
+    print(f"scheduler:  {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#################################################################################################
+# File:    bench_sync.py
+# Version: 1.1
+#
+# Description:
+#   Initial state sync benchmark against the in-process MICROS emulator.
+#   Reads every relay, dimmer and flag of an installation and measures wall-clock time:
+#     - naive: the pre-V07.0 read, one device at a time: GET, post_send_gap_ms sleep, wait for
+#              the GET reply (or EVENT); modelled on the bus like bench_scene's legacy path
+#     - bulk:  read_states() with pipelined GETs (sync.max_in_flight window)
+#
+# Usage:
+#   python benchmarks/bench_sync.py [--relays 64] [--dimmers 32] [--flags 32] [--latency-ms 15]
+#################################################################################################
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from bench_scene import make_driver  # noqa: E402
+from teletask.framing import compose_frame  # noqa: E402
+from teletask.protocol import CMD_EVENT, CMD_GET, FUNC_DIMMER, FUNC_FLAG, FUNC_RELAY  # noqa: E402
+
+
+def sync_naive(drv, devices) -> float:
+    t0 = time.perf_counter()
+    for func, num in devices:
+        reply = drv._waiters.add(func, num, (CMD_GET, CMD_EVENT))
+        drv._write_frame(compose_frame(CMD_GET, bytes([func, num])))
+        time.sleep(drv.post_send_gap_ms / 1000.0)
+        if drv._await(reply, drv.confirm_timeout_ms) is None:
+            raise RuntimeError(f"func={func} num={num} did not answer")
+    return time.perf_counter() - t0
+
+
+def sync_bulk(drv, devices, max_in_flight: int) -> float:
+    t0 = time.perf_counter()
+    results = drv.read_states(devices, max_in_flight=max_in_flight, budget_s=60.0)
+    elapsed = time.perf_counter() - t0
+    missing = [key for key, st in results.items() if st is None]
+    if missing:
+        raise RuntimeError(f"{len(missing)} devices did not answer")
+    return elapsed
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--relays", type=int, default=64)
+    ap.add_argument("--dimmers", type=int, default=32)
+    ap.add_argument("--flags", type=int, default=32)
+    ap.add_argument("--latency-ms", type=float, default=15.0)
+    ap.add_argument("--gap-ms", type=int, default=40)
+    ap.add_argument("--max-in-flight", type=int, default=8)
+    args = ap.parse_args()
+
+    devices = (
+        [(FUNC_RELAY, n) for n in range(1, args.relays + 1)]
+        + [(FUNC_DIMMER, n) for n in range(1, args.dimmers + 1)]
+        + [(FUNC_FLAG, n) for n in range(1, args.flags + 1)]
+    )
+
+    drv = make_driver(args.latency_ms, args.gap_ms, args.max_in_flight)
+    try:
+        naive = sync_naive(drv, devices)
+        bulk = sync_bulk(drv, devices, args.max_in_flight)
+    finally:
+        drv.stop()
+        drv.emulator.stop()
+
+    print(f"devices={len(devices)} latency={args.latency_ms}ms gap={args.gap_ms}ms max_in_flight={args.max_in_flight}")
+    print(f"naive:  {naive * 1000:8.1f} ms")
+    print(f"bulk:   {bulk * 1000:8.1f} ms   ({naive / bulk:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+#################################################################################################
+# File:    run_all.py
+# Version: 1.2
+#
+# Description:
+#   Benchmark suite for the driver and hub hot paths, run against the in-process MICROS
+#   emulator. Writes one machine-readable JSON file per run so versions can be compared:
+#     - rx_parse         frames/s through MicrosRS232._rx_loop (in-memory burst)
+#     - command_latency  median / p95 of set_relay (ON/OFF, TOGGLE), set_dimmer, set_mood
+#     - scene            completion time of a pipelined scene for N relays
+#     - log_to_ha        cost per RX frame of the hub's log forwarding (_log_to_ha), with
+#                        the HA logger at INFO (debug suppressed) and at DEBUG, plus the
+#                        eager V08.0 formatting at INFO for comparison
+#     - startup          devices.json load + connect + initial state sync for synthetic
+#                        configurations of 10 / 100 / 500 devices
+#     - faults           SET success rate, attempts and tail latency per injected loss level
+#                        (see bench_faults.py)
+#
+# Usage:
+#   python benchmarks/run_all.py [--output results.json] [--compare previous.json]
+#                                [--only rx_parse,scene] [--latency-ms 15] [--gap-ms 40]
+#################################################################################################
+
+import argparse
+import json
+import logging
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from bench_rx_parse import make_stream, run as run_rx  # noqa: E402
+from bench_scene import EmulatedMicrosRS232, scene_pipelined  # noqa: E402
+from micros_emulator import MicrosEmulator  # noqa: E402
+from teletask.device_config import load_device_config  # noqa: E402
+from teletask.framing import compose_frame  # noqa: E402
+from teletask.micros_rs232 import MicrosRS232  # noqa: E402
+from teletask.protocol import CMD_EVENT, FUNC_DIMMER, FUNC_FLAG, FUNC_RELAY, STATE_ON  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+DRIVER_FILE = os.path.join(ROOT, "custom_components", "teletask", "teletask", "micros_rs232.py")
+
+BENCHMARKS = ("rx_parse", "command_latency", "scene", "log_to_ha", "startup", "faults")
+
+
+#################################################################################################
+# Helpers
+#################################################################################################
+def start_driver(
+    latency_ms: float, gap_ms: int, extra: Optional[Dict[str, Any]] = None, start: bool = True
+) -> EmulatedMicrosRS232:
+    """Create a driver on a fresh emulator (ACK frames on, like the MICROS)."""
+    cfg: Dict[str, Any] = {
+        "serial": {"port": "emulator://"},
+        "reliability": {"retries": 3, "confirm_timeout_ms": 800, "post_send_gap_ms": 140},
+        "pipeline": {"min_frame_gap_ms": gap_ms},
+    }
+    cfg.update(extra or {})
+    fd, path = tempfile.mkstemp(suffix=".json")
+    with os.fdopen(fd, "w") as f:
+        json.dump(cfg, f)
+    try:
+        drv = EmulatedMicrosRS232(config_path=path)
+    finally:
+        os.remove(path)
+
+    drv.emulator = MicrosEmulator(latency_ms=latency_ms, send_ack=True)
+    drv.emulator.start()
+    if start:
+        drv.start()
+    return drv
+
+
+def stop_driver(drv: EmulatedMicrosRS232) -> None:
+    drv.stop()
+    drv.emulator.stop()
+
+
+def timed_ms(fn: Callable[[int], Any], runs: int) -> Dict[str, float]:
+    """Run fn(i) `runs` times; return median / p95 / min / max in ms."""
+    samples: List[float] = []
+    for i in range(runs):
+        t0 = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    samples.sort()
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        "min_ms": round(samples[0], 3),
+        "max_ms": round(samples[-1], 3),
+        "runs": runs,
+    }
+
+
+def driver_version() -> str:
+    """Return the version from the driver's file header (e.g. 'V07.8')."""
+    try:
+        with open(DRIVER_FILE, encoding="utf-8") as f:
+            match = re.search(r"^# Version:\s*(\S+)", f.read(), re.MULTILINE)
+    except OSError:
+        return "unknown"
+    return match.group(1) if match else "unknown"
+
+
+def git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "-C", ROOT, "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+#################################################################################################
+# Benchmarks
+#################################################################################################
+def bench_rx_parse(args) -> Dict[str, Any]:
+    """Throughput of the buffered RX loop (frames/s, reads per frame)."""
+    stream = make_stream(args.frames)
+    result = run_rx(MicrosRS232._rx_loop, stream, args.chunk)
+    result["chunk"] = args.chunk
+    return result
+
+
+def bench_command_latency(args) -> Dict[str, Any]:
+    """One blocking command at a time against the emulator."""
+    drv = start_driver(args.latency_ms, args.gap_ms)
+    try:
+        return {
+            "set_relay_on_off": timed_ms(lambda i: drv.set_relay(1, "ON" if i % 2 else "OFF"), args.runs),
+            "set_relay_toggle": timed_ms(lambda i: drv.set_relay(2, "TOGGLE"), args.runs),
+            "set_dimmer": timed_ms(lambda i: drv.set_dimmer(1, 40 + (i % 2) * 100), args.runs),
+            "set_mood": timed_ms(lambda i: drv.set_mood(1, "ON", "LOCAL"), args.runs),
+        }
+    finally:
+        stop_driver(drv)
+
+
+def bench_scene(args) -> Dict[str, Any]:
+    """Pipelined scene: N relays switched and confirmed."""
+    results: Dict[str, Any] = {}
+    drv = start_driver(args.latency_ms, args.gap_ms)
+    try:
+        for devices in args.scene_sizes:
+            nums = range(1, devices + 1)
+            scene_pipelined(drv, nums, STATE_ON)  # Warm-up / known start state
+            results[str(devices)] = {"elapsed_ms": round(scene_pipelined(drv, nums, 0) * 1000.0, 1)}
+    finally:
+        stop_driver(drv)
+    return results
+
+
+def bench_log_to_ha(args) -> Dict[str, Any]:
+    """
+    Cost per RX frame of forwarding driver logs to HA.
+
+    The callbacks mirror TeletaskHub._log_to_ha / _log_enabled (the hub module needs
+    Home Assistant): one logger.log(level, "[TeleTask] %s", msg) call per log line, and a
+    level check that lets the driver skip formatting of frame dumps while DEBUG is off.
+    "eager_info_level_us" renders every frame like the V08.0 driver did before the
+    level check, with the logger at INFO.
+    """
+    logger = logging.getLogger("custom_components.teletask.teletask_hub.bench")
+    logger.propagate = False
+    logger.addHandler(logging.NullHandler())
+
+    def log_to_ha(msg: str, level: int = logging.DEBUG) -> None:
+        logger.log(level, "[TeleTask] %s", msg)
+
+    def log_enabled(level: int) -> bool:
+        return logger.isEnabledFor(level)
+
+    def eager_log_hex(kind: str, frame: bytes) -> None:
+        ts = time.strftime("%H:%M:%S")
+        hexstr = frame.hex(" ").upper()
+        drv._log(f"{ts}  {kind}: {hexstr}")
+
+    drv = start_driver(args.latency_ms, args.gap_ms, start=False)
+    drv.emulator.stop()
+    frames = [compose_frame(CMD_EVENT, bytes([FUNC_RELAY, (i % 64) + 1, 255 if i & 1 else 0])) for i in range(256)]
+
+    def per_frame_us(callback, level: int, log_hex: Optional[Callable[[str, bytes], None]] = None) -> float:
+        drv.log_callback = callback
+        drv.log_enabled = log_enabled if log_hex is None else None
+        log_hex = log_hex or drv._log_hex
+        logger.setLevel(level)
+        n = args.log_frames
+        t0 = time.perf_counter()
+        for i in range(n):
+            log_hex("RX", frames[i & 255])
+        return round((time.perf_counter() - t0) / n * 1e6, 3)
+
+    return {
+        "no_callback_us": per_frame_us(None, logging.INFO),
+        "info_level_us": per_frame_us(log_to_ha, logging.INFO),
+        "debug_level_us": per_frame_us(log_to_ha, logging.DEBUG),
+        "eager_info_level_us": per_frame_us(log_to_ha, logging.INFO, eager_log_hex),
+        "frames": args.log_frames,
+    }
+
+
+def write_devices_json(path: str, devices: int) -> Dict[str, int]:
+    """Write a synthetic devices.json: half relays, a quarter dimmers, a quarter flags."""
+    relays = min(255, devices // 2)
+    dimmers = min(255, devices // 4)
+    flags = min(255, devices - relays - dimmers)
+    data = {
+        "deviceName": "Benchmark",
+        "relays": [{"num": n, "name": f"Relay {n}", "room": f"Room {n % 12}"} for n in range(1, relays + 1)],
+        "dimmers": [{"num": n, "name": f"Dimmer {n}", "room": f"Room {n % 12}"} for n in range(1, dimmers + 1)],
+        "flags": [{"num": n, "name": f"Flag {n}"} for n in range(1, flags + 1)],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    return {"relays": relays, "dimmers": dimmers, "flags": flags}
+
+
+def bench_startup(args) -> Dict[str, Any]:
+    """
+    Integration startup for synthetic configurations, the way the hub runs it: load
+    devices.json, connect (RX thread, scheduler, LOG setup), read every device state.
+    "setup_ms" is what async_setup_entry waits for; the state read runs in the background.
+    """
+    results: Dict[str, Any] = {}
+    for devices in args.startup_sizes:
+        fd, path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        try:
+            counts = write_devices_json(path, devices)
+            drv = start_driver(args.latency_ms, args.gap_ms, {"sync": {"budget_s": 300}}, start=False)
+            try:
+                t0 = time.perf_counter()
+                config = load_device_config(path)
+                t_load = time.perf_counter()
+                drv.connect()
+                t_setup = time.perf_counter()
+                keys = (
+                    [(FUNC_RELAY, d.num) for d in config.get_all_relays()]
+                    + [(FUNC_DIMMER, d.num) for d in config.get_all_dimmers()]
+                    + [(FUNC_FLAG, d.num) for d in config.get_all_flags()]
+                )
+                states = drv.read_states(keys)
+                t_done = time.perf_counter()
+            finally:
+                stop_driver(drv)
+        finally:
+            os.remove(path)
+
+        results[str(devices)] = {
+            "devices": counts,
+            "load_ms": round((t_load - t0) * 1000.0, 3),
+            "setup_ms": round((t_setup - t0) * 1000.0, 1),
+            "sync_ms": round((t_done - t_load) * 1000.0, 1),
+            "total_ms": round((t_done - t0) * 1000.0, 1),
+            "synced": sum(1 for st in states.values() if st is not None),
+        }
+    return results
+
+
+def bench_faults(args) -> Dict[str, Any]:
+    """Confirmation under injected transport faults, per loss level."""
+    from bench_faults import run_levels  # bench_faults imports this module
+
+    return run_levels(args.fault_levels, args.fault_commands, args.latency_ms, args.gap_ms, seed=1)
+
+
+#################################################################################################
+# Output
+#################################################################################################
+def flatten(data: Any, prefix: str = "") -> Dict[str, float]:
+    """Flatten nested result dicts to {"a.b.c": number}."""
+    out: Dict[str, float] = {}
+    if isinstance(data, dict):
+        for key, value in data.items():
+            out.update(flatten(value, f"{prefix}.{key}" if prefix else str(key)))
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        out[prefix] = data
+    return out
+
+
+def compare(current: Dict[str, Any], previous_path: str) -> None:
+    """Print every numeric result next to the previous run and the relative change."""
+    with open(previous_path, encoding="utf-8") as f:
+        previous = json.load(f)
+    old = flatten(previous.get("results", {}))
+    new = flatten(current["results"])
+    print(f"\ncompare: {previous.get('version')} ({previous.get('git')}) → {current['version']} ({current['git']})")
+    for key in sorted(new):
+        if key not in old:
+            continue
+        delta = (new[key] - old[key]) / old[key] * 100.0 if old[key] else 0.0
+        print(f"  {key:48s} {old[key]:>12.3f} {new[key]:>12.3f} {delta:+8.1f}%")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="TeleTask driver / hub benchmark suite")
+    ap.add_argument("--output", help="JSON result file (default: benchmarks/results/<version>-<time>.json)")
+    ap.add_argument("--compare", help="previous JSON result file to compare against")
+    ap.add_argument("--only", help=f"comma separated subset of: {', '.join(BENCHMARKS)}")
+    ap.add_argument("--latency-ms", type=float, default=15.0, help="emulator reply latency")
+    ap.add_argument("--gap-ms", type=int, default=40, help="pipeline.min_frame_gap_ms")
+    ap.add_argument("--runs", type=int, default=20, help="samples per command latency")
+    ap.add_argument("--frames", type=int, default=20000, help="frames in the RX burst")
+    ap.add_argument("--chunk", type=int, default=64, help="max bytes per RX read")
+    ap.add_argument("--log-frames", type=int, default=50000, help="frames for the log cost benchmark")
+    ap.add_argument("--scene-sizes", default="10,30,100", help="scene sizes (relays)")
+    ap.add_argument("--startup-sizes", default="10,100,500", help="synthetic devices.json sizes")
+    ap.add_argument("--fault-levels", default="0,0.05", help="injected loss levels (0-1)")
+    ap.add_argument("--fault-commands", type=int, default=50, help="SETs per fault level")
+    args = ap.parse_args()
+    args.scene_sizes = [int(n) for n in args.scene_sizes.split(",") if n]
+    args.startup_sizes = [int(n) for n in args.startup_sizes.split(",") if n]
+    args.fault_levels = [float(level) for level in args.fault_levels.split(",") if level]
+
+    selected = [name.strip() for name in args.only.split(",")] if args.only else list(BENCHMARKS)
+    unknown = [name for name in selected if name not in BENCHMARKS]
+    if unknown:
+        ap.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    runners = {
+        "rx_parse": bench_rx_parse,
+        "command_latency": bench_command_latency,
+        "scene": bench_scene,
+        "log_to_ha": bench_log_to_ha,
+        "startup": bench_startup,
+        "faults": bench_faults,
+    }
+    report: Dict[str, Any] = {
+        "version": driver_version(),
+        "git": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {
+            "latency_ms": args.latency_ms,
+            "gap_ms": args.gap_ms,
+            "runs": args.runs,
+        },
+        "results": {},
+    }
+    for name in selected:
+        t0 = time.perf_counter()
+        report["results"][name] = runners[name](args)
+        print(f"{name:16s} done in {time.perf_counter() - t0:6.1f} s")
+
+    output = args.output or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "results",
+        f"{report['version']}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"results: {output}")
+
+    for key, value in sorted(flatten(report["results"]).items()):
+        print(f"  {key:48s} {value:>12}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
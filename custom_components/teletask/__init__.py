@@ -1,7 +1,7 @@
 
 #################################################################################################
 # File:    __init__.py
-# Version: 1.10.0 - Auto-generated dashboard with 3 tabs (Moods/Entities/Testing)
+# Version: 1.12.1 - Initial state sync no longer blocks setup
 #
 # TeleTask MICROS custom component for Home Assistant
 #
@@ -14,12 +14,13 @@ import serial
 import os
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import ConfigEntryNotReady, HomeAssistantError
 from homeassistant.helpers import entity_registry as er, label_registry as lr, area_registry as ar
 from homeassistant.components.frontend import add_extra_js_url
 
 from .teletask_hub import TeletaskHub
+from .teletask.batch import DEFAULT_ROUNDS
 from . import dashboard
 
 _LOGGER = logging.getLogger(__name__)
@@ -62,6 +63,10 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # Load platforms
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    # Read the current device states in the background (bounded by sync.budget_s); setup
+    # does not wait for it, entities are updated through the normal push path
+    hass.async_create_task(hub.async_initial_sync())
+
     # Register services
     _register_services(hass, hub)
 
@@ -81,7 +86,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 def _register_services(hass: HomeAssistant, hub: TeletaskHub) -> None:
     """Register TeleTask services."""
 
-    def handle_set_mood(call):
+    async def handle_set_mood(call):
         """Handle the set_mood service call."""
         number = call.data.get("number")
         mood_type = call.data.get("type", "LOCAL").upper()
@@ -89,28 +94,34 @@ def _register_services(hass: HomeAssistant, hub: TeletaskHub) -> None:
 
         _LOGGER.info("set_mood called: number=%s, type=%s, state=%s", number, mood_type, state)
 
-        # TeletaskHub only has trigger_mood() which sends ON
-        # For ON state, trigger the mood
-        if state == "ON":
-            hub.trigger_mood(number, mood_type)
-        else:
-            # For OFF/TOGGLE, we need to call the client directly
-            hub.client.set_mood(number, state, mood_type)
+        await hub.async_set_mood(number, state, mood_type)
 
-    def handle_set_flag(call):
+    async def handle_set_flag(call):
         """Handle the set_flag service call."""
         number = call.data.get("number")
         state = call.data.get("state", "ON").upper()
 
         # Convert string state to boolean
         if state == "ON":
-            hub.set_flag(number, True)
+            await hub.async_set_flag(number, True)
         elif state == "OFF":
-            hub.set_flag(number, False)
+            await hub.async_set_flag(number, False)
         elif state == "TOGGLE":
             # Toggle by reading current state and flipping it
             current = hub.get_flag(number)
-            hub.set_flag(number, not current)
+            await hub.async_set_flag(number, not current)
+
+    async def handle_set_many(call: ServiceCall) -> ServiceResponse:
+        """Handle the set_many service call (scene: many devices in one pipelined burst)."""
+        targets = call.data.get("targets", [])
+        rounds = call.data.get("rounds", DEFAULT_ROUNDS)
+
+        _LOGGER.info("set_many called: %d targets, rounds=%s", len(targets), rounds)
+
+        try:
+            return await hub.async_set_many(targets, rounds)
+        except ValueError as e:
+            raise HomeAssistantError(f"Invalid set_many targets: {e}") from e
 
     # Register services (check if already registered to prevent duplicates)
     if not hass.services.has_service(DOMAIN, "set_mood"):
@@ -121,6 +132,12 @@ def _register_services(hass: HomeAssistant, hub: TeletaskHub) -> None:
         hass.services.async_register(DOMAIN, "set_flag", handle_set_flag)
         _LOGGER.info("Registered service: teletask.set_flag")
 
+    if not hass.services.has_service(DOMAIN, "set_many"):
+        hass.services.async_register(
+            DOMAIN, "set_many", handle_set_many, supports_response=SupportsResponse.OPTIONAL
+        )
+        _LOGGER.info("Registered service: teletask.set_many")
+
 
 def _register_frontend_resources(hass: HomeAssistant) -> None:
     """Register JS resource for TeleTask Test Card."""
@@ -1,7 +1,7 @@
 
 #################################################################################################
 # File:    binary_sensor.py
-# Version: 1.5 - Added matter_enabled attribute for Matter Server filtering
+# Version: 1.6 - Push-based state updates (dispatcher per device, no polling)
 #################################################################################################
 
 from typing import Any, Mapping
@@ -16,6 +16,7 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from . import DOMAIN
 from .entity import TeletaskEntity
+from .teletask.protocol import FUNC_FLAG, FUNC_INPUT
 from .teletask.device_config import DeviceInfo
 
 # Map input types to Home Assistant device classes
@@ -53,6 +54,8 @@ async def async_setup_entry(
 class TeletaskFlag(TeletaskEntity, BinarySensorEntity):
     """Representation of a TeleTask flag as a binary sensor."""
 
+    _teletask_func = FUNC_FLAG
+
     def __init__(self, hub, device: DeviceInfo, entry_id: str) -> None:
         """Initialize the flag binary sensor."""
         super().__init__(hub, entry_id)
@@ -91,6 +94,8 @@ class TeletaskFlag(TeletaskEntity, BinarySensorEntity):
 class TeletaskInput(TeletaskEntity, BinarySensorEntity):
     """Representation of a TeleTask physical input as a binary sensor."""
 
+    _teletask_func = FUNC_INPUT
+
     def __init__(self, hub, device: DeviceInfo, entry_id: str) -> None:
         """Initialize the input binary sensor."""
         super().__init__(hub, entry_id)
@@ -125,7 +130,7 @@ class TeletaskInput(TeletaskEntity, BinarySensorEntity):
         """Return extra state attributes including Matter exposure flag."""
         return {
             "matter_enabled": self._device.matter,
-            "teletask_function": 21,  # FUNC_INPUT
+            "teletask_function": FUNC_INPUT,
             "teletask_number": self._num,
             "room": self._device.room,
         }
@@ -1,6 +1,6 @@
 #################################################################################################
 # File:    button.py
-# Version: 1.0
+# Version: 1.1
 #
 # TeleTask mood button entities for Home Assistant.
 # Moods are one-shot actions that configure multiple devices to preset states.
@@ -65,9 +65,7 @@ class TeletaskMoodButton(TeletaskEntity, ButtonEntity):
 
     async def async_press(self) -> None:
         """Trigger the mood (set to ON)."""
-        await self.hass.async_add_executor_job(
-            self._hub.trigger_mood, self._num, self._mood_type
-        )
+        await self._hub.async_trigger_mood(self._num, self._mood_type)
 
     @property
     def extra_state_attributes(self) -> Mapping[str, Any] | None:
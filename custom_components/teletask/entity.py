@@ -1,21 +1,31 @@
 
 #################################################################################################
 # File:    entity.py
-# Version: 1.0
+# Version: 1.1
 #
 # Base entity class for TeleTask entities with device_info and availability.
+# State is pushed: each entity subscribes to the dispatcher signal of its own (func, num).
 #################################################################################################
 
+from typing import Optional
+
+from homeassistant.core import callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import Entity
 from homeassistant.helpers.device_registry import DeviceInfo
 
 from . import DOMAIN
+from .teletask_hub import state_signal
 
 
 class TeletaskEntity(Entity):
     """Base class for TeleTask entities with shared device info and availability."""
 
     _attr_has_entity_name = True
+    _attr_should_poll = False
+
+    # TeleTask function type of the entity (set by subclasses); None = no state updates
+    _teletask_func: Optional[int] = None
 
     def __init__(self, hub, entry_id: str) -> None:
         """
@@ -27,6 +37,24 @@ class TeletaskEntity(Entity):
         """
         self._hub = hub
         self._entry_id = entry_id
+        self._num: Optional[int] = None
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to state updates for this entity's (func, num)."""
+        await super().async_added_to_hass()
+        if self._teletask_func is not None and self._num is not None:
+            self.async_on_remove(
+                async_dispatcher_connect(
+                    self.hass,
+                    state_signal(self._teletask_func, self._num),
+                    self._async_handle_state_update
+                )
+            )
+
+    @callback
+    def _async_handle_state_update(self) -> None:
+        """Write the new state; only the entity whose device changed is touched."""
+        self.async_write_ha_state()
 
     @property
     def device_info(self) -> DeviceInfo:
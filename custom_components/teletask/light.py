@@ -1,7 +1,7 @@
 
 #################################################################################################
 # File:    light.py
-# Version: 1.5 - Added matter_enabled attribute for Matter Server filtering
+# Version: 1.7 - Commands awaited through the hub command worker
 #################################################################################################
 
 from typing import Any, Optional, Mapping
@@ -13,6 +13,7 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from . import DOMAIN
 from .entity import TeletaskEntity
+from .teletask.protocol import FUNC_DIMMER, FUNC_RELAY
 from .teletask.device_config import DeviceInfo
 
 # Relay types that should be exposed as lights
@@ -46,6 +47,7 @@ async def async_setup_entry(
 class TeletaskDimmer(TeletaskEntity, LightEntity):
     """Representation of a TeleTask dimmer light."""
 
+    _teletask_func = FUNC_DIMMER
     _attr_color_mode = ColorMode.BRIGHTNESS
     _attr_supported_color_modes = {ColorMode.BRIGHTNESS}
 
@@ -81,15 +83,11 @@ class TeletaskDimmer(TeletaskEntity, LightEntity):
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn the dimmer on."""
         val = kwargs.get(ATTR_BRIGHTNESS, 255)
-        await self.hass.async_add_executor_job(
-            self._hub.set_dimmer_value, self._num, val
-        )
+        await self._hub.async_set_dimmer_value(self._num, val)
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn the dimmer off."""
-        await self.hass.async_add_executor_job(
-            self._hub.set_dimmer_value, self._num, 0
-        )
+        await self._hub.async_set_dimmer_value(self._num, 0)
 
     @property
     def extra_state_attributes(self) -> Mapping[str, Any] | None:
@@ -105,6 +103,7 @@ class TeletaskDimmer(TeletaskEntity, LightEntity):
 class TeletaskRelayLight(TeletaskEntity, LightEntity):
     """Representation of a TeleTask relay as an on/off light (no dimming)."""
 
+    _teletask_func = FUNC_RELAY
     _attr_color_mode = ColorMode.ONOFF
     _attr_supported_color_modes = {ColorMode.ONOFF}
 
@@ -136,15 +135,11 @@ class TeletaskRelayLight(TeletaskEntity, LightEntity):
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn the light on."""
-        await self.hass.async_add_executor_job(
-            self._hub.set_relay_state, self._num, True
-        )
+        await self._hub.async_set_relay_state(self._num, True)
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn the light off."""
-        await self.hass.async_add_executor_job(
-            self._hub.set_relay_state, self._num, False
-        )
+        await self._hub.async_set_relay_state(self._num, False)
 
     @property
     def extra_state_attributes(self) -> Mapping[str, Any] | None:
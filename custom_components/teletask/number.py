@@ -1,7 +1,7 @@
 
 #################################################################################################
 # File:    number.py
-# Version: 1.2
+# Version: 1.4 - Commands awaited through the hub command worker
 #################################################################################################
 
 from typing import Optional
@@ -13,6 +13,7 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from . import DOMAIN
 from .entity import TeletaskEntity
+from .teletask.protocol import FUNC_DIMMER
 from .teletask.device_config import DeviceInfo
 
 
@@ -33,6 +34,7 @@ async def async_setup_entry(
 class TeletaskDimmerNumber(TeletaskEntity, NumberEntity):
     """Numeric control (0-255) for TeleTask dimmers."""
 
+    _teletask_func = FUNC_DIMMER
     _attr_native_min_value = 0
     _attr_native_max_value = 255
     _attr_native_step = 1
@@ -63,6 +65,4 @@ class TeletaskDimmerNumber(TeletaskEntity, NumberEntity):
 
     async def async_set_native_value(self, value: float) -> None:
         """Set the dimmer value."""
-        await self.hass.async_add_executor_job(
-            self._hub.set_dimmer_value, self._num, int(value)
-        )
+        await self._hub.async_set_dimmer_value(self._num, int(value))
@@ -1,7 +1,7 @@
 
 #################################################################################################
 # File:    sensor.py
-# Version: 1.2 - Added matter_enabled attribute for Matter Server filtering
+# Version: 1.3 - Push-based state updates (dispatcher per device, no polling)
 #################################################################################################
 
 from typing import Any, Mapping
@@ -17,6 +17,7 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from . import DOMAIN
 from .entity import TeletaskEntity
+from .teletask.protocol import FUNC_SENSOR
 from .teletask.device_config import SensorInfo
 
 # Map sensor types to Home Assistant device classes and units
@@ -67,6 +68,8 @@ async def async_setup_entry(
 class TeletaskSensor(TeletaskEntity, SensorEntity):
     """Representation of a TeleTask analog sensor."""
 
+    _teletask_func = FUNC_SENSOR
+
     def __init__(self, hub, sensor: SensorInfo, entry_id: str) -> None:
         """Initialize the analog sensor."""
         super().__init__(hub, entry_id)
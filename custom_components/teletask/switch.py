@@ -1,7 +1,7 @@
 
 #################################################################################################
 # File:    switch.py
-# Version: 1.5 - Added matter_enabled attribute for Matter Server filtering
+# Version: 1.7 - Commands awaited through the hub command worker
 #################################################################################################
 
 from typing import Any, Optional, Mapping
@@ -13,6 +13,7 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from . import DOMAIN
 from .entity import TeletaskEntity
+from .teletask.protocol import FUNC_RELAY
 from .teletask.device_config import DeviceInfo
 
 # Relay types that should be exposed as lights (not switches)
@@ -41,6 +42,8 @@ async def async_setup_entry(
 class TeletaskRelay(TeletaskEntity, SwitchEntity):
     """Representation of a TeleTask relay switch."""
 
+    _teletask_func = FUNC_RELAY
+
     def __init__(self, hub, device: DeviceInfo, entry_id: str) -> None:
         """Initialize the relay switch."""
         super().__init__(hub, entry_id)
@@ -67,15 +70,11 @@ class TeletaskRelay(TeletaskEntity, SwitchEntity):
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn the relay on."""
-        await self.hass.async_add_executor_job(
-            self._hub.set_relay_state, self._num, True
-        )
+        await self._hub.async_set_relay_state(self._num, True)
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn the relay off."""
-        await self.hass.async_add_executor_job(
-            self._hub.set_relay_state, self._num, False
-        )
+        await self._hub.async_set_relay_state(self._num, False)
 
     @property
     def extra_state_attributes(self) -> Mapping[str, Any] | None:
@@ -1,7 +1,7 @@
 
 #################################################################################################
 # File:    __init__.py
-# Version: V06.0
+# Version: V06.4
 #
 # Project: PHAeleTaskV1
 # Author:  Peter Spriet + AI assistant
@@ -12,3 +12,4 @@
 #################################################################################################
 
 from .micros_rs232 import MicrosRS232
+from .micros_async import AsyncMicrosRS232
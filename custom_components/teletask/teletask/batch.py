@@ -0,0 +1,152 @@
+#################################################################################################
+# File:    batch.py
+# Version: V07.4
+#
+# Description:
+#   Scene / batch bookkeeping for set_many().
+#   A batch is a list of (func, num, state) targets sent as one pipelined burst through the
+#   TxScheduler. After each round only the targets that were not confirmed are sent again;
+#   the summary reports the final status of every device plus the total wall-clock time.
+#################################################################################################
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .protocol import FUNC_RELAY, FUNC_DIMMER, FUNC_FLAG, STATE_ON, STATE_OFF
+from .scheduler import CommandHandle, STATUS_PENDING, STATUS_SUPERSEDED
+
+Target = Tuple[int, int, int]
+
+# Function names accepted in targets (besides the numeric function type)
+FUNCTION_NAMES: Dict[str, int] = {
+    "relay": FUNC_RELAY,
+    "dimmer": FUNC_DIMMER,
+    "flag": FUNC_FLAG,
+}
+
+# State names accepted in targets (besides 0-255)
+STATE_NAMES: Dict[str, int] = {
+    "on": STATE_ON,
+    "off": STATE_OFF,
+}
+
+DEFAULT_ROUNDS = 2
+
+
+def normalize_targets(targets: Iterable[Any]) -> List[Target]:
+    """
+    Validate batch targets.
+
+    Args:
+        targets: (func, num, state) tuples or dicts with "function"/"func", "number"/"num"
+            and "state". Functions may be names ("relay", "dimmer", "flag"), states may be
+            "ON" / "OFF".
+
+    Returns:
+        List of (func, num, state); a device listed twice keeps its last state, and states
+        are clamped to 0-255 like set_dimmer().
+
+    Raises:
+        ValueError: If a target is malformed.
+    """
+    result: Dict[Tuple[int, int], int] = {}
+    for item in targets:
+        if isinstance(item, dict):
+            func = item.get("function", item.get("func"))
+            num = item.get("number", item.get("num"))
+            state = item.get("state")
+        else:
+            try:
+                func, num, state = item
+            except (TypeError, ValueError):
+                raise ValueError(f"target must be (function, number, state), got: {item!r}") from None
+
+        if isinstance(func, str):
+            if func.lower() not in FUNCTION_NAMES:
+                raise ValueError(f"unknown function: {func} (use {', '.join(FUNCTION_NAMES)} or a number)")
+            func = FUNCTION_NAMES[func.lower()]
+        if isinstance(state, str) and state.lower() in STATE_NAMES:
+            state = STATE_NAMES[state.lower()]
+
+        try:
+            func, num, state = int(func), int(num), int(state)
+        except (TypeError, ValueError):
+            raise ValueError(f"invalid target: {item!r}") from None
+        if not 0 <= num <= 255:
+            raise ValueError(f"device number out of range: {num}")
+
+        key = (func, num)
+        result.pop(key, None)  # Re-insert so the order follows the last occurrence
+        result[key] = max(0, min(255, state))
+
+    return [(func, num, state) for (func, num), state in result.items()]
+
+
+class BatchRun:
+    """Per-target handles across rounds; builds the result summary."""
+
+    def __init__(self, targets: List[Target], rounds: int = DEFAULT_ROUNDS) -> None:
+        """
+        Initialize the run.
+
+        Args:
+            targets: Normalized targets (see normalize_targets).
+            rounds: Maximum number of sends per target (first burst + re-sends of failures).
+        """
+        self.targets = targets
+        self.rounds = max(1, int(rounds))
+        self.round = 0
+        self._handles: Dict[Target, CommandHandle] = {}
+        self._sends: Dict[Target, int] = dict.fromkeys(targets, 0)
+
+    def next_round(self) -> List[Target]:
+        """Return the targets to send in the next round (empty when done)."""
+        if self.round >= self.rounds:
+            return []
+        todo = [t for t in self.targets if not self._confirmed(t)]
+        if todo:
+            self.round += 1
+        return todo
+
+    def record(self, target: Target, handle: CommandHandle) -> None:
+        """Remember the handle of a target sent in the current round."""
+        self._handles[target] = handle
+        self._sends[target] += 1
+
+    def _confirmed(self, target: Target) -> bool:
+        handle = self._handles.get(target)
+        return handle is not None and (handle.ok or handle.status == STATUS_SUPERSEDED)
+
+    def summary(self, elapsed_s: float) -> Dict[str, Any]:
+        """
+        Build the result summary.
+
+        Returns:
+            Dict with elapsed_ms, rounds, total, confirmed, failed and a per-device results list.
+        """
+        results: List[Dict[str, Any]] = []
+        confirmed = 0
+        for target in self.targets:
+            handle: Optional[CommandHandle] = self._handles.get(target)
+            ok = self._confirmed(target)
+            confirmed += ok
+            func, num, state = target
+            results.append({
+                "function": func,
+                "number": num,
+                "state": state,
+                "ok": ok,
+                "status": handle.status if handle else STATUS_PENDING,
+                "sends": self._sends[target],
+                "attempts": handle.attempts if handle else 0,
+                "confirmed_via": handle.confirmed_via if handle else None,
+                "error": handle.error if handle and not ok else None,
+            })
+
+        return {
+            "elapsed_ms": round(elapsed_s * 1000.0, 1),
+            "rounds": self.round,
+            "total": len(self.targets),
+            "confirmed": confirmed,
+            "failed": len(self.targets) - confirmed,
+            "results": results,
+        }
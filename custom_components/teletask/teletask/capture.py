@@ -0,0 +1,246 @@
+#################################################################################################
+# File:    capture.py
+# Version: V08.4
+#
+# Description:
+#   Compact binary capture of the RS232 traffic (TX and RX frames).
+#   File layout (little endian):
+#     header  MAGIC (4) | FORMAT_VERSION (u8) | 3 reserved | wall start (f64) | mono start (f64)
+#     record  offset_us (u64) | direction (u8) | length (u8) | frame bytes
+#   offset_us is the monotonic time since the header's mono start, so replays keep the
+#   original spacing even if the wall clock jumps.
+#
+#   CaptureWriter never blocks the caller: record() appends to a bounded in-memory queue
+#   (records are dropped and counted when it is full) and a writer thread flushes it.
+#   Files rotate at max_bytes like logging's RotatingFileHandler (capture → capture.1 → ...),
+#   keeping `backups` old files; every file starts with its own header. A non-empty capture
+#   left by the previous run is rotated on start(), so a restart does not overwrite it.
+#################################################################################################
+
+import os
+import struct
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Iterator, NamedTuple, Optional, Tuple
+
+MAGIC = b"TTCP"
+FORMAT_VERSION = 1
+
+DIR_RX = 0
+DIR_TX = 1
+
+_HEADER = struct.Struct("<4sB3xdd")
+_RECORD = struct.Struct("<QBB")
+
+# Defaults for the "capture" config section
+DEFAULT_CAPTURE_FILE = "teletask_capture.ttcap"
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUPS = 3
+DEFAULT_MAX_PENDING = 10000
+DEFAULT_FLUSH_INTERVAL_S = 0.5
+
+
+class CaptureRecord(NamedTuple):
+    """One captured frame."""
+
+    offset_s: float  # Seconds since the start of the capture file (monotonic)
+    direction: int  # DIR_RX or DIR_TX
+    frame: bytes
+
+
+class CaptureWriter:
+    """Non-blocking, size-capped, rotating writer for capture files."""
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        backups: int = DEFAULT_BACKUPS,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        flush_interval_s: float = DEFAULT_FLUSH_INTERVAL_S
+    ) -> None:
+        """
+        Initialize the writer (call start() before recording).
+
+        Args:
+            path: Capture file path.
+            max_bytes: Rotate when the current file would grow beyond this size.
+            backups: Number of rotated files to keep (0 = truncate in place).
+            max_pending: Records buffered in memory before new ones are dropped.
+            flush_interval_s: How often the writer thread flushes the queue.
+        """
+        self.path = path
+        self.max_bytes = max(_HEADER.size + _RECORD.size + 255, int(max_bytes))
+        self.backups = max(0, int(backups))
+        self.max_pending = max(1, int(max_pending))
+        self.flush_interval_s = flush_interval_s
+
+        self._pending: Deque[Tuple[float, int, bytes]] = deque()
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._file = None
+        self._size = 0
+        self._mono_start = 0.0
+
+        # Counters
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.rotations = 0
+
+    #################################################################################################
+    # Lifecycle
+    #################################################################################################
+    def start(self) -> None:
+        """Rotate the previous run's capture, open a new file and start the writer thread."""
+        if self._running:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        if os.path.isfile(self.path) and os.path.getsize(self.path) > 0:
+            self._shift_backups()
+        self._open()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="teletask-capture", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Flush what is queued and close the file."""
+        with self._cond:
+            if not self._running:
+                return
+            self._running = False
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        self._flush()
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    #################################################################################################
+    # Producer side (TX path / RX-thread)
+    #################################################################################################
+    def record(self, direction: int, frame: bytes) -> None:
+        """Queue one frame; never blocks (drops and counts when the queue is full)."""
+        ts = time.monotonic()
+        with self._cond:
+            if len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return
+            self._pending.append((ts, direction, bytes(frame)))
+            self.recorded += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Return writer counters as a dict."""
+        with self._cond:
+            return {
+                "recorded": self.recorded,
+                "written": self.written,
+                "dropped": self.dropped,
+                "pending": len(self._pending),
+                "rotations": self.rotations,
+                "file_bytes": self._size,
+            }
+
+    #################################################################################################
+    # Writer thread
+    #################################################################################################
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._running:
+                    return
+                self._cond.wait(self.flush_interval_s)
+            self._flush()
+
+    def _flush(self) -> None:
+        with self._cond:
+            batch, self._pending = self._pending, deque()
+        if not batch or self._file is None:
+            return
+        chunk = bytearray()
+        for ts, direction, frame in batch:
+            size = _RECORD.size + len(frame)
+            if self._size + len(chunk) + size > self.max_bytes:
+                self._file.write(chunk)
+                chunk = bytearray()
+                self._rotate(ts)
+            offset_us = max(0, int((ts - self._mono_start) * 1e6))
+            chunk += _RECORD.pack(offset_us, direction, len(frame)) + frame
+        self._file.write(chunk)
+        self._file.flush()
+        self._size += len(chunk)
+        self.written += len(batch)
+
+    def _open(self, mono_start: Optional[float] = None) -> None:
+        """Start a new file whose offsets count from mono_start (default: now)."""
+        now = time.monotonic()
+        self._mono_start = now if mono_start is None else mono_start
+        wall_start = time.time() - (now - self._mono_start)
+        self._file = open(self.path, "wb")
+        self._file.write(_HEADER.pack(MAGIC, FORMAT_VERSION, wall_start, self._mono_start))
+        self._size = _HEADER.size
+
+    def _rotate(self, mono_start: float) -> None:
+        """Close the current file, shift backups and start a new file at the next record."""
+        self._file.close()
+        self._shift_backups()
+        self.rotations += 1
+        self._open(mono_start)
+
+    def _shift_backups(self) -> None:
+        """Move capture → capture.1 → ... (the oldest beyond `backups` is dropped)."""
+        if not self.backups:
+            return
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+
+def read_header(path: str) -> Tuple[float, float]:
+    """
+    Return (wall start, monotonic start) of a capture file.
+
+    Raises:
+        ValueError: If the file is not a capture file.
+    """
+    with open(path, "rb") as f:
+        return _parse_header(f.read(_HEADER.size), path)
+
+
+def _parse_header(data: bytes, path: str) -> Tuple[float, float]:
+    if len(data) < _HEADER.size:
+        raise ValueError(f"{path}: not a TeleTask capture file (too short)")
+    magic, version, wall_start, mono_start = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path}: not a TeleTask capture file")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"{path}: unsupported capture format version {version}")
+    return wall_start, mono_start
+
+
+def read_capture(path: str) -> Iterator[CaptureRecord]:
+    """
+    Iterate over the records of a capture file (a truncated last record is ignored).
+
+    Raises:
+        ValueError: If the file is not a capture file.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    _parse_header(data, path)
+    pos = _HEADER.size
+    end = len(data)
+    while pos + _RECORD.size <= end:
+        offset_us, direction, length = _RECORD.unpack_from(data, pos)
+        pos += _RECORD.size
+        if pos + length > end:
+            return
+        yield CaptureRecord(offset_us / 1e6, direction, data[pos:pos + length])
+        pos += length
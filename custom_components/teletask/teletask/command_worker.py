@@ -0,0 +1,232 @@
+#################################################################################################
+# File:    command_worker.py
+# Version: V08.4
+#
+# Description:
+#   Single-thread command queue for asyncio callers (Home Assistant entities and services).
+#   Instead of borrowing one executor thread per call (each blocking on the serial port),
+#   callers enqueue a command and await an asyncio Future:
+#     - One worker thread runs the commands in order
+#     - A command that returns a CommandHandle is NOT waited for: the Future is completed by
+#       the handle's done callback, so SETs stay pipelined in the TxScheduler
+#     - The depth limit counts outstanding commands: queued, running, or waiting for the
+#       CommandHandle they returned (CommandQueueFull when exceeded), so it bounds what the
+#       worker has handed to the TxScheduler as well
+#     - Every command has a timeout; commands that expire while queued are skipped
+#   async_wait_handle() lets loop code await any CommandHandle the same way.
+#################################################################################################
+
+import asyncio
+import queue
+import threading
+import time
+from functools import partial
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .scheduler import CommandHandle, STATUS_SUPERSEDED
+
+# Defaults for the "hub" config section
+DEFAULT_QUEUE_DEPTH = 64
+DEFAULT_COMMAND_TIMEOUT_S = 15.0
+
+
+class CommandQueueFull(RuntimeError):
+    """Raised when a command is submitted while the queue is at its depth limit."""
+
+
+class CommandWorker:
+    """One worker thread servicing a bounded queue of commands, results delivered as asyncio Futures."""
+
+    def __init__(
+        self,
+        max_depth: int = DEFAULT_QUEUE_DEPTH,
+        timeout_s: float = DEFAULT_COMMAND_TIMEOUT_S,
+        name: str = "teletask-cmd"
+    ) -> None:
+        """
+        Initialize the worker (call start() before submitting).
+
+        Args:
+            max_depth: Maximum number of outstanding commands (queued, running, or waiting for
+                the CommandHandle they returned).
+            timeout_s: Default per-command timeout (queue wait + execution + confirmation).
+            name: Worker thread name.
+        """
+        self.max_depth = max(1, int(max_depth))
+        self.timeout_s = float(timeout_s)
+        self._name = name
+        self._queue: "queue.Queue[Optional[Tuple]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+
+        # Counters (updated from the event loop, the worker thread and the scheduler thread)
+        self._lock = threading.Lock()
+        self.outstanding = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.rejected = 0
+        self.high_water = 0
+
+    #################################################################################################
+    # Lifecycle
+    #################################################################################################
+    def start(self) -> None:
+        """Start the worker thread."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the worker after the command that is currently running."""
+        if self._thread is None:
+            return
+        # Drain what is left, then wake the worker with the stop marker
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                _, _, future, loop, _ = item
+                self._release()
+                loop.call_soon_threadsafe(_set_exception, future, RuntimeError("command worker stopped"))
+        self._queue.put(None)
+        self._thread.join(timeout=2.0)
+        self._thread = None
+
+    #################################################################################################
+    # Public API
+    #################################################################################################
+    def submit(self, fn: Callable[..., Any], *args: Any, timeout: Optional[float] = None) -> "asyncio.Future":
+        """
+        Queue `fn(*args)` for the worker thread. Must be called from the event loop.
+
+        Args:
+            fn: Blocking function to run; may return a CommandHandle to be awaited without
+                holding the worker.
+            *args: Arguments for fn.
+            timeout: Seconds until the Future fails with TimeoutError (default: timeout_s).
+
+        Returns:
+            Future with fn's result (True for a confirmed / superseded CommandHandle).
+
+        Raises:
+            CommandQueueFull: If max_depth commands are already outstanding.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        timeout = self.timeout_s if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        with self._lock:
+            if self.outstanding >= self.max_depth:
+                self.rejected += 1
+                raise CommandQueueFull(f"command queue full ({self.max_depth} pending)")
+            self.outstanding += 1
+            self.submitted += 1
+            self.high_water = max(self.high_water, self.outstanding)
+        self._queue.put_nowait((fn, args, future, loop, deadline))
+
+        timer = loop.call_later(timeout, self._expire, future)
+        future.add_done_callback(lambda _f: timer.cancel())
+        return future
+
+    def stats(self) -> Dict[str, int]:
+        """Return worker counters as a dict."""
+        with self._lock:
+            return {
+                "max_depth": self.max_depth,
+                "pending": self._queue.qsize(),
+                "outstanding": self.outstanding,
+                "high_water": self.high_water,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "timed_out": self.timed_out,
+                "rejected": self.rejected,
+            }
+
+    #################################################################################################
+    # Worker thread
+    #################################################################################################
+    def _expire(self, future: "asyncio.Future") -> None:
+        """
+        Fail a command that ran out of time (runs in the event loop).
+
+        The command stays outstanding until it has actually finished (skipped while queued,
+        or its CommandHandle completed), so the depth limit keeps counting it.
+        """
+        if not future.done():
+            with self._lock:
+                self.timed_out += 1
+            future.set_exception(TimeoutError("TeleTask command timed out"))
+
+    def _release(self, counter: Optional[str] = None) -> None:
+        """Mark one command as finished, optionally bumping `counter` (any thread)."""
+        with self._lock:
+            self.outstanding -= 1
+            if counter is not None:
+                setattr(self, counter, getattr(self, counter) + 1)
+
+    def _run(self) -> None:
+        """Run queued commands one at a time."""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            fn, args, future, loop, deadline = item
+
+            # Expired or cancelled while queued → skip without touching the bus
+            if future.done() or time.monotonic() >= deadline:
+                self._release()
+                continue
+
+            try:
+                result = fn(*args)
+            except Exception as e:
+                self._release("failed")
+                loop.call_soon_threadsafe(_set_exception, future, e)
+                continue
+
+            if isinstance(result, CommandHandle):
+                result.add_done_callback(partial(self._on_handle_done, future, loop))
+            else:
+                self._release("completed")
+                loop.call_soon_threadsafe(_set_result, future, result)
+
+    def _on_handle_done(self, future: "asyncio.Future", loop: asyncio.AbstractEventLoop, handle: CommandHandle) -> None:
+        """Release the command once its CommandHandle finished (scheduler thread)."""
+        ok = handle.ok or handle.status == STATUS_SUPERSEDED
+        self._release("completed" if ok else "failed")
+        loop.call_soon_threadsafe(self._resolve_handle, future, handle)
+
+    @staticmethod
+    def _resolve_handle(future: "asyncio.Future", handle: CommandHandle) -> None:
+        """Complete a Future from a finished CommandHandle (runs in the event loop)."""
+        if handle.ok or handle.status == STATUS_SUPERSEDED:
+            _set_result(future, True)
+        else:
+            _set_exception(
+                future,
+                RuntimeError(f"SET func={handle.func} num={handle.num} not confirmed ({handle.status})")
+            )
+
+
+async def async_wait_handle(handle: CommandHandle) -> CommandHandle:
+    """Await a CommandHandle from the event loop without blocking a thread."""
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    handle.add_done_callback(lambda h: loop.call_soon_threadsafe(_set_result, future, h))
+    return await future
+
+
+def _set_result(future: "asyncio.Future", result: Any) -> None:
+    if not future.done():
+        future.set_result(result)
+
+
+def _set_exception(future: "asyncio.Future", exc: BaseException) -> None:
+    if not future.done():
+        future.set_exception(exc)
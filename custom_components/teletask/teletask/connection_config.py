@@ -0,0 +1,87 @@
+#################################################################################################
+# File:    connection_config.py
+# Version: V06.4
+#
+# Description:
+#   Loader for the TELETASK connection configuration (config.json).
+#   Shared by the threaded MicrosRS232 driver and the asyncio AsyncMicrosRS232 driver.
+#   Required sections: 'serial' (port, baudrate, timeout) and 'reliability' (retry/timing).
+#################################################################################################
+
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict
+
+
+@dataclass
+class ConnectionConfig:
+    """Serial and reliability settings for a MICROS connection."""
+    port: str
+    baudrate: int = 19200
+    timeout: float = 1.0
+    retries: int = 3
+    confirm_timeout_ms: int = 800
+    ack_timeout_ms: int = 300
+    retry_delay_ms: int = 250
+    post_send_gap_ms: int = 140
+    pre_send_flush: bool = True
+    raw: Dict[str, Any] = field(default_factory=dict)  # Full parsed file (optional sections)
+
+    def section(self, name: str) -> Dict[str, Any]:
+        """Return an optional config section as a dict (empty if missing)."""
+        value = self.raw.get(name)
+        return value if isinstance(value, dict) else {}
+
+
+def load_connection_config(config_path: str = "config.json") -> ConnectionConfig:
+    """
+    Load and validate the connection configuration.
+
+    Args:
+        config_path: Path to JSON config file with serial and reliability settings.
+
+    Returns:
+        ConnectionConfig with defaults applied.
+
+    Raises:
+        FileNotFoundError: If config file does not exist.
+        ValueError: If config file is malformed or missing required keys.
+    """
+    if not os.path.exists(config_path):
+        raise FileNotFoundError(
+            f"Config file not found: {config_path}. "
+            f"Create it with 'serial' and 'reliability' sections."
+        )
+
+    try:
+        with open(config_path, "r") as f:
+            cfg = json.load(f)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON in config file '{config_path}': {e}")
+
+    # Validate required sections
+    if "serial" not in cfg:
+        raise ValueError("Config missing required section: 'serial'")
+    if "reliability" not in cfg:
+        raise ValueError("Config missing required section: 'reliability'")
+
+    serial_cfg = cfg["serial"]
+    rel_cfg = cfg["reliability"]
+
+    port = serial_cfg.get("port")
+    if not port:
+        raise ValueError("Config missing 'serial.port'")
+
+    return ConnectionConfig(
+        port=port,
+        baudrate=serial_cfg.get("baudrate", 19200),
+        timeout=serial_cfg.get("timeout", 1.0),
+        retries=rel_cfg.get("retries", 3),
+        confirm_timeout_ms=rel_cfg.get("confirm_timeout_ms", 800),
+        ack_timeout_ms=rel_cfg.get("ack_timeout_ms", 300),
+        retry_delay_ms=rel_cfg.get("retry_delay_ms", 250),
+        post_send_gap_ms=rel_cfg.get("post_send_gap_ms", 140),
+        pre_send_flush=rel_cfg.get("pre_send_flush", True),
+        raw=cfg,
+    )
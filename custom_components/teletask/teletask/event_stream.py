@@ -0,0 +1,153 @@
+#################################################################################################
+# File:    event_stream.py
+# Version: V06.7
+#
+# Description:
+#   Bounded hand-off between the RX-thread and state listeners.
+#   The RX-thread only appends; a dedicated consumer thread in the driver drains the stream and
+#   calls the listeners. When consumers fall behind, memory stays bounded:
+#     - "coalesce":    one pending entry per (func, num); a newer state replaces the older one
+#                      (listeners only ever need the latest state of a device)
+#     - "drop_oldest": plain FIFO; when full the oldest entry is discarded
+#   Dropped and coalesced frames are counted for diagnostics.
+#################################################################################################
+
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+POLICY_COALESCE = "coalesce"
+POLICY_DROP_OLDEST = "drop_oldest"
+POLICIES = (POLICY_COALESCE, POLICY_DROP_OLDEST)
+
+DEFAULT_MAX_PENDING = 256
+
+
+class EventStream:
+    """Thread-safe bounded event stream with drop-oldest or per-device coalescing."""
+
+    def __init__(self, max_pending: int = DEFAULT_MAX_PENDING, policy: str = POLICY_COALESCE) -> None:
+        """
+        Initialize the stream.
+
+        Args:
+            max_pending: Maximum number of undelivered events kept in memory.
+            policy: POLICY_COALESCE or POLICY_DROP_OLDEST.
+
+        Raises:
+            ValueError: If policy is unknown or max_pending < 1.
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"event policy must be one of {POLICIES}, got: {policy}")
+        if max_pending < 1:
+            raise ValueError("max_pending must be >= 1")
+
+        self.max_pending = max_pending
+        self.policy = policy
+
+        self._cond = threading.Condition()
+        self._fifo: Deque[Any] = deque()
+        self._by_key: "OrderedDict[Tuple[int, int], Any]" = OrderedDict()
+        self._closed = False
+
+        # Counters
+        self.received = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.high_water = 0
+
+    def __len__(self) -> int:
+        """Return the number of pending events."""
+        with self._cond:
+            return self._pending()
+
+    def _pending(self) -> int:
+        return len(self._by_key) if self.policy == POLICY_COALESCE else len(self._fifo)
+
+    def put(self, event: Any) -> None:
+        """
+        Append an event (never blocks). Events must have .func and .num attributes.
+
+        Args:
+            event: StateEvent (or compatible) to deliver.
+        """
+        with self._cond:
+            self.received += 1
+
+            if self.policy == POLICY_COALESCE:
+                key = (event.func, event.num)
+                if key in self._by_key:
+                    # Keep queue position of the first pending report, latest state wins
+                    self._by_key[key] = event
+                    self.coalesced += 1
+                else:
+                    if len(self._by_key) >= self.max_pending:
+                        self._by_key.popitem(last=False)
+                        self.dropped += 1
+                    self._by_key[key] = event
+            else:
+                if len(self._fifo) >= self.max_pending:
+                    self._fifo.popleft()
+                    self.dropped += 1
+                self._fifo.append(event)
+
+            pending = self._pending()
+            if pending > self.high_water:
+                self.high_water = pending
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        """
+        Remove and return the next event.
+
+        Args:
+            timeout: Seconds to wait; None waits until an event arrives or the stream closes.
+
+        Returns:
+            The event, or None on timeout / close.
+        """
+        with self._cond:
+            if not self._pending() and not self._closed:
+                self._cond.wait(timeout)
+            if not self._pending():
+                return None
+
+            if self.policy == POLICY_COALESCE:
+                _, event = self._by_key.popitem(last=False)
+            else:
+                event = self._fifo.popleft()
+            self.delivered += 1
+            return event
+
+    def close(self) -> None:
+        """Wake up the consumer; get() returns None once the stream is empty."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def reopen(self) -> None:
+        """Accept a new consumer after close() (driver restart)."""
+        with self._cond:
+            self._closed = False
+
+    def clear(self) -> None:
+        """Discard all pending events (counted as dropped)."""
+        with self._cond:
+            self.dropped += self._pending()
+            self._fifo.clear()
+            self._by_key.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return stream counters as a dict."""
+        with self._cond:
+            return {
+                "policy": self.policy,
+                "max_pending": self.max_pending,
+                "pending": self._pending(),
+                "high_water": self.high_water,
+                "received": self.received,
+                "delivered": self.delivered,
+                "dropped": self.dropped,
+                "coalesced": self.coalesced,
+            }
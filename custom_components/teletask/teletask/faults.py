@@ -0,0 +1,193 @@
+#################################################################################################
+# File:    faults.py
+# Version: V07.9
+#
+# Description:
+#   Fault-injection transport for reliability and latency testing.
+#   FaultyPort wraps any pyserial-compatible port (real serial, socket://, emulator) and
+#   damages the traffic at configurable rates before the driver sees it:
+#     - rx_drop_byte / tx_drop_byte   every byte is lost with this probability
+#     - corrupt_checksum              frame arrives with a wrong CHK byte
+#     - partial_frame                 frame arrives truncated (tail lost)
+#     - duplicate_event               EVENT frame arrives twice
+#     - ack_delay_rate / ack_delay_ms ACK frame arrives ack_delay_ms late
+#   Received bytes are pumped from the inner port by a thread and re-framed, so faults are
+#   applied per frame; read()/in_waiting only expose bytes whose (delayed) arrival is due.
+#
+#   Enabled through the optional "faults" config section ("enabled": true); never active
+#   otherwise.
+#################################################################################################
+
+import heapq
+import random
+import threading
+import time
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from .framing import FrameParser
+from .protocol import CMD_EVENT
+from .waiters import ACK_CMDS
+
+# Fault rates (0.0 - 1.0) and delays understood in the "faults" config section
+FAULT_KEYS: Tuple[str, ...] = (
+    "rx_drop_byte", "tx_drop_byte", "corrupt_checksum", "partial_frame", "duplicate_event", "ack_delay_rate",
+)
+DEFAULT_ACK_DELAY_MS = 200.0
+
+
+class FaultyPort:
+    """pyserial-compatible wrapper that injects transport faults."""
+
+    def __init__(self, inner: Any, config: Optional[Mapping[str, Any]] = None) -> None:
+        """
+        Wrap a port and start the RX pump.
+
+        Args:
+            inner: Open pyserial-compatible port.
+            config: Fault rates (see FAULT_KEYS), ack_delay_ms and an optional seed.
+        """
+        config = config or {}
+        self.inner = inner
+        self.timeout = getattr(inner, "timeout", 1.0) or 1.0
+        self.rates: Dict[str, float] = {key: max(0.0, min(1.0, float(config.get(key, 0.0)))) for key in FAULT_KEYS}
+        self.ack_delay_ms = float(config.get("ack_delay_ms", DEFAULT_ACK_DELAY_MS))
+        self._rng = random.Random(config.get("seed"))
+
+        self._cond = threading.Condition()
+        self._buf = bytearray()
+        self._delayed: List[Tuple[float, int, bytes]] = []
+        self._seq = 0
+        self._parser = FrameParser()
+        self.is_open = True
+
+        # Counters (per injected fault)
+        self.injected: Dict[str, int] = dict.fromkeys(FAULT_KEYS, 0)
+        self.frames = 0
+
+        self._thread = threading.Thread(target=self._pump, name="teletask-faults", daemon=True)
+        self._thread.start()
+
+    #################################################################################################
+    # Fault model
+    #################################################################################################
+    def _hit(self, key: str) -> bool:
+        rate = self.rates[key]
+        if rate and self._rng.random() < rate:
+            self.injected[key] += 1
+            return True
+        return False
+
+    def _drop_bytes(self, data: bytes, key: str) -> bytes:
+        if not self.rates[key]:
+            return data
+        return bytes(b for b in data if not self._hit(key))
+
+    def _damage(self, frame: bytes) -> List[Tuple[float, bytes]]:
+        """Return (delay_s, bytes) chunks the host receives for one frame from the MICROS."""
+        self.frames += 1
+        cmd = frame[2]
+        if cmd in ACK_CMDS and self._hit("ack_delay_rate"):
+            return [(self.ack_delay_ms / 1000.0, frame)]
+
+        out = frame
+        if self._hit("corrupt_checksum"):
+            out = out[:-1] + bytes([(out[-1] + 1 + self._rng.randrange(255)) & 0xFF])
+        if self._hit("partial_frame"):
+            out = out[:self._rng.randrange(1, len(out))]
+        out = self._drop_bytes(out, "rx_drop_byte")
+
+        chunks = [(0.0, out)]
+        if cmd == CMD_EVENT and self._hit("duplicate_event"):
+            chunks.append((0.0, frame))
+        return chunks
+
+    #################################################################################################
+    # RX pump (inner port → fault model → host buffer)
+    #################################################################################################
+    def _pump(self) -> None:
+        while self.is_open:
+            try:
+                waiting = self.inner.in_waiting
+                data = self.inner.read(waiting or 1)
+            except Exception:
+                if not self.is_open:
+                    return
+                time.sleep(0.05)
+                continue
+            if not data:
+                continue
+
+            self._parser.feed(data)
+            now = time.monotonic()
+            with self._cond:
+                for frame in self._parser.frames_available():
+                    for delay_s, chunk in self._damage(frame):
+                        if delay_s:
+                            self._seq += 1
+                            heapq.heappush(self._delayed, (now + delay_s, self._seq, chunk))
+                        else:
+                            self._buf += chunk
+                self._cond.notify_all()
+
+    def _release_due(self, now: float) -> Optional[float]:
+        """Move delayed chunks that are due into the buffer; return the next due time (caller holds the condition)."""
+        while self._delayed and self._delayed[0][0] <= now:
+            self._buf += heapq.heappop(self._delayed)[2]
+        return self._delayed[0][0] if self._delayed else None
+
+    #################################################################################################
+    # pyserial surface used by MicrosRS232
+    #################################################################################################
+    @property
+    def in_waiting(self) -> int:
+        with self._cond:
+            self._release_due(time.monotonic())
+            return len(self._buf)
+
+    def read(self, size: int = 1) -> bytes:
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while self.is_open:
+                now = time.monotonic()
+                next_due = self._release_due(now)
+                if self._buf or now >= deadline:
+                    break
+                wait_s = deadline - now if next_due is None else min(deadline, next_due) - now
+                self._cond.wait(max(0.0, wait_s))
+            out = bytes(self._buf[:size])
+            del self._buf[:size]
+            return out
+
+    def write(self, data: bytes) -> int:
+        self.inner.write(self._drop_bytes(bytes(data), "tx_drop_byte"))
+        return len(data)
+
+    def reset_input_buffer(self) -> None:
+        with self._cond:
+            self._buf.clear()
+        self.inner.reset_input_buffer()
+
+    def setDTR(self, value: bool = True) -> None:
+        self.inner.setDTR(value)
+
+    def setRTS(self, value: bool = True) -> None:
+        self.inner.setRTS(value)
+
+    def close(self) -> None:
+        with self._cond:
+            self.is_open = False
+            self._cond.notify_all()
+        self.inner.close()
+        self._thread.join(timeout=1.0)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the frame count and injected faults per type."""
+        with self._cond:
+            return {"frames": self.frames, "injected": dict(self.injected), "rates": dict(self.rates)}
+
+
+def wrap_port(port: Any, config: Optional[Mapping[str, Any]]) -> Any:
+    """Return `port` wrapped in a FaultyPort if the "faults" section is enabled, else unchanged."""
+    if not config or not config.get("enabled", False):
+        return port
+    return FaultyPort(port, config)
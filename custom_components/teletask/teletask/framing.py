@@ -0,0 +1,195 @@
+#################################################################################################
+# File:    framing.py
+# Version: V06.4
+#
+# Description:
+#   Streaming frame parser for TELETASK MICROS RS232 traffic.
+#   The RX-thread feeds whatever bytes the port has available; the parser keeps them in one
+#   reusable bytearray and yields every complete, checksum-valid frame.
+#
+#   Frame layout:  STX | LEN | CMD | payload... | CHK
+#     - LEN counts everything after STX (LEN + CMD + payload + CHK)
+#     - CHK is the 8-bit sum of all preceding bytes (STX included)
+#################################################################################################
+
+from typing import Iterator, Optional, Tuple
+
+from .protocol import STX
+from .helpers import checksum
+
+# Length limits (minimum: STX + LEN + CMD + CHK = 4 bytes, so LEN >= 3)
+MIN_FRAME_LEN: int = 3
+MAX_FRAME_LEN: int = 64
+
+# Bytes that show up between frames on a healthy link and are not worth a warning
+_QUIET_BYTES = (0x0A, 0x0D)
+
+
+class FrameParser:
+    """
+    Incremental STX/LEN/CHK frame extractor backed by a reusable bytearray.
+
+    The buffer is allocated once. Consumed bytes are tracked with a read index and only
+    compacted (moved to the front) when new data would not fit behind the unread tail,
+    so a burst of frames costs one copy per read instead of one slice per frame.
+    """
+
+    def __init__(self, capacity: int = 4096) -> None:
+        """
+        Initialize the parser.
+
+        Args:
+            capacity: Buffer size in bytes. Must hold at least one maximum-length frame.
+        """
+        if capacity < MAX_FRAME_LEN + 1:
+            raise ValueError(f"capacity must be at least {MAX_FRAME_LEN + 1} bytes")
+        self._buf = bytearray(capacity)
+        self._start = 0
+        self._end = 0
+
+        # Statistics (plain counters, read by diagnostics and benchmarks)
+        self.frames = 0
+        self.discarded = 0
+        self.bad_length = 0
+        self.bad_checksum = 0
+
+    def __len__(self) -> int:
+        """Return the number of buffered, not yet parsed bytes."""
+        return self._end - self._start
+
+    def reset(self) -> None:
+        """Drop all buffered bytes (e.g. after a reconnect)."""
+        self._start = 0
+        self._end = 0
+
+    def resync(self) -> None:
+        """
+        Give up on a stalled partial frame.
+
+        Called when the link goes idle with bytes still buffered: the leading STX (and the
+        LEN it announced) was probably noise, so skip it. The caller then drains
+        frames_available() again, which finds the following STX and any complete frame
+        that was waiting behind the noise.
+        """
+        if self._end > self._start:
+            self._start += 1
+            self.discarded += 1
+
+    def feed(self, data: bytes) -> int:
+        """
+        Append raw bytes to the buffer.
+
+        Args:
+            data: Bytes as read from the port.
+
+        Returns:
+            Number of unread bytes that had to be dropped to make room (0 on a healthy link).
+        """
+        n = len(data)
+        if not n:
+            return 0
+
+        buf = self._buf
+        cap = len(buf)
+        dropped = 0
+
+        if self._end + n > cap:
+            # Compact: move the unread tail to the front
+            pending = self._end - self._start
+            if pending + n > cap:
+                # Not even compaction helps: keep only the newest bytes
+                keep = max(0, cap - n)
+                dropped = pending - keep
+                self._start = self._end - keep
+                pending = keep
+                if n > cap:
+                    dropped += n - cap
+                    data = data[-cap:]
+                    n = cap
+            buf[0:pending] = buf[self._start:self._end]
+            self._start = 0
+            self._end = pending
+
+        buf[self._end:self._end + n] = data
+        self._end += n
+        self.discarded += dropped
+        return dropped
+
+    def frames_available(self) -> Iterator[bytes]:
+        """
+        Yield every complete, valid frame currently in the buffer.
+
+        Resync rules:
+            - Bytes before an STX are discarded.
+            - An STX followed by an out-of-range LEN, or a frame with a bad checksum,
+              is treated as noise: only the STX byte is skipped and scanning restarts
+              right after it, so a real frame hidden inside the garbage is not lost.
+            - An incomplete frame stays buffered until the next feed().
+        """
+        buf = self._buf
+        while True:
+            start = self._start
+            end = self._end
+            if start >= end:
+                self._start = self._end = 0
+                return
+
+            if buf[start] != STX:
+                idx = buf.find(STX, start, end)
+                stop = end if idx < 0 else idx
+                for b in buf[start:stop]:
+                    if b not in _QUIET_BYTES:
+                        self.discarded += 1
+                self._start = stop
+                continue
+
+            if end - start < 2:
+                return  # Need LEN byte
+
+            ln = buf[start + 1]
+            if ln < MIN_FRAME_LEN or ln > MAX_FRAME_LEN:
+                self.bad_length += 1
+                self._start = start + 1
+                continue
+
+            total = ln + 1  # LEN counts itself but not STX
+            if end - start < total:
+                return  # Wait for the rest of the frame
+
+            stop = start + total
+            if checksum(buf[start:stop - 1]) != buf[stop - 1]:
+                self.bad_checksum += 1
+                self._start = start + 1
+                continue
+
+            self._start = stop
+            self.frames += 1
+            yield bytes(buf[start:stop])
+
+    def stats(self) -> dict:
+        """Return parser counters as a dict."""
+        return {
+            "frames": self.frames,
+            "discarded": self.discarded,
+            "bad_length": self.bad_length,
+            "bad_checksum": self.bad_checksum,
+            "buffered": len(self),
+        }
+
+
+def compose_frame(cmd: int, payload: bytes) -> bytes:
+    """Build a complete frame (STX, LEN, CMD, payload, CHK)."""
+    ln = 3 + len(payload)
+    base = bytes([STX, ln, cmd]) + payload
+    return base + bytes([checksum(base)])
+
+
+def parse_state(frame: bytes) -> Tuple[Optional[int], Optional[int], Optional[int]]:
+    """Return (func, num, state) of an EVENT/GET frame, or (None, None, None)."""
+    if not frame or len(frame) < 7:
+        return None, None, None
+
+    if checksum(frame[:-1]) != frame[-1]:
+        return None, None, None
+
+    return frame[3], frame[4], frame[5]
@@ -0,0 +1,456 @@
+#################################################################################################
+# File:    micros_async.py
+# Version: V06.5
+#
+# Description:
+#   asyncio-native driver for TELETASK MICROS, alongside the threaded MicrosRS232.
+#   Same config.json, protocol constants and frame format; no threads:
+#     - socket://host:port  → asyncio TCP transport (loop.create_connection)
+#     - serial device       → pyserial-asyncio-fast transport (listed in manifest.json)
+#     - RX handled in asyncio.Protocol.data_received via the shared FrameParser
+#     - Awaitable SET with:  ACK → EVENT → fallback GET (same policy as MicrosRS232)
+#
+#   Waiting for a confirmation costs nothing but a pending future, so many commands can
+#   be awaited concurrently without parking executor threads.
+#
+#   V06.5 Pending waits fail with ConnectionError when the transport closes (no bare
+#         CancelledError in the caller); serial transport dependency declared in manifest.json
+#################################################################################################
+
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+from .protocol import (
+    CMD_SET, CMD_GET, CMD_LOG, CMD_EVENT,
+    FUNC_RELAY, FUNC_DIMMER, FUNC_MOTOR,
+    FUNC_LOCMOOD, FUNC_TIMEDMOOD, FUNC_GENMOOD,
+    FUNC_FLAG, FUNC_SENSOR, FUNC_COND,
+    STATE_ON, STATE_OFF
+)
+from .framing import FrameParser, compose_frame, parse_state
+from .connection_config import load_connection_config
+from .events import StateEvent
+
+# Function types for which event reporting is enabled on connect
+EVENT_REPORTING_FUNCS = (
+    FUNC_RELAY, FUNC_DIMMER, FUNC_LOCMOOD, FUNC_TIMEDMOOD, FUNC_GENMOOD,
+    FUNC_FLAG, FUNC_SENSOR, FUNC_MOTOR, FUNC_COND,
+)
+
+_MOOD_FUNCS = {"LOCAL": FUNC_LOCMOOD, "TIMED": FUNC_TIMEDMOOD, "GENERAL": FUNC_GENMOOD}
+
+
+class _MicrosProtocol(asyncio.Protocol):
+    """asyncio protocol that hands raw RX bytes to the driver."""
+
+    def __init__(self, driver: "AsyncMicrosRS232") -> None:
+        self._driver = driver
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self._driver._transport = transport
+
+    def data_received(self, data: bytes) -> None:
+        self._driver._data_received(data)
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        self._driver._connection_lost(exc)
+
+
+class AsyncMicrosRS232:
+    """V06 - asyncio driver for TELETASK MICROS (no RX-thread, no executor jobs)."""
+
+    def __init__(
+        self,
+        config_path: str = "config.json",
+        log_callback: Optional[Callable[[str], None]] = None
+    ) -> None:
+        """
+        Initialize the asyncio TELETASK MICROS driver.
+
+        Args:
+            config_path: Path to JSON config file with serial and reliability settings.
+            log_callback: Optional callback function for log messages.
+
+        Raises:
+            FileNotFoundError: If config file does not exist.
+            ValueError: If config file is malformed or missing required keys.
+        """
+        self.log_callback = log_callback
+
+        cfg = load_connection_config(config_path)
+        self.config = cfg
+        self.port = cfg.port
+        self.baudrate = cfg.baudrate
+        self.retries = cfg.retries
+        self.confirm_timeout_ms = cfg.confirm_timeout_ms
+        self.ack_timeout_ms = cfg.ack_timeout_ms
+        self.retry_delay_ms = cfg.retry_delay_ms
+        self.post_send_gap_ms = cfg.post_send_gap_ms
+
+        self._transport: Optional[asyncio.BaseTransport] = None
+        self._parser = FrameParser()
+
+        # Pending confirmations: (func, num) → [(future, accepted CMDs)]
+        self._waiters: Dict[Tuple[int, int], List[Tuple[asyncio.Future, Tuple[int, ...]]]] = {}
+        self._ack_waiters: List[asyncio.Future] = []
+
+        # State event listeners (see add_listener)
+        self._listeners: List[Callable[[StateEvent], None]] = []
+
+        # TX serialization + inter-frame gap (enforced before the next frame, not after)
+        self._tx_lock = asyncio.Lock()
+        self._last_tx = 0.0
+
+    @property
+    def connected(self) -> bool:
+        """Return True while the transport is open."""
+        return self._transport is not None and not self._transport.is_closing()
+
+    #################################################################################################
+    # PUBLIC: Connection API
+    #################################################################################################
+    async def async_connect(self) -> None:
+        """Open the transport and enable event reporting."""
+        loop = asyncio.get_running_loop()
+        self._parser.reset()
+
+        if self.port.startswith("socket://"):
+            url = urlparse(self.port)
+            await loop.create_connection(lambda: _MicrosProtocol(self), url.hostname, url.port)
+        else:
+            await self._open_serial_transport(loop)
+
+        self._log("[INFO] Async transport connected")
+        await self._enable_event_reporting()
+
+    async def _open_serial_transport(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Open a local serial port through pyserial-asyncio-fast."""
+        try:
+            import serial_asyncio_fast as serial_asyncio
+        except ImportError as e:
+            raise RuntimeError(
+                "pyserial-asyncio-fast is required for serial ports; "
+                "use a socket:// port or the threaded MicrosRS232 driver"
+            ) from e
+
+        await serial_asyncio.create_serial_connection(
+            loop, lambda: _MicrosProtocol(self), self.port, baudrate=self.baudrate
+        )
+
+    async def async_disconnect(self) -> None:
+        """Close the transport and cancel all pending waits."""
+        if self._transport is not None:
+            self._transport.close()
+        self._connection_lost(None)
+
+    async def async_function_log(self, func: int, enable: bool = True) -> None:
+        """Enable or disable event reporting for a function type."""
+        await self._send_frame(compose_frame(CMD_LOG, bytes([func, 1 if enable else 0])))
+        self._log(f"[INFO] LOG {'enabled' if enable else 'disabled'} for func={func}")
+
+    async def _enable_event_reporting(self) -> None:
+        """Enable event reporting for all supported function types."""
+        for func in EVENT_REPORTING_FUNCS:
+            await self.async_function_log(func, True)
+        self._log("[INFO] Event reporting enabled for all function types")
+
+    def add_listener(self, callback: Callable[[StateEvent], None]) -> Callable[[], None]:
+        """
+        Subscribe to parsed state changes (EVENT frames); callbacks run in the event loop.
+
+        Returns:
+            Function that removes the listener again.
+        """
+        self._listeners = self._listeners + [callback]
+
+        def remove() -> None:
+            self._listeners = [cb for cb in self._listeners if cb is not callback]
+
+        return remove
+
+    #################################################################################################
+    # INTERNAL: Protocol callbacks (run in the event loop)
+    #################################################################################################
+    def _data_received(self, data: bytes) -> None:
+        """Feed RX bytes to the parser and dispatch every complete frame."""
+        self._parser.feed(data)
+        for frame in self._parser.frames_available():
+            self._handle_incoming_frame(frame)
+
+    def _connection_lost(self, exc: Optional[Exception]) -> None:
+        """Fail all pending waits when the transport goes away."""
+        if exc is not None:
+            self._log(f"[ERR] Async transport lost: {exc}")
+        self._transport = None
+        error = ConnectionError("MICROS transport closed")
+        for entries in self._waiters.values():
+            for fut, _ in entries:
+                if not fut.done():
+                    fut.set_exception(error)
+        self._waiters.clear()
+        for fut in self._ack_waiters:
+            if not fut.done():
+                fut.set_exception(error)
+        self._ack_waiters.clear()
+
+    def _handle_incoming_frame(self, frame: bytes) -> None:
+        """Resolve waiters for ACK / EVENT / GET frames."""
+        self._log_hex("RX", frame)
+        cmd = frame[2]
+
+        # ACK = CMD 0x00 or 0x01 → oldest pending ACK waiter
+        if cmd in (0x00, 0x01):
+            while self._ack_waiters:
+                fut = self._ack_waiters.pop(0)
+                if not fut.done():
+                    fut.set_result(True)
+                    break
+            return
+
+        if cmd not in (CMD_EVENT, CMD_GET):
+            return
+
+        func, num, state = parse_state(frame)
+        if func is None:
+            return
+
+        if cmd == CMD_EVENT and self._listeners:
+            event = StateEvent(timestamp=time.time(), func=func, num=num, state=state, raw=frame)
+            for callback in self._listeners:
+                try:
+                    callback(event)
+                except Exception as e:
+                    self._log(f"[ERR] State listener failed: {e}")
+
+        entries = self._waiters.get((func, num))
+        if not entries:
+            return
+        for fut, accepts in list(entries):
+            if cmd in accepts and not fut.done():
+                fut.set_result(state)
+                entries.remove((fut, accepts))
+        if not entries:
+            self._waiters.pop((func, num), None)
+
+    #################################################################################################
+    # INTERNAL: TX + waiters
+    #################################################################################################
+    async def _send_frame(self, frame: bytes) -> None:
+        """Write a frame, keeping at least post_send_gap_ms between consecutive frames."""
+        if not self.connected:
+            raise ConnectionError("MICROS transport is not connected")
+
+        async with self._tx_lock:
+            gap = self.post_send_gap_ms / 1000.0 - (time.monotonic() - self._last_tx)
+            if gap > 0:
+                await asyncio.sleep(gap)
+            self._log_hex("TX", frame)
+            self._transport.write(frame)
+            self._last_tx = time.monotonic()
+
+    def _add_waiter(self, func: int, num: int, accepts: Tuple[int, ...]) -> asyncio.Future:
+        """Register a future resolved by the next matching EVENT/GET frame."""
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault((func, num), []).append((fut, accepts))
+        return fut
+
+    def _add_ack_waiter(self) -> asyncio.Future:
+        """Register a future resolved by the next ACK frame."""
+        fut = asyncio.get_running_loop().create_future()
+        self._ack_waiters.append(fut)
+        return fut
+
+    def _discard_waiter(self, func: int, num: int, fut: asyncio.Future) -> None:
+        """Remove a waiter that timed out or was not needed."""
+        entries = self._waiters.get((func, num))
+        if entries:
+            entries[:] = [e for e in entries if e[0] is not fut]
+            if not entries:
+                self._waiters.pop((func, num), None)
+        if fut in self._ack_waiters:
+            self._ack_waiters.remove(fut)
+        if fut.done() and not fut.cancelled():
+            fut.exception()  # Mark a connection error as retrieved; the caller already saw it
+
+    @staticmethod
+    async def _wait(fut: asyncio.Future, timeout_ms: int):
+        """
+        Await a waiter future; return None on timeout.
+
+        Raises:
+            ConnectionError: If the transport closed while waiting.
+        """
+        try:
+            return await asyncio.wait_for(asyncio.shield(fut), timeout_ms / 1000.0)
+        except TimeoutError:
+            return None
+
+    #################################################################################################
+    # PUBLIC: GET
+    #################################################################################################
+    async def async_get_state(self, func: int, num: int, timeout_ms: Optional[int] = None) -> Optional[int]:
+        """
+        Send GET and await the GET-reply or EVENT for (func, num).
+
+        Returns:
+            State value (int), or None on timeout.
+        """
+        if timeout_ms is None:
+            timeout_ms = self.confirm_timeout_ms
+
+        fut = self._add_waiter(func, num, (CMD_GET, CMD_EVENT))
+        try:
+            await self._send_frame(compose_frame(CMD_GET, bytes([func, num])))
+            return await self._wait(fut, timeout_ms)
+        finally:
+            self._discard_waiter(func, num, fut)
+
+    #################################################################################################
+    # INTERNAL: SET with confirmation (ACK → EVENT → fallback GET)
+    #################################################################################################
+    async def _async_set_with_confirm(self, func: int, num: int, desired_state: int, toggle: bool = False) -> bool:
+        """Awaitable counterpart of MicrosRS232._set_with_confirm (same steps and retry policy)."""
+        target = desired_state
+        if toggle:
+            current = await self.async_get_state(func, num)
+            if current is None:
+                target = STATE_ON
+            else:
+                target = STATE_OFF if current in (1, STATE_ON) else STATE_ON
+
+        for attempt in range(1, int(self.retries) + 1):
+            self._log(f"[INFO] SET attempt {attempt}/{self.retries} func={func} num={num} state={target}")
+
+            # Register before sending so a fast reply cannot be missed
+            event_fut = self._add_waiter(func, num, (CMD_EVENT,))
+            ack_fut = self._add_ack_waiter()
+            try:
+                await self._send_frame(compose_frame(CMD_SET, bytes([func, num, target])))
+
+                if await self._wait(ack_fut, 100):
+                    self._log("[INFO] ACK received")
+
+                event_state = await self._wait(event_fut, self.confirm_timeout_ms)
+            finally:
+                self._discard_waiter(func, num, event_fut)
+                self._discard_waiter(func, num, ack_fut)
+
+            if event_state is not None:
+                self._log(f"[INFO] EVENT received: state={event_state}, target={target}")
+                if self._confirms(func, target, event_state):
+                    self._log("[OK] Confirm via EVENT")
+                    return True
+
+            state = await self.async_get_state(func, num)
+            self._log(f"[INFO] GET returned: state={state}, target={target}")
+            if state is not None and self._confirms(func, target, state):
+                self._log("[OK] Confirm via GET")
+                return True
+
+            await asyncio.sleep((self.retry_delay_ms + (50 * (attempt - 1))) / 1000.0)
+
+        self._log("[FAIL] SET not confirmed after retries")
+        return False
+
+    @staticmethod
+    def _confirms(func: int, target: int, state: int) -> bool:
+        """Return True if a reported state confirms the SET target."""
+        if state == target:
+            return True
+        # For dimmers, accept any non-zero as success when turning on
+        return func == FUNC_DIMMER and target > 0 and state > 0
+
+    #################################################################################################
+    # PUBLIC: Relay / Dimmer / Flag / Mood API
+    #################################################################################################
+    async def async_set_relay(self, num: int, state: str) -> None:
+        """
+        Set a relay to 'ON', 'OFF' or 'TOGGLE'.
+
+        Raises:
+            ValueError: If state is not valid.
+            RuntimeError: If the SET command was not confirmed.
+        """
+        if not await self._async_set_onoff(FUNC_RELAY, num, state):
+            raise RuntimeError("Relay SET not confirmed.")
+
+    async def async_set_flag(self, num: int, state: str) -> None:
+        """
+        Set a flag to 'ON', 'OFF' or 'TOGGLE'.
+
+        Raises:
+            ValueError: If state is not valid.
+            RuntimeError: If the SET command was not confirmed.
+        """
+        if not await self._async_set_onoff(FUNC_FLAG, num, state):
+            raise RuntimeError("Flag SET not confirmed.")
+
+    async def _async_set_onoff(self, func: int, num: int, state: str) -> bool:
+        s = state.upper()
+        if s == "ON":
+            return await self._async_set_with_confirm(func, num, STATE_ON)
+        if s == "OFF":
+            return await self._async_set_with_confirm(func, num, STATE_OFF)
+        if s == "TOGGLE":
+            return await self._async_set_with_confirm(func, num, STATE_ON, toggle=True)
+        raise ValueError("State must be 'ON', 'OFF' or 'TOGGLE'.")
+
+    async def async_set_dimmer(self, num: int, value: Union[int, str]) -> None:
+        """
+        Set a dimmer to 0-255 or 'TOGGLE'.
+
+        Raises:
+            RuntimeError: If the SET command was not confirmed.
+        """
+        if isinstance(value, str) and value.upper() == "TOGGLE":
+            ok = await self._async_set_with_confirm(FUNC_DIMMER, num, STATE_OFF, toggle=True)
+        else:
+            ok = await self._async_set_with_confirm(FUNC_DIMMER, num, max(0, min(255, int(value))))
+
+        if not ok:
+            raise RuntimeError("Dimmer SET not confirmed.")
+
+    async def async_set_mood(self, num: int, state: str, mood_type: str = "LOCAL") -> None:
+        """
+        Trigger a mood (fire-and-forget, ACK is optional).
+
+        Raises:
+            ValueError: If state or mood_type is not valid.
+        """
+        func = _MOOD_FUNCS.get(mood_type.upper())
+        if func is None:
+            raise ValueError(f"mood_type must be LOCAL, TIMED, or GENERAL, got: {mood_type}")
+
+        s = state.upper()
+        if s not in ("ON", "OFF", "TOGGLE"):
+            raise ValueError("state must be ON, OFF or TOGGLE")
+        target = STATE_ON if s in ("ON", "TOGGLE") else STATE_OFF
+
+        self._log(f"[INFO] Mood SET func={func} num={num} state={target}")
+        ack_fut = self._add_ack_waiter()
+        try:
+            await self._send_frame(compose_frame(CMD_SET, bytes([func, num, target])))
+            if await self._wait(ack_fut, 200):
+                self._log("[OK] Mood triggered (ACK received)")
+            else:
+                self._log("[INFO] Mood triggered (no ACK, but command sent)")
+        finally:
+            self._discard_waiter(func, num, ack_fut)
+
+    #################################################################################################
+    # INTERNAL: Logging helpers
+    #################################################################################################
+    def _log(self, msg: str) -> None:
+        """Safely send log messages to the callback."""
+        if self.log_callback:
+            try:
+                self.log_callback(msg)
+            except Exception:
+                pass
+
+    def _log_hex(self, kind: str, frame: bytes) -> None:
+        """Log a frame as hex to the callback."""
+        if self.log_callback:
+            self._log(f"{time.strftime('%H:%M:%S')}  {kind}: {frame.hex(' ').upper()}")
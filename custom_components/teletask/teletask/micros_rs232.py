@@ -1,7 +1,7 @@
 
 #################################################################################################
 # File:    micros_rs232.py
-# Version: V06.3 (Fixed mood confirmation - moods are trigger actions)
+# Version: V08.9 (submit_mood: handle-returning mood trigger)
 #
 # Project: PHAeleTaskV1
 # Author:  Peter Spriet + AI assistant
@@ -12,8 +12,9 @@
 #   Includes:
 #     - Dedicated RX-thread (never misses frames)
 #     - ACK detection (CMD 0x00/0x01)
-#     - Event dispatching into queues
-#     - Synchronous SET with:  ACK → EVENT → fallback GET
+#     - Waiter registry: RX dispatcher resolves confirmations per (func, num)
+#     - Bounded event stream + consumer thread delivering StateEvents to listeners
+#     - Pipelined SET with:  EVENT → fallback GET → retry (TxScheduler, CommandHandle)
 #     - LOG command to enable event reporting for function types
 #     - Perfect for GUI or Home Assistant integrations
 #
@@ -24,18 +25,43 @@
 #   V05  ACK detection
 #   V06  Full RX-thread with dispatcher
 #   V06.1 Added LOG command (CMD=0x03) to enable event reporting on connect
+#   V06.3 Fixed mood confirmation - moods are trigger actions
+#   V06.4 RX-thread reads all available bytes into a FrameParser buffer (1 syscall per burst)
+#   V06.5 add_listener(): parsed StateEvent delivery, independent of log_callback
+#   V06.6 Waiter registry replaces spill-and-requeue queues (O(1) per frame, concurrent-safe)
+#   V06.7 Bounded EventStream (coalesce / drop_oldest) drained by a dedicated event thread
+#   V06.8 TxScheduler: SETs for different devices pipelined, confirmed asynchronously
+#   V06.9 Dimmer SETs coalesce per device: a newer value supersedes queued / in-flight ones
+#   V07.0 read_states(): bulk state snapshot with pipelined GETs within a bus budget
+#   V07.1 AdaptiveTiming: gaps / ACK and confirm timeouts tuned from measured latencies
+#   V07.2 All frames go through the TxScheduler: callers wake on the reply, no post-send sleep
+#   V07.3 submit_toggle(): handle-returning TOGGLE for command workers
+#   V07.4 set_many() / submit_many(): pipelined scene burst, failures re-sent, per-device summary
+#   V07.5 TX priority classes: user commands overtake bulk GETs, starvation protection
+#   V07.6 Reported states cached per device: TOGGLE skips the GET while the cache is fresh
+#   V07.7 Every SET supersedes older queued / in-flight SETs for the device (pipeline.supersede)
+#   V07.8 Ports with a scheme (socket://, rfc2217://, loop://) open through serial_for_url
+#   V07.9 Optional "faults" section wraps the port in a fault-injecting FaultyPort (testing)
+#   V08.0 Optional "capture" section: TX / RX frames to a rotating binary capture file
+#   V08.1 Lazy, level-aware logging: nothing is formatted unless log_enabled(level) says so
+#   V08.2 read_states(): GETs still pending when the sync budget runs out are cancelled
+#   V08.3 With log_enabled, log_callback(msg, level) gets the level of every message
+#   V08.4 pre_send_flush works again for SET / GET frames (their own waiter is not "pending")
+#   V08.5 Idle resync rescans the buffer: a valid frame behind a noise STX / LEN is delivered
+#   V08.6 SET / GET frames use the tuned post_send_gap_ms too (min_frame_gap_ms = lower bound)
+#   V08.7 Warning on start when pipeline.min_frame_gap_ms overrides reliability.post_send_gap_ms
+#   V08.8 submit_get(): handle-returning GET, so loop code can read a device without a worker
+#   V08.9 submit_mood(): handle-returning mood trigger (no ACK wait on the caller's thread)
 #################################################################################################
 
+import logging
+import os
 import serial
 import time
 import threading
-import queue
-import json
-import os
-from typing import Optional, Callable, Union, Tuple
+from typing import Any, Optional, Callable, Dict, List, Union, Tuple
 
 from .protocol import (
-    STX,
     CMD_SET, CMD_GET, CMD_LOG, CMD_EVENT,
     FUNC_RELAY, FUNC_DIMMER, FUNC_MOTOR,
     FUNC_LOCMOOD, FUNC_TIMEDMOOD, FUNC_GENMOOD,
@@ -43,7 +69,34 @@ from .protocol import (
     STATE_ON, STATE_OFF
 )
 
-from .helpers import bytes_to_hex, checksum
+from .framing import FrameParser, compose_frame, parse_state
+from .connection_config import load_connection_config
+from .events import StateEvent
+from .timing import AdaptiveTiming
+from .faults import wrap_port
+from .capture import (
+    CaptureWriter, DIR_RX, DIR_TX, DEFAULT_CAPTURE_FILE, DEFAULT_MAX_BYTES, DEFAULT_BACKUPS,
+    DEFAULT_MAX_PENDING as DEFAULT_CAPTURE_PENDING
+)
+from .state_store import StateStore
+from .batch import BatchRun, Target, DEFAULT_ROUNDS, normalize_targets
+from .event_stream import EventStream, DEFAULT_MAX_PENDING, POLICY_COALESCE
+from .waiters import ACK_CMDS, Waiter, WaiterRegistry
+from .scheduler import (
+    CommandHandle, TxScheduler, STATUS_SUPERSEDED, DEFAULT_MIN_FRAME_GAP_MS, DEFAULT_MAX_IN_FLIGHT,
+    DEFAULT_STARVATION_MS, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+)
+
+# Upper bound for a single RX read (bytes)
+RX_CHUNK_SIZE: int = 4096
+
+# Defaults for the "sync" config section (bulk state snapshot)
+DEFAULT_SYNC_MAX_IN_FLIGHT: int = 8
+DEFAULT_SYNC_BUDGET_S: float = 10.0
+DEFAULT_SYNC_RETRIES: int = 2
+
+# Default for the "cache" config section: max age of a reported state used for TOGGLE
+DEFAULT_TOGGLE_MAX_AGE_S: float = 30.0
 
 
 class MicrosRS232:
@@ -52,65 +105,69 @@ class MicrosRS232:
     def __init__(
         self,
         config_path: str = "config.json",
-        log_callback: Optional[Callable[[str], None]] = None
+        log_callback: Optional[Callable[..., None]] = None,
+        log_enabled: Optional[Callable[[int], bool]] = None
     ) -> None:
         """
         Initialize the TELETASK MICROS RS232 driver.
 
         Args:
             config_path: Path to JSON config file with serial and reliability settings.
-            log_callback: Optional callback function for log messages.
+            log_callback: Optional callback function for log messages: log_callback(msg), or
+                log_callback(msg, level) when log_enabled is given.
+            log_enabled: Optional level check (logging.DEBUG, INFO, ...) consulted before a
+                message is formatted; makes the logging level-aware. None means every
+                level goes to log_callback(msg).
 
         Raises:
             FileNotFoundError: If config file does not exist.
             ValueError: If config file is malformed or missing required keys.
         """
         self.log_callback = log_callback
+        self.log_enabled = log_enabled
 
         # Validate and load configuration
-        if not os.path.exists(config_path):
-            raise FileNotFoundError(
-                f"Config file not found: {config_path}. "
-                f"Create it with 'serial' and 'reliability' sections."
-            )
-
-        try:
-            with open(config_path, "r") as f:
-                cfg = json.load(f)
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Invalid JSON in config file '{config_path}': {e}")
-
-        # Validate required sections
-        if "serial" not in cfg:
-            raise ValueError("Config missing required section: 'serial'")
-        if "reliability" not in cfg:
-            raise ValueError("Config missing required section: 'reliability'")
-
-        serial_cfg = cfg["serial"]
-        rel_cfg = cfg["reliability"]
-
-        # Serial params with validation
-        self.port = serial_cfg.get("port")
-        if not self.port:
-            raise ValueError("Config missing 'serial.port'")
-        self.baudrate = serial_cfg.get("baudrate", 19200)
-        self.timeout = serial_cfg.get("timeout", 1.0)
-
-        # Reliability params with defaults
-        self.retries = rel_cfg.get("retries", 3)
-        self.confirm_timeout_ms = rel_cfg.get("confirm_timeout_ms", 800)
-        self.ack_timeout_ms = rel_cfg.get("ack_timeout_ms", 300)
-        self.retry_delay_ms = rel_cfg.get("retry_delay_ms", 250)
-        self.post_send_gap_ms = rel_cfg.get("post_send_gap_ms", 140)
-        self.pre_send_flush = rel_cfg.get("pre_send_flush", True)
+        cfg = load_connection_config(config_path)
+        self.config = cfg
+
+        # Serial params
+        self.port = cfg.port
+        self.baudrate = cfg.baudrate
+        self.timeout = cfg.timeout
+
+        # Reliability params
+        self.retries = cfg.retries
+        self.confirm_timeout_ms = cfg.confirm_timeout_ms
+        self.ack_timeout_ms = cfg.ack_timeout_ms
+        self.retry_delay_ms = cfg.retry_delay_ms
+        self.post_send_gap_ms = cfg.post_send_gap_ms
+        self.pre_send_flush = cfg.pre_send_flush
+
+        # Adaptive gaps / timeouts within floor..ceiling (optional "timing" config section)
+        self.timing = AdaptiveTiming(
+            ack_timeout_ms=self.ack_timeout_ms,
+            post_send_gap_ms=self.post_send_gap_ms,
+            confirm_timeout_ms=self.confirm_timeout_ms,
+            config=cfg.section("timing"),
+        )
 
         # Serial handle
         self.ser = None
 
-        # Queues for RX-thread
-        self.queue_ack    = queue.Queue()
-        self.queue_event  = queue.Queue()
-        self.queue_get    = queue.Queue()
+        # Pending confirmations, resolved by the RX-thread per (func, num)
+        self._waiters = WaiterRegistry()
+
+        # Streaming frame parser (buffer reused for the life of the driver)
+        self._parser = FrameParser()
+
+        # State event listeners (see add_listener) + bounded stream feeding them
+        self._listeners: List[Callable[[StateEvent], None]] = []
+        ev_cfg = cfg.section("events")
+        self.event_stream = EventStream(
+            max_pending=ev_cfg.get("max_pending", DEFAULT_MAX_PENDING),
+            policy=ev_cfg.get("policy", POLICY_COALESCE),
+        )
+        self._event_thread = None
 
         # Threading controls
         self._stop_event = threading.Event()
@@ -119,14 +176,84 @@ class MicrosRS232:
         # TX lock
         self._tx_lock = threading.Lock()
 
+        # Pipelined SET scheduler (optional "pipeline" config section)
+        pipe_cfg = cfg.section("pipeline")
+        self._scheduler = TxScheduler(
+            write=self._write_frame,
+            waiters=self._waiters,
+            retries=self.retries,
+            confirm_timeout_ms=self.confirm_timeout_ms,
+            retry_delay_ms=self.retry_delay_ms,
+            min_frame_gap_ms=pipe_cfg.get("min_frame_gap_ms", DEFAULT_MIN_FRAME_GAP_MS),
+            max_in_flight=pipe_cfg.get("max_in_flight", DEFAULT_MAX_IN_FLIGHT),
+            log=self._log,
+            timing=self.timing,
+            starvation_ms=pipe_cfg.get("starvation_ms", DEFAULT_STARVATION_MS),
+        )
+        # Latest wins per device: a newer SET cancels the remaining retries / confirmation
+        # wait of an older one (False = SETs for one device run one after the other)
+        self.supersede_sets = bool(pipe_cfg.get("supersede", True))
+
+        # Bulk state snapshot budget (optional "sync" config section)
+        sync_cfg = cfg.section("sync")
+        self.sync_max_in_flight = max(1, int(sync_cfg.get("max_in_flight", DEFAULT_SYNC_MAX_IN_FLIGHT)))
+        self.sync_budget_s = float(sync_cfg.get("budget_s", DEFAULT_SYNC_BUDGET_S))
+        self.sync_retries = max(1, int(sync_cfg.get("retries", DEFAULT_SYNC_RETRIES)))
+
+        # Last reported state per device, fed by the RX-thread (optional "cache" config section)
+        cache_cfg = cfg.section("cache")
+        self.states = StateStore()
+        self.toggle_max_age_s = max(0.0, float(cache_cfg.get("toggle_max_age_s", DEFAULT_TOGGLE_MAX_AGE_S)))
+        self.toggle_cache_hits = 0
+        self.toggle_cache_misses = 0
+
+        # Binary frame capture (optional "capture" config section; path relative to config.json)
+        cap_cfg = cfg.section("capture")
+        self.capture: Optional[CaptureWriter] = None
+        if cap_cfg.get("enabled", False):
+            cap_path = cap_cfg.get("path", DEFAULT_CAPTURE_FILE)
+            if not os.path.isabs(cap_path):
+                cap_path = os.path.join(os.path.dirname(os.path.abspath(config_path)), cap_path)
+            self.capture = CaptureWriter(
+                cap_path,
+                max_bytes=cap_cfg.get("max_bytes", DEFAULT_MAX_BYTES),
+                backups=cap_cfg.get("backups", DEFAULT_BACKUPS),
+                max_pending=cap_cfg.get("max_pending", DEFAULT_CAPTURE_PENDING),
+            )
+
 
     #################################################################################################
     # INTERNAL: Start / Stop RX Thread
     #################################################################################################
     def start(self):
         """Open serial connection and start the RX-thread."""
-        self.ser = serial.Serial(
-            port=self.port,
+        self.ser = wrap_port(self._open_serial(), self.config.section("faults"))
+        if self.capture:
+            self.capture.start()
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._rx_loop, daemon=True)
+        self._thread.start()
+
+        self.event_stream.reopen()
+        self._event_thread = threading.Thread(target=self._event_loop, daemon=True)
+        self._event_thread.start()
+
+        self._scheduler.start()
+
+        self._log("[INFO] RX-thread started")
+        if self._scheduler.min_frame_gap_ms > self.post_send_gap_ms:
+            self._log(
+                "[WARN] pipeline.min_frame_gap_ms (%s) exceeds reliability.post_send_gap_ms (%s): "
+                "frames are spaced by min_frame_gap_ms",
+                self._scheduler.min_frame_gap_ms, self.post_send_gap_ms, level=logging.WARNING
+            )
+
+    def _open_serial(self):
+        """Open and configure the serial port (pyserial URLs such as socket://host:port too)."""
+        open_port = serial.serial_for_url if "://" in self.port else serial.Serial
+        ser = open_port(
+            self.port,
             baudrate=self.baudrate,
             timeout=self.timeout,
             write_timeout=1,
@@ -138,22 +265,26 @@ class MicrosRS232:
             xonxoff=False
         )
 
-        self.ser.setDTR(True)
-        self.ser.setRTS(False)
-
-        self._stop_event.clear()
-        self._thread = threading.Thread(target=self._rx_loop, daemon=True)
-        self._thread.start()
-
-        self._log("[INFO] RX-thread started")
+        try:
+            ser.setDTR(True)
+            ser.setRTS(False)
+        except (OSError, serial.SerialException):
+            pass  # No modem control lines (pseudo-terminal)
+        return ser
 
     def stop(self):
         """Stop RX thread and close serial port."""
         self._stop_event.set()
+        self._scheduler.stop()
+        self.event_stream.close()
         if self._thread:
             self._thread.join(timeout=1.0)
+        if self._event_thread:
+            self._event_thread.join(timeout=1.0)
         if self.ser:
             self.ser.close()
+        if self.capture:
+            self.capture.stop()
         self._log("[INFO] RX-thread stopped and serial closed")
 
     #################################################################################################
@@ -164,106 +295,169 @@ class MicrosRS232:
         Continuous frame reader with proper synchronization.
 
         Features:
+            - Reads all available bytes per syscall into a reusable buffer (FrameParser)
+            - Extracts every complete frame per read (bursts drain in one pass)
             - Scans for STX byte to synchronize
-            - Validates frame length
+            - Validates frame length and checksum
             - Handles incomplete reads gracefully
             - Never blocks the main thread
         """
+        parser = self._parser
+        parser.reset()
+
         while not self._stop_event.is_set():
             try:
-                # Read first byte, scan for STX
-                first = self.ser.read(1)
-                if len(first) < 1:
+                # One read per wakeup: everything the port has, or block for 1 byte
+                waiting = self.ser.in_waiting
+                chunk = self.ser.read(min(waiting, RX_CHUNK_SIZE) if waiting else 1)
+                if not chunk:
+                    # Idle link: a partial frame that never completed was noise; skip its STX
+                    # and deliver whatever complete frames were buffered behind it
+                    if len(parser):
+                        parser.resync()
+                        self._log("[WARN] Incomplete frame received, discarding", level=logging.WARNING)
+                        for frame in parser.frames_available():
+                            self._handle_incoming_frame(frame)
                     continue
 
-                if first[0] != STX:
-                    # Discard non-STX byte and continue scanning (common: 0x0A newline)
-                    if first[0] not in (0x0A, 0x0D):  # Don't log newline/carriage return
-                        self._log(f"[WARN] Resync: discarded byte 0x{first[0]:02X}")
-                    continue
-
-                # Read length byte
-                length_byte = self.ser.read(1)
-                if len(length_byte) < 1:
-                    continue
-
-                ln = length_byte[0]
+                before = (parser.discarded, parser.bad_length, parser.bad_checksum)
+                parser.feed(chunk)
 
-                # Validate length (minimum: STX + LEN + CMD + CHK = 4 bytes, so ln >= 3)
-                if ln < 3 or ln > 64:
-                    self._log(f"[WARN] Invalid frame length: {ln}, discarding")
-                    continue
-
-                # Read remaining payload (ln - 1 because LEN includes itself but not STX)
-                payload = self.ser.read(ln - 1)
-                if len(payload) < ln - 1:
-                    self._log("[WARN] Incomplete frame received, discarding")
-                    continue
+                for frame in parser.frames_available():
+                    self._handle_incoming_frame(frame)
 
-                frame = bytes([STX, ln]) + payload
-                self._handle_incoming_frame(frame)
+                if (parser.discarded, parser.bad_length, parser.bad_checksum) != before:
+                    self._log(
+                        "[WARN] Resync: discarded=%d bad_length=%d bad_checksum=%d",
+                        parser.discarded, parser.bad_length, parser.bad_checksum,
+                        level=logging.WARNING
+                    )
 
             except serial.SerialException as e:
-                self._log(f"[ERR] Serial error in RX-loop: {e}")
+                self._log("[ERR] Serial error in RX-loop: %s", e, level=logging.ERROR)
                 time.sleep(0.1)
             except Exception as e:
-                self._log(f"[ERR] RX-loop exception: {e}")
+                self._log("[ERR] RX-loop exception: %s", e, level=logging.ERROR)
                 time.sleep(0.1)
 
     #################################################################################################
     # INTERNAL: Dispatcher — routes ACK / EVENT / GET frames
     #################################################################################################
     def _handle_incoming_frame(self, frame: bytes) -> None:
-        """Route incoming frame into the proper queue."""
+        """Resolve pending waiters and notify listeners for an incoming frame."""
 
         # Log to GUI / HA
         self._log_hex("RX", frame)
+        if self.capture:
+            self.capture.record(DIR_RX, frame)
 
         cmd = frame[2]
 
-        # ACK = CMD 0x00 or 0x01
-        if cmd in (0x00, 0x01):
-            try:
-                self.queue_ack.put_nowait(frame)
-            except queue.Full:
-                self._log("[WARN] ACK queue full, frame dropped")
+        # ACK = CMD 0x00 or 0x01 → oldest pending ACK waiter
+        if cmd in ACK_CMDS:
+            self.timing.note_ack()
+            self._waiters.resolve_ack(cmd)
             return
 
-        # EVENT frames
-        if cmd == CMD_EVENT:
-            try:
-                self.queue_event.put_nowait(frame)
-            except queue.Full:
-                self._log("[WARN] EVENT queue full, frame dropped")
-            return
-
-        # GET-reply frames
-        if cmd == CMD_GET:
-            try:
-                self.queue_get.put_nowait(frame)
-            except queue.Full:
-                self._log("[WARN] GET queue full, frame dropped")
+        # EVENT and GET-reply frames → waiters keyed by (func, num)
+        if cmd == CMD_EVENT or cmd == CMD_GET:
+            func, num, st = self._parse_state(frame)
+            if func is None:
+                return
+            now = time.time()
+            self.states.update(func, num, st, now)
+            self._waiters.resolve(cmd, func, num, st)
+            if cmd == CMD_EVENT and self._listeners:
+                self.event_stream.put(
+                    StateEvent(timestamp=now, func=func, num=num, state=st, raw=frame)
+                )
             return
 
         # OTHER → ignore safely
         return
 
+    #################################################################################################
+    # PUBLIC: State event subscription
+    #################################################################################################
+    def add_listener(self, callback: Callable[[StateEvent], None]) -> Callable[[], None]:
+        """
+        Subscribe to parsed state changes reported by the MICROS (EVENT frames).
+
+        Callbacks run in the driver's event thread, which drains the bounded event stream
+        (see event_stats()). Delivery does not depend on log_callback: logging can be
+        disabled without losing state updates.
+
+        Args:
+            callback: Called with a StateEvent for every valid EVENT frame.
+
+        Returns:
+            Function that removes the listener again.
+        """
+        self._listeners = self._listeners + [callback]
+
+        def remove() -> None:
+            self._listeners = [cb for cb in self._listeners if cb is not callback]
+
+        return remove
+
+    def event_stats(self) -> dict:
+        """Return event stream counters (pending, delivered, dropped, coalesced, ...)."""
+        return self.event_stream.stats()
+
+    def _event_loop(self) -> None:
+        """Consumer thread: deliver queued StateEvents to listeners."""
+        stream = self.event_stream
+        while True:
+            event = stream.get()
+            if event is None:
+                if self._stop_event.is_set():
+                    return
+                continue
+
+            for callback in self._listeners:
+                try:
+                    callback(event)
+                except Exception as e:
+                    self._log("[ERR] State listener failed: %s", e, level=logging.ERROR)
+
     #################################################################################################
     # INTERNAL: Logging helpers
     #################################################################################################
-    def _log(self, msg: str):
-        """Safely send log messages to the callback (GUI or HA)."""
-        if self.log_callback:
-            try:
-                self.log_callback(msg)
-            except Exception:
-                pass
+    def _log_active(self, level: int) -> bool:
+        """Return True if a message at `level` would reach the callback."""
+        if not self.log_callback:
+            return False
+        if self.log_enabled is None:
+            return True
+        try:
+            return bool(self.log_enabled(level))
+        except Exception:
+            return True
+
+    def _log(self, msg: str, *args: Any, level: int = logging.INFO) -> None:
+        """
+        Safely send a log message to the callback (GUI or HA).
+
+        The message is %-formatted with `args` only if the level is enabled, so
+        callers pass values instead of pre-built f-strings on hot paths. Level-aware
+        callbacks (log_enabled given) receive the level as well.
+        """
+        if not self._log_active(level):
+            return
+        try:
+            text = msg % args if args else msg
+            if self.log_enabled is None:
+                self.log_callback(text)
+            else:
+                self.log_callback(text, level)
+        except Exception:
+            pass
 
-    def _log_hex(self, kind: str, frame: bytes):
-        """Log a frame as hex to the callback."""
-        ts = time.strftime("%H:%M:%S")
-        hexstr = frame.hex(" ").upper()
-        self._log(f"{ts}  {kind}: {hexstr}")
+    def _log_hex(self, kind: str, frame: bytes) -> None:
+        """Log a frame as hex to the callback (DEBUG level; rendered only if enabled)."""
+        if not self._log_active(logging.DEBUG):
+            return
+        self._log("%s  %s: %s", time.strftime("%H:%M:%S"), kind, frame.hex(" ").upper(), level=logging.DEBUG)
 
     #################################################################################################
     # INTERNAL: Frame helpers (compose + checksum + TX)
@@ -273,20 +467,21 @@ class MicrosRS232:
         return sum(data) & 0xFF
 
     def _compose_frame(self, cmd: int, payload: bytes) -> bytes:
-        ln = 3 + len(payload)
-        base = bytes([STX, ln, cmd]) + payload
-        return base + bytes([self._checksum(base)])
+        return compose_frame(cmd, payload)
 
-    def _send_frame(self, frame: bytes):
+    def _write_frame(self, frame: bytes) -> None:
         """
-        Thread-safe transmit:
-            - Flush RX buffer (optional)
+        Thread-safe transmit without any timing gap (used by the TxScheduler):
+            - Flush RX buffer (optional, only while no reply is pending)
             - Log TX
             - Write frame
-            - Short timing gap so MICROS can issue ACK (outside lock to allow RX processing)
+        A SET or GET frame has its own waiter registered before it is written (EVENT / GET
+        reply, or the ACK of a mood trigger); that one does not count as pending, since
+        nothing in the RX buffer can be its reply yet.
         """
+        own_waiters = 1 if frame[2] in (CMD_SET, CMD_GET) else 0
         with self._tx_lock:
-            if self.pre_send_flush:
+            if self.pre_send_flush and len(self._waiters) <= own_waiters:
                 try:
                     self.ser.reset_input_buffer()
                 except Exception:
@@ -294,196 +489,74 @@ class MicrosRS232:
 
             self._log_hex("TX", frame)
             self.ser.write(frame)
-        # Sleep OUTSIDE the lock to allow RX thread to process incoming frames
-        time.sleep(self.post_send_gap_ms / 1000.0)
+            if self.capture:
+                self.capture.record(DIR_TX, frame)
+            self._scheduler.note_tx()
+            if frame[2] == CMD_SET:
+                self.timing.note_tx()  # SETs are ACKed → TX→ACK sample
+
+    def _send_frame(
+        self, frame: bytes, gap_ms: Optional[float] = None, priority: int = PRIORITY_INTERACTIVE
+    ) -> CommandHandle:
+        """
+        Queue an unconfirmed frame (LOG, mood trigger) on the TxScheduler.
+
+        The caller does not sleep: the gap that gives the MICROS time to ACK is kept by the
+        scheduler right before the NEXT frame goes out.
+
+        Args:
+            frame: Complete frame.
+            gap_ms: Bus gap after this frame (default: tuned post_send_gap_ms, taken when the
+                frame goes out).
+            priority: Scheduler priority class.
+
+        Returns:
+            CommandHandle that completes once the frame is written.
+        """
+        return self._scheduler.submit_frame(frame, gap_ms=gap_ms, priority=priority)
 
     #################################################################################################
     # INTERNAL: Parser
     #################################################################################################
     def _parse_state(self, frame: bytes):
         """Return (func, num, state) or (None,None,None)."""
-        if not frame or len(frame) < 7:
-            return None, None, None
-
-        if self._checksum(frame[:-1]) != frame[-1]:
-            return None, None, None
-
-        func = frame[3]
-        num  = frame[4]
-        st   = frame[5]
-        return func, num, st
+        return parse_state(frame)
 
     #################################################################################################
     # INTERNAL: Waiters (ACK / EVENT / GET)
     #################################################################################################
-    def _wait_ack(self, timeout_ms: int) -> bool:
-        """
-        Wait for ANY ACK frame (CMD 0x00 or 0x01).
-        RX-thread puts these into queue_ack.
+    def _await(self, waiter: Waiter, timeout_ms: int) -> Optional[int]:
         """
-        deadline = time.time() + (timeout_ms / 1000.0)
-        while time.time() < deadline:
-            remain = deadline - time.time()
-            if remain <= 0:
-                break
-            try:
-                fr = self.queue_ack.get(timeout=remain)
-                return True
-            except queue.Empty:
-                pass
-        return False
-
-    def _wait_event_for(self, func: int, num: int, desired_state: int, timeout_ms: int) -> bool:
-        """
-        Wait for matching EVENT frame.
-
-        Args:
-            func: Function type to match.
-            num: Device number to match.
-            desired_state: Expected state value.
-            timeout_ms: Maximum wait time in milliseconds.
+        Wait for a registered waiter and unregister it.
 
         Returns:
-            True if matching event received, False on timeout.
+            Reported state (int) if resolved, None on timeout (ACK waiters resolve to None too;
+            use waiter.done for those).
         """
-        deadline = time.time() + (timeout_ms / 1000.0)
-        spill: list = []
-
-        while time.time() < deadline:
-            remain = deadline - time.time()
-            if remain <= 0:
-                break
-            try:
-                fr = self.queue_event.get(timeout=remain)
-            except queue.Empty:
-                break
-
-            f, n, st = self._parse_state(fr)
-            if f == func and n == num and st == desired_state:
-                # Found match - restore non-matching events
-                for x in spill:
-                    try:
-                        self.queue_event.put_nowait(x)
-                    except queue.Full:
-                        pass  # Best effort restoration
-                return True
-            else:
-                spill.append(fr)
-
-        # Restore non-matching events
-        for x in spill:
-            try:
-                self.queue_event.put_nowait(x)
-            except queue.Full:
-                pass  # Best effort restoration
-
-        return False
-
-    def _wait_get_for(self, func: int, num: int, timeout_ms: int) -> Optional[int]:
-        """
-        Wait for matching GET-reply.
-
-        Args:
-            func: Function type to match.
-            num: Device number to match.
-            timeout_ms: Maximum wait time in milliseconds.
-
-        Returns:
-            State value (int) if found, None on timeout.
-        """
-        deadline = time.time() + (timeout_ms / 1000.0)
-        spill: list = []
-
-        while time.time() < deadline:
-            remain = deadline - time.time()
-            if remain <= 0:
-                break
-            try:
-                fr = self.queue_get.get(timeout=remain)
-            except queue.Empty:
-                break
-
-            f, n, st = self._parse_state(fr)
-            if f == func and n == num:
-                # Restore other frames
-                for x in spill:
-                    try:
-                        self.queue_get.put_nowait(x)
-                    except queue.Full:
-                        pass  # Best effort restoration
-                return st
-            else:
-                spill.append(fr)
-
-        # Restore non-matching frames
-        for x in spill:
-            try:
-                self.queue_get.put_nowait(x)
-            except queue.Full:
-                pass  # Best effort restoration
-
-        return None
+        try:
+            waiter.wait(timeout_ms)
+        finally:
+            self._waiters.remove(waiter)
+        return waiter.result
 
     #################################################################################################
     # INTERNAL: Synchronous GET (send GET + wait reply)
     #################################################################################################
-    def _sync_get_state(self, func: int, num: int, timeout_ms: int = None):
+    def _sync_get_state(
+        self, func: int, num: int, timeout_ms: int = None, priority: int = PRIORITY_INTERACTIVE
+    ):
         """
         Send GET and wait for GET-reply or EVENT response.
         MICROS may respond to GET with either CMD_GET or CMD_EVENT frames.
+        The GET is a single-attempt scheduler command: the caller wakes as soon as the
+        reply is dispatched by the RX-thread. A caller is waiting on it, so it runs in the
+        interactive class by default (ahead of bulk background GETs).
         Returns state or None.
         """
-        if timeout_ms is None:
-            timeout_ms = self.confirm_timeout_ms
-
-        frame = self._compose_frame(CMD_GET, bytes([func, num]))
-        self._send_frame(frame)
-
-        # First try GET queue
-        result = self._wait_get_for(func, num, timeout_ms // 2)
-        if result is not None:
-            return result
-
-        # Fallback: check EVENT queue (MICROS often responds with EVENT frames)
-        return self._wait_event_state_for(func, num, timeout_ms // 2)
-
-    def _wait_event_state_for(self, func: int, num: int, timeout_ms: int) -> Optional[int]:
-        """
-        Wait for matching EVENT frame and return its state value.
-        Unlike _wait_event_for, this returns the state instead of checking for a specific state.
-        """
-        deadline = time.time() + (timeout_ms / 1000.0)
-        spill: list = []
-
-        while time.time() < deadline:
-            remain = deadline - time.time()
-            if remain <= 0:
-                break
-            try:
-                fr = self.queue_event.get(timeout=remain)
-            except queue.Empty:
-                break
-
-            f, n, st = self._parse_state(fr)
-            if f == func and n == num:
-                # Found match - restore non-matching events
-                for x in spill:
-                    try:
-                        self.queue_event.put_nowait(x)
-                    except queue.Full:
-                        pass
-                return st
-            else:
-                spill.append(fr)
-
-        # Restore non-matching events
-        for x in spill:
-            try:
-                self.queue_event.put_nowait(x)
-            except queue.Full:
-                pass
-
-        return None
+        handle = self._scheduler.submit_get(func, num, retries=1, timeout_ms=timeout_ms, priority=priority)
+        if not handle.wait():
+            return None
+        return handle.result
 
 
     #################################################################################################
@@ -499,8 +572,8 @@ class MicrosRS232:
         """
         state = 1 if enable else 0
         frame = self._compose_frame(CMD_LOG, bytes([func, state]))
-        self._send_frame(frame)
-        self._log(f"[INFO] LOG {'enabled' if enable else 'disabled'} for func={func}")
+        self._send_frame(frame, priority=PRIORITY_BACKGROUND)  # Queued; spaced by the scheduler
+        self._log("[INFO] LOG %s for func=%s", "enabled" if enable else "disabled", func, level=logging.DEBUG)
 
     def _enable_event_reporting(self) -> None:
         """Enable event reporting for all supported function types."""
@@ -517,7 +590,6 @@ class MicrosRS232:
         ]
         for func in func_types:
             self.function_log(func, True)
-            time.sleep(0.05)  # Small gap between LOG commands
         self._log("[INFO] Event reporting enabled for all function types")
 
     def connect(self):
@@ -537,69 +609,242 @@ class MicrosRS232:
     #################################################################################################
     # INTERNAL: SET with confirmation (ACK → EVENT → fallback GET)
     #################################################################################################
-    def _set_with_confirm(self, func: int, num: int, desired_state: int, toggle: bool = False) -> bool:
+    def _set_with_confirm(
+        self, func: int, num: int, desired_state: int, toggle: bool = False, coalesce: Optional[bool] = None
+    ) -> bool:
         """
         Perform a SET operation with full confirmation:
-             1) If toggle=True → determine target based on current GET
-             2) Send SET frame
-             3) Wait for ACK (optional - continue even if not received)
-             4) Wait for matching EVENT
-             5) Fallback: confirm via GET
-             6) Retry up to N times
+             1) If toggle=True → determine target from the current state (cache or GET)
+             2) Send SET frame (pipelined by the TxScheduler)
+             3) Wait for matching EVENT
+             4) Fallback: confirm via GET
+             5) Retry up to N times
+        Blocks until the command is confirmed or failed.
+        With coalesce (default: pipeline.supersede) a newer SET for the same device
+        supersedes this one; that is not an error (the newer target is confirmed instead),
+        so True is returned.
         """
 
         # Step 1: Toggle handling
-        target = desired_state
         if toggle:
-            current = self._sync_get_state(func, num, self.confirm_timeout_ms)
-            if current is None:
-                target = STATE_ON  # best effort default to ON
+            handle = self.submit_toggle(func, num, coalesce=coalesce)
+        else:
+            # Step 2..6: pipelined SET → EVENT → fallback GET → retry (TxScheduler)
+            handle = self._scheduler.submit_set(func, num, desired_state, coalesce=self._coalesce(coalesce))
+        return handle.wait() or handle.status == STATUS_SUPERSEDED
+
+    def submit_toggle(self, func: int, num: int, coalesce: Optional[bool] = None) -> CommandHandle:
+        """
+        Determine the current state and queue a SET to the opposite state.
+
+        The current state is, in order: the target of a SET still pending for the device,
+        the last reported state if it is at most toggle_max_age_s old, or a blocking GET.
+
+        Args:
+            func: Function type.
+            num: Device number.
+            coalesce: Latest wins: supersede queued / in-flight SETs for the same device
+                (default: pipeline.supersede).
+
+        Returns:
+            CommandHandle of the SET.
+        """
+        current = self._current_state(func, num)
+        if current is None:
+            target = STATE_ON  # best effort default to ON
+        else:
+            # Toggle: if currently on (1 or 255), turn off; otherwise turn on
+            target = STATE_OFF if current in (1, STATE_ON) else STATE_ON
+        return self._scheduler.submit_set(func, num, target, coalesce=self._coalesce(coalesce))
+
+    def _coalesce(self, coalesce: Optional[bool]) -> bool:
+        """Resolve a per-call coalesce flag (None = pipeline.supersede)."""
+        return self.supersede_sets if coalesce is None else coalesce
+
+    def _current_state(self, func: int, num: int) -> Optional[int]:
+        """Return the state a TOGGLE starts from; GETs only on a cache miss (None if no reply)."""
+        current = self._scheduler.pending_target(func, num)
+        if current is None and self.toggle_max_age_s > 0:
+            seen = self.states.last_seen(func, num)
+            if seen is not None and time.time() - seen <= self.toggle_max_age_s:
+                current = self.states.get(func, num)
+        if current is not None:
+            self.toggle_cache_hits += 1
+            return current
+
+        self.toggle_cache_misses += 1
+        return self._sync_get_state(func, num)
+
+    def submit_set(
+        self,
+        func: int,
+        num: int,
+        state: int,
+        coalesce: Optional[bool] = None,
+        priority: int = PRIORITY_INTERACTIVE
+    ) -> CommandHandle:
+        """
+        Queue a SET with confirmation without waiting for it.
+
+        Commands for different devices are pipelined on the bus; use the returned
+        handle to wait for (or be called back on) the confirmation.
+
+        Args:
+            func: Function type (FUNC_RELAY, FUNC_DIMMER, FUNC_FLAG, ...).
+            num: Device number.
+            state: Target state (0-255).
+            coalesce: Latest wins: supersede queued / in-flight SETs for the same device
+                (default: pipeline.supersede).
+            priority: Scheduler priority class (PRIORITY_BACKGROUND for automated work).
+
+        Returns:
+            CommandHandle for the command.
+        """
+        return self._scheduler.submit_set(
+            func, num, max(0, min(255, int(state))), coalesce=self._coalesce(coalesce), priority=priority
+        )
+
+    def submit_get(
+        self,
+        func: int,
+        num: int,
+        retries: Optional[int] = None,
+        priority: int = PRIORITY_BACKGROUND
+    ) -> CommandHandle:
+        """
+        Queue a GET without waiting for the reply.
+
+        Args:
+            func: Function type.
+            num: Device number.
+            retries: GET attempts (default: reliability.retries).
+            priority: Scheduler priority class.
+
+        Returns:
+            CommandHandle; once confirmed, handle.result holds the reported state.
+        """
+        return self._scheduler.submit_get(func, num, retries=retries, priority=priority)
+
+    def read_states(
+        self,
+        devices: List[Tuple[int, int]],
+        max_in_flight: Optional[int] = None,
+        budget_s: Optional[float] = None
+    ) -> Dict[Tuple[int, int], Optional[int]]:
+        """
+        Read the state of many devices with pipelined GETs.
+
+        At most `max_in_flight` GETs are outstanding at once (bus budget); the next GET is
+        queued as soon as a reply arrives. Devices that did not answer within their retries,
+        or before the overall budget ran out, map to None; GETs still pending when the
+        budget runs out are cancelled.
+
+        Args:
+            devices: (func, num) pairs to read.
+            max_in_flight: Outstanding GETs (default: "sync.max_in_flight").
+            budget_s: Overall time limit in seconds (default: "sync.budget_s").
+
+        Returns:
+            Dict mapping (func, num) to the reported state or None.
+        """
+        window = threading.Semaphore(max(1, int(max_in_flight or self.sync_max_in_flight)))
+        deadline = time.monotonic() + (budget_s if budget_s is not None else self.sync_budget_s)
+        handles: Dict[Tuple[int, int], CommandHandle] = {}
+
+        for key in dict.fromkeys(devices):
+            if not window.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                break
+            handle = self._scheduler.submit_get(
+                key[0], key[1], retries=self.sync_retries, priority=PRIORITY_BACKGROUND
+            )
+            handle.add_done_callback(lambda _h: window.release())
+            handles[key] = handle
+
+        results: Dict[Tuple[int, int], Optional[int]] = {}
+        for key in dict.fromkeys(devices):
+            handle = handles.get(key)
+            if handle is not None and handle.wait(max(0.0, deadline - time.monotonic())):
+                results[key] = handle.result
             else:
-                # Toggle: if currently on (1 or 255), turn off; otherwise turn on
-                target = STATE_OFF if current in (1, STATE_ON) else STATE_ON
-
-        # Step 2..6: Retries
-        for attempt in range(1, int(self.retries) + 1):
-            self._log(f"[INFO] SET attempt {attempt}/{self.retries} func={func} num={num} state={target}")
-
-            # Send SET — RX-thread handles responses
-            frame = self._compose_frame(CMD_SET, bytes([func, num, target]))
-            self._send_frame(frame)
-
-            # Step 3: wait briefly for ACK (optional - MICROS may not send traditional ACKs)
-            ack_received = self._wait_ack(100)  # Short timeout, ACK is optional
-            if ack_received:
-                self._log("[INFO] ACK received")
-
-            # Step 4: wait for EVENT confirmation (check for any state, not just target)
-            event_state = self._wait_event_state_for(func, num, self.confirm_timeout_ms)
-            if event_state is not None:
-                self._log(f"[INFO] EVENT received: state={event_state}, target={target}")
-                if event_state == target:
-                    self._log("[OK] Confirm via EVENT")
-                    return True
-                # For dimmers, accept any non-zero as success when turning on
-                if func == FUNC_DIMMER and target > 0 and event_state > 0:
-                    self._log("[OK] Confirm via EVENT (dimmer on)")
-                    return True
-
-            # Step 5: fallback GET confirmation
-            state = self._sync_get_state(func, num, self.confirm_timeout_ms)
-            self._log(f"[INFO] GET returned: state={state}, target={target}")
-            if state == target:
-                self._log("[OK] Confirm via GET")
-                return True
-            # For dimmers, accept any non-zero as success when turning on
-            if func == FUNC_DIMMER and target > 0 and state is not None and state > 0:
-                self._log("[OK] Confirm via GET (dimmer on)")
-                return True
-
-            # Optional backoff before retry
-            time.sleep((self.retry_delay_ms + (50 * (attempt - 1))) / 1000.0)
-
-        # Step 6: After retries → fail
-        self._log("[FAIL] SET not confirmed after retries")
-        return False
+                results[key] = None
+
+        # Budget spent: GETs still queued or waiting for a reply must not hold the bus
+        for handle in handles.values():
+            if not handle.done:
+                self._scheduler.cancel(handle)
+        return results
+
+    def cache_stats(self) -> dict:
+        """Return state cache counters (TOGGLE hits / misses, store version and updates)."""
+        lookups = self.toggle_cache_hits + self.toggle_cache_misses
+        stats = dict(self.states.stats())
+        stats.update({
+            "toggle_max_age_s": self.toggle_max_age_s,
+            "toggle_hits": self.toggle_cache_hits,
+            "toggle_misses": self.toggle_cache_misses,
+            "toggle_hit_rate": round(self.toggle_cache_hits / lookups, 3) if lookups else 0.0,
+        })
+        return stats
+
+    def capture_stats(self) -> dict:
+        """Return frame capture counters (empty if capture is disabled)."""
+        return self.capture.stats() if self.capture else {}
+
+    def timing_stats(self) -> dict:
+        """Return the adaptive timing snapshot (tuned gaps / timeouts, latency percentiles)."""
+        return self.timing.snapshot()
+
+    def submit_many(self, targets: List[Target]) -> List[CommandHandle]:
+        """
+        Queue a burst of SETs (one pipelined scene) without waiting.
+
+        Args:
+            targets: (func, num, state) tuples, already normalized (see batch.normalize_targets).
+
+        Returns:
+            One CommandHandle per target, in order.
+        """
+        return [
+            self._scheduler.submit_set(func, num, state, coalesce=(func == FUNC_DIMMER or self.supersede_sets))
+            for func, num, state in targets
+        ]
+
+    def set_many(self, targets, rounds: int = DEFAULT_ROUNDS) -> dict:
+        """
+        Apply a scene: send all targets as one pipelined burst, confirm them together,
+        then re-send only the ones that failed (up to `rounds` sends per target).
+
+        Args:
+            targets: (func, num, state) tuples or dicts (see batch.normalize_targets).
+            rounds: Maximum sends per target.
+
+        Returns:
+            Summary dict: elapsed_ms, rounds, total, confirmed, failed, results (per device).
+
+        Raises:
+            ValueError: If a target is malformed.
+        """
+        run = BatchRun(normalize_targets(targets), rounds)
+        t0 = time.monotonic()
+        while True:
+            todo = run.next_round()
+            if not todo:
+                break
+            handles = self.submit_many(todo)
+            for target, handle in zip(todo, handles):
+                run.record(target, handle)
+            for handle in handles:
+                handle.wait()
+        summary = run.summary(time.monotonic() - t0)
+        self._log(
+            "[INFO] set_many: %d/%d confirmed in %s ms (%d rounds)",
+            summary["confirmed"], summary["total"], summary["elapsed_ms"], summary["rounds"]
+        )
+        return summary
+
+    def scheduler_stats(self) -> dict:
+        """Return TX scheduler counters (queued, active, confirmed, failed, ...)."""
+        return self._scheduler.stats()
 
     #################################################################################################
     # PUBLIC: Relay API
@@ -651,6 +896,9 @@ class MicrosRS232:
         """
         Set a dimmer to the specified value.
 
+        Dimmer SETs are coalesced per device (latest wins): while a slider is dragged only
+        the newest value is sent and confirmed; older calls return once superseded.
+
         Args:
             num: Dimmer number (1-32 typically).
             value: Integer 0-255, or 'TOGGLE'.
@@ -659,10 +907,10 @@ class MicrosRS232:
             RuntimeError: If the SET command was not confirmed.
         """
         if isinstance(value, str) and value.upper() == "TOGGLE":
-            ok = self._set_with_confirm(FUNC_DIMMER, num, STATE_OFF, toggle=True)
+            ok = self._set_with_confirm(FUNC_DIMMER, num, STATE_OFF, toggle=True, coalesce=True)
         else:
             val = max(0, min(255, int(value)))
-            ok = self._set_with_confirm(FUNC_DIMMER, num, val)
+            ok = self._set_with_confirm(FUNC_DIMMER, num, val, coalesce=True)
 
         if not ok:
             raise RuntimeError("Dimmer SET not confirmed.")
@@ -699,6 +947,45 @@ class MicrosRS232:
         Raises:
             ValueError: If state or mood_type is not valid.
         """
+        frame = self._mood_frame(num, state, mood_type)
+        ack_waiter = self._waiters.add_ack()
+        try:
+            self._send_frame(frame).wait()
+        except Exception:
+            self._waiters.remove(ack_waiter)
+            raise
+
+        # Wait briefly for ACK (optional, just to verify command was received)
+        self._await(ack_waiter, self.timing.ack_timeout_ms())
+        if ack_waiter.done:
+            self._log("[OK] Mood triggered (ACK received)")
+        else:
+            self._log("[INFO] Mood triggered (no ACK, but command sent)")
+
+        # Success - moods are trigger actions, we don't wait for state confirmation
+
+    def submit_mood(self, num: int, state: str, mood_type: str = "LOCAL") -> CommandHandle:
+        """
+        Queue a mood trigger without waiting for it.
+
+        The ACK is not waited for (it only ever served as a log line; it still feeds the
+        adaptive timing), so a command worker is free again as soon as the frame is queued.
+
+        Args:
+            num: Mood number.
+            state: One of 'ON', 'OFF', or 'TOGGLE'.
+            mood_type: 'LOCAL', 'GENERAL', or 'TIMED'.
+
+        Returns:
+            CommandHandle that completes (via "TX") once the frame is on the wire.
+
+        Raises:
+            ValueError: If state or mood_type is not valid.
+        """
+        return self._send_frame(self._mood_frame(num, state, mood_type))
+
+    def _mood_frame(self, num: int, state: str, mood_type: str) -> bytes:
+        """Validate a mood command and return its SET frame."""
         mood_upper = mood_type.upper()
         if mood_upper == "LOCAL":
             func = FUNC_LOCMOOD
@@ -717,18 +1004,8 @@ class MicrosRS232:
         target = STATE_ON if s in ("ON", "TOGGLE") else STATE_OFF
 
         # Send SET command (moods are fire-and-forget triggers)
-        self._log(f"[INFO] Mood SET func={func} num={num} state={target}")
-        frame = self._compose_frame(CMD_SET, bytes([func, num, target]))
-        self._send_frame(frame)
-
-        # Wait briefly for ACK (optional, just to verify command was received)
-        ack_received = self._wait_ack(200)
-        if ack_received:
-            self._log("[OK] Mood triggered (ACK received)")
-        else:
-            self._log("[INFO] Mood triggered (no ACK, but command sent)")
-
-        # Success - moods are trigger actions, we don't wait for state confirmation
+        self._log("[INFO] Mood SET func=%s num=%s state=%s", func, num, target, level=logging.DEBUG)
+        return self._compose_frame(CMD_SET, bytes([func, num, target]))
 
     #################################################################################################
     # PUBLIC: Flags
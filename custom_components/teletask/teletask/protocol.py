@@ -24,6 +24,7 @@ FUNC_TIMEDMOOD: int = 9
 FUNC_GENMOOD: int = 10
 FUNC_FLAG: int = 15
 FUNC_SENSOR: int = 20     # Analog sensors (temperature, humidity, lux)
+FUNC_INPUT: int = 21      # Physical inputs (binary sensors; not reported over RS232, see below)
 FUNC_MOTOR: int = 55
 FUNC_COND: int = 60       # Condition
 
@@ -0,0 +1,797 @@
+#################################################################################################
+# File:    scheduler.py
+# Version: V08.2
+#
+# Description:
+#   Pipelined TX scheduler for TELETASK MICROS SET commands.
+#   One scheduler thread owns the bus for SETs:
+#     - Commands for different (func, num) targets go out back-to-back, separated only by
+#       min_frame_gap_ms (bus timing), up to max_in_flight unconfirmed commands at once
+#     - Each command runs the same policy as before: SET → EVENT → fallback GET → retry,
+#       but as a state machine, so waiting for one confirmation never blocks the bus
+#     - Confirmations are matched through the WaiterRegistry (per (func, num)) and wake
+#       the scheduler immediately
+#     - Callers get a CommandHandle per command (wait(), status, done callbacks)
+#   Confirmation timeouts come from the AdaptiveTiming engine when one is attached, and every
+#   reply / timeout is fed back to it as a latency sample. The gap after a frame is the tuned
+#   post_send_gap_ms of that engine (min_frame_gap_ms is the lower bound), unless the frame
+#   was submitted with its own gap_ms.
+#   Read-only GET commands (bulk state snapshot) share the same pipeline and retry policy.
+#   Plain frames (LOG, mood triggers) are queued too, so every frame on the bus goes through
+#   this thread: callers never sleep, the gap is enforced right before the next frame is sent.
+#   Commands for the SAME target are serialized in submission order, unless submitted with
+#   coalesce=True (latest wins: older queued / in-flight targets are superseded).
+#   Every command has a priority class that decides which frame goes next:
+#     - interactive   user commands (entity SETs, mood triggers, their toggle pre-reads)
+#     - confirmation  fallback GETs and retries of commands already on the bus
+#     - background    bulk state reads, LOG setup, polling / resync
+#   Interactive commands overtake queued background GETs; a lower class that has had a frame
+#   waiting but nothing sent for starvation_ms gets one frame first, so it is delayed but
+#   never starved.
+#   Background commands get at most max_in_flight - 1 in-flight slots, so a foreground command
+#   never waits for a full window of bulk GETs to drain.
+#   Log calls pass %-style args and a logging level; the driver formats them only if that
+#   level is enabled.
+#################################################################################################
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from .protocol import CMD_SET, CMD_GET, CMD_EVENT, FUNC_DIMMER
+from .framing import compose_frame
+from .waiters import Waiter, WaiterRegistry
+from .timing import AdaptiveTiming
+
+# Command status values
+STATUS_PENDING = "pending"
+STATUS_IN_FLIGHT = "in_flight"
+STATUS_CONFIRMED = "confirmed"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+STATUS_SUPERSEDED = "superseded"  # Replaced by a newer target for the same device
+
+# Command stages
+_STAGE_SET = "set"
+_STAGE_GET = "get"
+
+# Priority classes (lower value = served first)
+PRIORITY_INTERACTIVE = 0
+PRIORITY_CONFIRMATION = 1
+PRIORITY_BACKGROUND = 2
+
+PRIORITY_NAMES: Dict[int, str] = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_CONFIRMATION: "confirmation",
+    PRIORITY_BACKGROUND: "background",
+}
+
+# Defaults for the "pipeline" config section
+DEFAULT_MIN_FRAME_GAP_MS = 40
+DEFAULT_MAX_IN_FLIGHT = 8
+DEFAULT_STARVATION_MS = 500
+
+
+def state_confirms(func: int, target: int, state: Optional[int]) -> bool:
+    """Return True if a reported state confirms a SET target."""
+    if state is None:
+        return False
+    if state == target:
+        return True
+    # For dimmers, accept any non-zero as success when turning on
+    return func == FUNC_DIMMER and target > 0 and state > 0
+
+
+class CommandHandle:
+    """Completion handle for one scheduled command."""
+
+    def __init__(self, func: int, num: int, target: Optional[int]) -> None:
+        """Initialize a pending handle (target None = read-only GET)."""
+        self.func = func
+        self.num = num
+        self.target = target
+        self.result: Optional[int] = None  # State reported by the GET reply (read-only commands)
+        self.status = STATUS_PENDING
+        self.attempts = 0
+        self.confirmed_via: Optional[str] = None  # "EVENT" or "GET"
+        self.error: Optional[str] = None
+        self.submitted = time.monotonic()
+        self.completed: Optional[float] = None
+        self._event = threading.Event()
+        self._callbacks: List[Callable[["CommandHandle"], None]] = []
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"<CommandHandle func={self.func} num={self.num} target={self.target} status={self.status}>"
+
+    @property
+    def done(self) -> bool:
+        """Return True once the command reached a final status."""
+        return self._event.is_set()
+
+    @property
+    def ok(self) -> bool:
+        """Return True if the command was confirmed."""
+        return self.status == STATUS_CONFIRMED
+
+    @property
+    def elapsed_ms(self) -> Optional[float]:
+        """Return submit → completion time in ms (None while pending)."""
+        if self.completed is None:
+            return None
+        return (self.completed - self.submitted) * 1000.0
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the command completes.
+
+        Args:
+            timeout: Seconds to wait (None = until done).
+
+        Returns:
+            True if confirmed, False if failed, cancelled, superseded or still pending at timeout.
+        """
+        self._event.wait(timeout)
+        return self.ok
+
+    def add_done_callback(self, callback: Callable[["CommandHandle"], None]) -> None:
+        """Call `callback(handle)` once done (immediately if already done)."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def _finish(self, status: str, via: Optional[str] = None, error: Optional[str] = None) -> None:
+        """Set the final status and run done callbacks (scheduler internal)."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.status = status
+            self.confirmed_via = via
+            self.error = error
+            self.completed = time.monotonic()
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception:
+                pass
+
+
+class _Command:
+    """Scheduler-internal state of one command."""
+
+    __slots__ = (
+        "handle", "key", "read_only", "max_attempts", "frame", "gap_ms", "timeout_ms", "stage", "needs_send",
+        "waiter", "sent_at", "deadline", "not_before", "priority", "ready_at",
+    )
+
+    def __init__(
+        self,
+        handle: CommandHandle,
+        max_attempts: int,
+        frame: Optional[bytes] = None,
+        gap_ms: Optional[float] = None,
+        timeout_ms: Optional[float] = None,
+        priority: int = PRIORITY_INTERACTIVE
+    ) -> None:
+        self.handle = handle
+        # Plain frames have no device key: their payload bytes are not a (func, num) address
+        # (a LOG frame carries (func, enable)), so they never occupy or supersede a device slot
+        self.key: Optional[Tuple[int, int]] = None if frame is not None else (handle.func, handle.num)
+        self.read_only = handle.target is None and frame is None
+        self.max_attempts = max_attempts
+        self.frame = frame  # Plain frame: sent once, no confirmation
+        self.gap_ms = gap_ms  # Bus gap after this frame (None = tuned gap, see _gap_after)
+        self.timeout_ms = timeout_ms  # Confirmation timeout override
+        self.stage = _STAGE_GET if self.read_only else _STAGE_SET
+        self.needs_send = True
+        self.waiter: Optional[Waiter] = None
+        self.sent_at = 0.0
+        self.deadline = 0.0
+        self.not_before = 0.0
+        self.priority = priority
+        self.ready_at = time.monotonic()  # Since when the command waits for the bus
+
+
+def _is_set(cmd: _Command) -> bool:
+    """Return True for a SET with confirmation (not a GET or a plain frame)."""
+    return cmd.frame is None and not cmd.read_only
+
+
+class TxScheduler:
+    """Scheduler thread that pipelines SET commands and confirms them asynchronously."""
+
+    def __init__(
+        self,
+        write: Callable[[bytes], None],
+        waiters: WaiterRegistry,
+        retries: int = 3,
+        confirm_timeout_ms: int = 800,
+        retry_delay_ms: int = 250,
+        min_frame_gap_ms: int = DEFAULT_MIN_FRAME_GAP_MS,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        log: Optional[Callable[..., None]] = None,
+        timing: Optional[AdaptiveTiming] = None,
+        starvation_ms: int = DEFAULT_STARVATION_MS
+    ) -> None:
+        """
+        Initialize the scheduler.
+
+        Args:
+            write: Function that puts one frame on the wire (thread-safe, non-sleeping).
+            waiters: Registry resolved by the RX-thread.
+            retries: SET attempts per command.
+            confirm_timeout_ms: Wait per EVENT / GET confirmation step.
+            retry_delay_ms: Base backoff between attempts (+50 ms per attempt).
+            min_frame_gap_ms: Minimum time between two frames on the bus.
+            max_in_flight: Maximum number of unconfirmed commands (distinct targets); background
+                commands get at most max_in_flight - 1 of them.
+            log: Optional log function: log(msg, *args, level=logging.INFO).
+            timing: Optional adaptive timing engine (per-function confirm timeouts, post-send
+                gap); without one the gap is min_frame_gap_ms.
+            starvation_ms: Wait after which a lower priority class is served before higher ones.
+        """
+        self._write = write
+        self._waiters = waiters
+        self.retries = max(1, int(retries))
+        self.confirm_timeout_ms = confirm_timeout_ms
+        self.retry_delay_ms = retry_delay_ms
+        self.min_frame_gap_ms = min_frame_gap_ms
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.background_slots = max(1, self.max_in_flight - 1)  # One slot kept for foreground commands
+        self._log = log or (lambda msg, *args, **kwargs: None)
+        self._timing = timing
+        self.starvation_ms = max(0, int(starvation_ms))
+
+        self._cond = threading.Condition()
+        self._queue: Deque[_Command] = deque()
+        self._active: Dict[Tuple[int, int], _Command] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._finished: List[Tuple[CommandHandle, str, Optional[str], Optional[str]]] = []
+        self.last_tx = 0.0
+        self._gap_s = self.min_frame_gap_ms / 1000.0  # Gap owed after the last frame
+
+        # Counters
+        self.submitted = 0
+        self.confirmed = 0
+        self.failed = 0
+        self.superseded = 0
+        self.frames_sent = 0
+        self.max_active = 0
+        self.promoted = 0  # Frames sent ahead of a higher class because of starvation protection
+        self._class_queued: Dict[int, int] = dict.fromkeys(PRIORITY_NAMES, 0)
+        self._class_high_water: Dict[int, int] = dict.fromkeys(PRIORITY_NAMES, 0)
+        self._class_sent: Dict[int, int] = dict.fromkeys(PRIORITY_NAMES, 0)
+        self._class_served_at: Dict[int, float] = dict.fromkeys(PRIORITY_NAMES, 0.0)
+
+    #################################################################################################
+    # Lifecycle
+    #################################################################################################
+    def start(self) -> None:
+        """Start the scheduler thread."""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="teletask-tx", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the scheduler thread and cancel everything still pending."""
+        with self._cond:
+            self._running = False
+            pending = list(self._active.values()) + list(self._queue)
+            finished, self._finished = self._finished, []
+            self._active.clear()
+            self._queue.clear()
+            self._class_queued = dict.fromkeys(PRIORITY_NAMES, 0)
+            self._cond.notify_all()
+        for handle, status, via, error in finished:
+            handle._finish(status, via=via, error=error)
+        for cmd in pending:
+            if cmd.waiter is not None:
+                self._waiters.remove(cmd.waiter)
+            cmd.handle._finish(STATUS_CANCELLED, error="scheduler stopped")
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    #################################################################################################
+    # Public API
+    #################################################################################################
+    def submit_set(
+        self, func: int, num: int, target: int, coalesce: bool = False, priority: int = PRIORITY_INTERACTIVE
+    ) -> CommandHandle:
+        """
+        Queue a SET with confirmation.
+
+        Args:
+            func: Function type.
+            num: Device number.
+            target: Target state (0-255).
+            coalesce: Latest wins: older queued or in-flight SETs for the same device are
+                superseded (their handles complete with STATUS_SUPERSEDED) and only this
+                target is confirmed. GETs and plain frames are never superseded. Used for dimmer
+                sliders, and by the driver for every SET unless pipeline.supersede is off.
+            priority: Priority class (PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND, ...).
+
+        Returns:
+            CommandHandle that completes when the target state is confirmed (or retries run out).
+
+        Raises:
+            RuntimeError: If the scheduler is not running.
+        """
+        handle = CommandHandle(func, num, target)
+        cmd = _Command(handle, self.retries, priority=priority)
+        with self._cond:
+            if not self._running:
+                raise RuntimeError("TX scheduler is not running")
+            self.submitted += 1
+
+            position = self._supersede(cmd.key) if coalesce else None
+            if position is None:
+                self._queue.append(cmd)
+            else:
+                # Take the queue position of the oldest superseded command
+                self._queue.insert(position, cmd)
+            self._count_queued(cmd.priority, 1)
+            self._cond.notify()
+
+        self._flush_finished()
+        return handle
+
+    def submit_get(
+        self,
+        func: int,
+        num: int,
+        retries: Optional[int] = None,
+        timeout_ms: Optional[float] = None,
+        priority: int = PRIORITY_BACKGROUND
+    ) -> CommandHandle:
+        """
+        Queue a GET (state read) without blocking the bus for the reply.
+
+        Args:
+            func: Function type.
+            num: Device number.
+            retries: GET attempts (default: the scheduler's retries).
+            timeout_ms: Reply timeout per attempt (default: tuned / configured confirm timeout).
+            priority: Priority class (default background; pass PRIORITY_INTERACTIVE for reads
+                a user command waits on).
+
+        Returns:
+            CommandHandle; on success handle.result holds the reported state.
+
+        Raises:
+            RuntimeError: If the scheduler is not running.
+        """
+        handle = CommandHandle(func, num, None)
+        cmd = _Command(
+            handle,
+            max(1, int(retries)) if retries is not None else self.retries,
+            timeout_ms=timeout_ms,
+            priority=priority
+        )
+        with self._cond:
+            if not self._running:
+                raise RuntimeError("TX scheduler is not running")
+            self.submitted += 1
+            self._queue.append(cmd)
+            self._count_queued(cmd.priority, 1)
+            self._cond.notify()
+        return handle
+
+    def submit_frame(
+        self, frame: bytes, gap_ms: Optional[float] = None, priority: int = PRIORITY_INTERACTIVE
+    ) -> CommandHandle:
+        """
+        Queue a plain frame (LOG, mood trigger, ...) that needs no confirmation.
+
+        Args:
+            frame: Complete frame.
+            gap_ms: Bus gap to keep after this frame (default: tuned post-send gap).
+            priority: Priority class.
+
+        Returns:
+            CommandHandle that completes (STATUS_CONFIRMED, via "TX") once the frame is written.
+
+        Raises:
+            RuntimeError: If the scheduler is not running.
+        """
+        func = frame[3] if len(frame) > 4 else 0
+        num = frame[4] if len(frame) > 5 else 0
+        cmd = _Command(CommandHandle(func, num, None), 1, frame=bytes(frame), gap_ms=gap_ms, priority=priority)
+        with self._cond:
+            if not self._running:
+                raise RuntimeError("TX scheduler is not running")
+            self._queue.append(cmd)
+            self._count_queued(cmd.priority, 1)
+            self._cond.notify()
+        return cmd.handle
+
+    def cancel(self, handle: CommandHandle) -> bool:
+        """
+        Cancel a queued or in-flight command (its handle completes with STATUS_CANCELLED).
+
+        Returns:
+            True if the command was still pending, False if it had already completed.
+        """
+        with self._cond:
+            cmd = next((c for c in self._queue if c.handle is handle), None)
+            if cmd is not None:
+                self._queue.remove(cmd)
+                self._count_queued(cmd.priority, -1)
+                self._finished.append((handle, STATUS_CANCELLED, None, "cancelled"))
+            else:
+                cmd = next((c for c in self._active.values() if c.handle is handle), None)
+                if cmd is None:
+                    return False
+                self._complete(cmd, STATUS_CANCELLED, error="cancelled")
+            self._cond.notify()
+        self._flush_finished()
+        return True
+
+    def pending_target(self, func: int, num: int) -> Optional[int]:
+        """
+        Return the target of the newest SET for a device that is queued or in flight.
+
+        Returns:
+            Target state the device is being driven to, or None if no SET is pending.
+        """
+        key = (func, num)
+        with self._cond:
+            for cmd in reversed(self._queue):
+                if cmd.key == key and _is_set(cmd):
+                    return cmd.handle.target
+            active = self._active.get(key)
+            if active is not None and _is_set(active):
+                return active.handle.target
+        return None
+
+    def _supersede(self, key: Tuple[int, int]) -> Optional[int]:
+        """
+        Complete every queued / in-flight SET for `key` as superseded (caller holds the condition).
+
+        GETs for the device (a caller may be waiting on the reply) are left alone.
+
+        Returns:
+            Queue index of the first removed queued command, or None if none was queued.
+        """
+        active = self._active.get(key)
+        if active is not None and _is_set(active):
+            self._log(
+                "[INFO] SET func=%s num=%s state=%s superseded",
+                key[0], key[1], active.handle.target, level=logging.DEBUG
+            )
+            self._complete(active, STATUS_SUPERSEDED)
+
+        position: Optional[int] = None
+        kept: Deque[_Command] = deque()
+        for queued in self._queue:
+            if queued.key == key and _is_set(queued):
+                if position is None:
+                    position = len(kept)
+                self.superseded += 1
+                self._count_queued(queued.priority, -1)
+                self._finished.append((queued.handle, STATUS_SUPERSEDED, None, None))
+                continue
+            kept.append(queued)
+        self._queue = kept
+        return position
+
+    def _count_queued(self, priority: int, delta: int) -> None:
+        """Track the queue depth of a priority class (caller holds the condition)."""
+        depth = self._class_queued[priority] + delta
+        self._class_queued[priority] = depth
+        if depth > self._class_high_water[priority]:
+            self._class_high_water[priority] = depth
+
+    def _flush_finished(self) -> None:
+        """Run pending done callbacks outside the condition."""
+        with self._cond:
+            finished, self._finished = self._finished, []
+        for handle, status, via, error in finished:
+            handle._finish(status, via=via, error=error)
+
+    def note_tx(self) -> None:
+        """Record a frame written outside the scheduler (keeps the bus gap honest)."""
+        with self._cond:
+            self.last_tx = time.monotonic()
+
+    def stats(self) -> dict:
+        """Return scheduler counters as a dict."""
+        with self._cond:
+            return {
+                "queued": len(self._queue),
+                "active": len(self._active),
+                "max_active": self.max_active,
+                "submitted": self.submitted,
+                "confirmed": self.confirmed,
+                "failed": self.failed,
+                "superseded": self.superseded,
+                "frames_sent": self.frames_sent,
+                "promoted": self.promoted,
+                "classes": {
+                    name: {
+                        "queued": self._class_queued[cls],
+                        "high_water": self._class_high_water[cls],
+                        "sent": self._class_sent[cls],
+                    }
+                    for cls, name in PRIORITY_NAMES.items()
+                },
+            }
+
+    #################################################################################################
+    # Scheduler thread
+    #################################################################################################
+    def _wake(self, _waiter: Optional[Waiter] = None) -> None:
+        """Wake the scheduler thread (called by the RX-thread when a waiter resolves)."""
+        with self._cond:
+            self._cond.notify()
+
+    def _run(self) -> None:
+        """Scheduler loop: advance in-flight commands, then send the next frame when the bus allows."""
+        while True:
+            with self._cond:
+                if not self._running:
+                    return
+                now = time.monotonic()
+                self._advance(now)
+                cmd, wait_s = self._next_to_send(now)
+                finished, self._finished = self._finished, []
+                if cmd is None and not finished:
+                    self._cond.wait(wait_s)
+                    continue
+                frame = None if cmd is None else self._prepare_send(cmd, now)
+
+            # Done callbacks run outside the condition (they may submit new commands)
+            for handle, status, via, error in finished:
+                handle._finish(status, via=via, error=error)
+
+            if frame is None:
+                continue
+
+            try:
+                self._write(frame)
+            except Exception as e:
+                self._log(
+                    "[ERR] TX failed for func=%s num=%s: %s", cmd.handle.func, cmd.handle.num, e, level=logging.ERROR
+                )
+                with self._cond:
+                    self._complete(cmd, STATUS_FAILED, error=str(e))
+                continue
+
+            with self._cond:
+                self.last_tx = time.monotonic()
+                self.frames_sent += 1
+                self._gap_s = self._gap_after(cmd) / 1000.0
+                if cmd.frame is not None:
+                    self._complete(cmd, STATUS_CONFIRMED, via="TX")
+
+    def _gap_after(self, cmd: _Command) -> float:
+        """Return the bus gap (ms) owed after cmd's frame, never below min_frame_gap_ms."""
+        if cmd.gap_ms is not None:
+            gap_ms = cmd.gap_ms
+        elif self._timing is not None:
+            gap_ms = self._timing.post_send_gap_ms()
+        else:
+            gap_ms = self.min_frame_gap_ms
+        return max(self.min_frame_gap_ms, gap_ms)
+
+    def _next_to_send(self, now: float) -> Tuple[Optional[_Command], Optional[float]]:
+        """
+        Pick the next command that needs a frame on the bus.
+
+        Returns:
+            (command, None) if one can be sent now, else (None, seconds to sleep or None).
+        """
+        wake_at: Optional[float] = None
+        for cmd in self._active.values():
+            if cmd.waiter is not None:
+                wake_at = cmd.deadline if wake_at is None else min(wake_at, cmd.deadline)
+
+        gap_ready = self.last_tx + self._gap_s
+        if now < gap_ready:
+            wake_at = gap_ready if wake_at is None else min(wake_at, gap_ready)
+            return None, max(0.0, wake_at - now)
+
+        # Candidates: active commands that need a (re)send (fallback GETs and retries), plus
+        # the first sendable queued command of every class (FIFO within a class)
+        candidates: List[_Command] = []
+        for cmd in self._active.values():
+            if cmd.needs_send:
+                if cmd.not_before <= now:
+                    candidates.append(cmd)
+                else:
+                    wake_at = cmd.not_before if wake_at is None else min(wake_at, cmd.not_before)
+
+        # Background commands never take the last in-flight slot: an interactive command or a
+        # confirmation always finds room, even behind a full window of bulk GETs
+        room = len(self._active) < self.max_in_flight
+        background = sum(1 for c in self._active.values() if c.priority == PRIORITY_BACKGROUND)
+        room_background = room and background < self.background_slots
+        seen = set()
+        for cmd in self._queue:
+            if cmd.priority in seen:
+                continue
+            has_room = room_background if cmd.priority == PRIORITY_BACKGROUND else room
+            if cmd.frame is not None or (has_room and cmd.key not in self._active):
+                candidates.append(cmd)
+                seen.add(cmd.priority)
+                if len(seen) == len(PRIORITY_NAMES):
+                    break
+
+        if candidates:
+            # Highest class first (oldest within a class); a starved class goes first
+            best = min(candidates, key=lambda c: self._rank(c, now))
+            cls = self._class_of(best)
+            if self._starved(best, now) and any(self._class_of(c) < cls for c in candidates):
+                self.promoted += 1
+            self._class_sent[cls] += 1
+            self._class_served_at[cls] = now
+
+            if self._active.get(best.key) is not best:  # Taken from the queue
+                self._queue.remove(best)
+                self._count_queued(best.priority, -1)
+                if best.frame is None:
+                    self._active[best.key] = best
+                    self.max_active = max(self.max_active, len(self._active))
+            return best, None
+
+        return None, None if wake_at is None else max(0.0, wake_at - now)
+
+    @staticmethod
+    def _class_of(cmd: _Command) -> int:
+        """Return the class a command competes in: re-sends of foreground commands are confirmations."""
+        if cmd.priority == PRIORITY_BACKGROUND or cmd.handle.attempts == 0:
+            return cmd.priority
+        return PRIORITY_CONFIRMATION
+
+    def _starved(self, cmd: _Command, now: float) -> bool:
+        """Return True if the command's class has been waiting without a frame for starvation_ms."""
+        cls = self._class_of(cmd)
+        if cls == PRIORITY_INTERACTIVE:
+            return False
+        waiting_since = max(cmd.ready_at, self._class_served_at[cls])
+        return (now - waiting_since) * 1000.0 >= self.starvation_ms
+
+    def _rank(self, cmd: _Command, now: float) -> Tuple[int, int, float]:
+        """Sort key for candidates: (not starved, class, ready since)."""
+        return (0 if self._starved(cmd, now) else 1, self._class_of(cmd), cmd.ready_at)
+
+    def _prepare_send(self, cmd: _Command, now: float) -> bytes:
+        """Register the confirmation waiter and build the frame for the command's stage."""
+        handle = cmd.handle
+        func, num = handle.func, handle.num
+        cmd.needs_send = False
+        cmd.sent_at = now
+        handle.status = STATUS_IN_FLIGHT
+
+        if cmd.frame is not None:
+            handle.attempts = 1
+            return cmd.frame
+
+        if cmd.timeout_ms is not None:
+            timeout_ms = cmd.timeout_ms
+        elif self._timing is not None:
+            timeout_ms = self._timing.confirm_timeout_ms(func)
+        else:
+            timeout_ms = self.confirm_timeout_ms
+        cmd.deadline = now + timeout_ms / 1000.0
+
+        if cmd.stage == _STAGE_SET:
+            handle.attempts += 1
+            self._log(
+                "[INFO] SET attempt %d/%d func=%s num=%s state=%s",
+                handle.attempts, cmd.max_attempts, func, num, handle.target, level=logging.DEBUG
+            )
+            cmd.waiter = self._waiters.add(func, num, (CMD_EVENT,), callback=self._wake)
+            return compose_frame(CMD_SET, bytes([func, num, handle.target]))
+
+        if cmd.read_only:
+            handle.attempts += 1
+        cmd.waiter = self._waiters.add(func, num, (CMD_GET, CMD_EVENT), callback=self._wake)
+        return compose_frame(CMD_GET, bytes([func, num]))
+
+    def _advance(self, now: float) -> None:
+        """Move in-flight commands forward on replies and timeouts."""
+        for cmd in list(self._active.values()):
+            waiter = cmd.waiter
+            if waiter is None:
+                continue
+            if waiter.done:
+                self._on_reply(cmd, waiter.result, now)
+            elif now >= cmd.deadline:
+                self._on_timeout(cmd, now)
+
+    def _on_reply(self, cmd: _Command, state: Optional[int], now: float) -> None:
+        """Handle a resolved EVENT (SET stage) or GET-reply (GET stage)."""
+        handle = cmd.handle
+        waiter = cmd.waiter
+        self._waiters.remove(waiter)
+        cmd.waiter = None
+        if self._timing is not None and waiter.resolved_at is not None:
+            self._timing.record_event(handle.func, (waiter.resolved_at - cmd.sent_at) * 1000.0)
+
+        if cmd.stage == _STAGE_SET:
+            self._log("[INFO] EVENT received: state=%s, target=%s", state, handle.target, level=logging.DEBUG)
+            if state_confirms(handle.func, handle.target, state):
+                self._log("[OK] Confirm via EVENT", level=logging.DEBUG)
+                self._complete(cmd, STATUS_CONFIRMED, via="EVENT")
+                return
+            # Unexpected state → confirm via GET (device may still be switching)
+            cmd.stage = _STAGE_GET
+            cmd.needs_send = True
+            cmd.ready_at = now
+            return
+
+        if cmd.read_only:
+            handle.result = state
+            self._complete(cmd, STATUS_CONFIRMED, via="GET")
+            return
+
+        self._log("[INFO] GET returned: state=%s, target=%s", state, handle.target, level=logging.DEBUG)
+        if state_confirms(handle.func, handle.target, state):
+            self._log("[OK] Confirm via GET", level=logging.DEBUG)
+            self._complete(cmd, STATUS_CONFIRMED, via="GET")
+            return
+        self._retry(cmd, now)
+
+    def _on_timeout(self, cmd: _Command, now: float) -> None:
+        """Handle a confirmation step that timed out."""
+        self._waiters.remove(cmd.waiter)
+        cmd.waiter = None
+        if self._timing is not None:
+            self._timing.record_timeout(cmd.handle.func)
+
+        if cmd.stage == _STAGE_SET:
+            # No EVENT → fallback GET
+            cmd.stage = _STAGE_GET
+            cmd.needs_send = True
+            cmd.ready_at = now
+            return
+
+        if not cmd.read_only:
+            self._log("[INFO] GET returned: state=None, target=%s", cmd.handle.target, level=logging.DEBUG)
+        self._retry(cmd, now)
+
+    def _retry(self, cmd: _Command, now: float) -> None:
+        """Schedule the next attempt with backoff, or fail the command."""
+        attempt = cmd.handle.attempts
+        if attempt >= cmd.max_attempts:
+            if cmd.read_only:
+                self._log(
+                    "[WARN] GET func=%s num=%s: no reply after %d attempts",
+                    cmd.key[0], cmd.key[1], attempt, level=logging.WARNING
+                )
+                self._complete(cmd, STATUS_FAILED, error="no reply")
+            else:
+                self._log("[FAIL] SET not confirmed after retries", level=logging.WARNING)
+                self._complete(cmd, STATUS_FAILED, error="not confirmed")
+            return
+        cmd.stage = _STAGE_GET if cmd.read_only else _STAGE_SET
+        cmd.needs_send = True
+        cmd.not_before = now + (self.retry_delay_ms + (50 * (attempt - 1))) / 1000.0
+        cmd.ready_at = cmd.not_before
+
+    def _complete(self, cmd: _Command, status: str, via: Optional[str] = None, error: Optional[str] = None) -> None:
+        """Finish a command and free its target slot (caller holds the condition)."""
+        if cmd.waiter is not None:
+            self._waiters.remove(cmd.waiter)
+            cmd.waiter = None
+        if self._active.get(cmd.key) is cmd:
+            del self._active[cmd.key]
+        if cmd.frame is None:  # Plain frames are not counted as confirmations
+            if status == STATUS_CONFIRMED:
+                self.confirmed += 1
+            elif status == STATUS_FAILED:
+                self.failed += 1
+            elif status == STATUS_SUPERSEDED:
+                self.superseded += 1
+        self._finished.append((cmd.handle, status, via, error))
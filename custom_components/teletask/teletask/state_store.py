@@ -0,0 +1,177 @@
+#################################################################################################
+# File:    state_store.py
+# Version: V07.6
+#
+# Description:
+#   Compact, versioned store for the latest state of every MICROS device.
+#   Per function type four fixed-size arrays are indexed directly by device number
+#   (device numbers are one byte on the wire, so 256 slots cover every device):
+#     - value    last reported state (-1 = never reported)
+#     - changed  time.time() of the last change
+#     - seen     time.time() of the last report (changed or not; freshness of the value)
+#     - version  global version at the last change
+#   Every change bumps one global version counter, so a consumer that remembers the
+#   version it last saw can fetch just the delta with changes_since().
+#################################################################################################
+
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# Slots per function type (device number is a single byte)
+SLOTS: int = 256
+
+# Marker for "never reported"
+UNKNOWN: int = -1
+
+
+class StateChange(NamedTuple):
+    """One changed slot, as returned by StateStore.changes_since()."""
+
+    func: int
+    num: int
+    state: int
+    timestamp: float
+    version: int
+
+
+class _FuncSlots:
+    """Arrays for one function type."""
+
+    __slots__ = ("value", "changed", "seen", "version", "last_version")
+
+    def __init__(self) -> None:
+        self.value = array("h", [UNKNOWN]) * SLOTS
+        self.changed = array("d", [0.0]) * SLOTS
+        self.seen = array("d", [0.0]) * SLOTS
+        self.version = array("Q", [0]) * SLOTS
+        self.last_version = 0  # Highest version in this function type (skip unchanged types)
+
+
+class StateStore:
+    """Array-backed device state with per-slot timestamps and a global change version."""
+
+    def __init__(self, funcs: Iterable[int] = ()) -> None:
+        """
+        Initialize the store.
+
+        Args:
+            funcs: Function types to pre-allocate (others are allocated on first update).
+        """
+        self._lock = threading.Lock()
+        self._funcs: Dict[int, _FuncSlots] = {func: _FuncSlots() for func in funcs}
+        self._version = 0
+
+        # Counters
+        self.updates = 0
+        self.changes = 0
+
+    @property
+    def version(self) -> int:
+        """Return the global version (number of changes so far)."""
+        return self._version
+
+    def update(self, func: int, num: int, state: int, timestamp: Optional[float] = None) -> bool:
+        """
+        Store a reported state.
+
+        Args:
+            func: Function type.
+            num: Device number (0-255).
+            state: Reported state (0-255).
+            timestamp: Report time (default: now).
+
+        Returns:
+            True if the value changed (or was unknown), False for a repeat of the cached value.
+
+        Raises:
+            IndexError: If num is outside 0-255.
+        """
+        if not 0 <= num < SLOTS:
+            raise IndexError(f"device number out of range: {num}")
+
+        if timestamp is None:
+            timestamp = time.time()
+        with self._lock:
+            self.updates += 1
+            slots = self._funcs.get(func)
+            if slots is None:
+                slots = self._funcs[func] = _FuncSlots()
+            slots.seen[num] = timestamp
+            if slots.value[num] == state:
+                return False
+
+            self._version += 1
+            self.changes += 1
+            slots.value[num] = state
+            slots.changed[num] = timestamp
+            slots.version[num] = self._version
+            slots.last_version = self._version
+            return True
+
+    def get(self, func: int, num: int) -> Optional[int]:
+        """Return the last reported state, or None if never reported."""
+        slots = self._funcs.get(func)
+        if slots is None or not 0 <= num < SLOTS:
+            return None
+        value = slots.value[num]
+        return None if value == UNKNOWN else value
+
+    def last_changed(self, func: int, num: int) -> Optional[float]:
+        """Return time.time() of the last change, or None if never reported."""
+        slots = self._funcs.get(func)
+        if slots is None or not 0 <= num < SLOTS or slots.value[num] == UNKNOWN:
+            return None
+        return slots.changed[num]
+
+    def last_seen(self, func: int, num: int) -> Optional[float]:
+        """Return time.time() of the last report (changed or not), or None if never reported."""
+        slots = self._funcs.get(func)
+        if slots is None or not 0 <= num < SLOTS or slots.value[num] == UNKNOWN:
+            return None
+        return slots.seen[num]
+
+    def values(self, func: int) -> Dict[int, int]:
+        """Return {num: state} for every reported device of a function type."""
+        slots = self._funcs.get(func)
+        if slots is None:
+            return {}
+        return {num: value for num, value in enumerate(slots.value) if value != UNKNOWN}
+
+    def changes_since(self, version: int) -> Tuple[int, List[StateChange]]:
+        """
+        Return every slot changed after `version`.
+
+        Args:
+            version: Version the consumer saw last (0 = everything).
+
+        Returns:
+            (current version, changes ordered by version). Pass the returned version
+            to the next call to receive only newer changes.
+        """
+        with self._lock:
+            current = self._version
+            changes: List[StateChange] = []
+            if version >= current:
+                return current, changes
+            for func, slots in self._funcs.items():
+                if slots.last_version <= version:
+                    continue
+                for num, slot_version in enumerate(slots.version):
+                    if slot_version > version:
+                        changes.append(
+                            StateChange(func, num, slots.value[num], slots.changed[num], slot_version)
+                        )
+        changes.sort(key=lambda change: change.version)
+        return current, changes
+
+    def stats(self) -> Dict[str, int]:
+        """Return store counters as a dict."""
+        with self._lock:
+            return {
+                "version": self._version,
+                "updates": self.updates,
+                "changes": self.changes,
+                "function_types": len(self._funcs),
+            }
@@ -0,0 +1,214 @@
+#################################################################################################
+# File:    timing.py
+# Version: V07.1
+#
+# Description:
+#   Adaptive timing for the MICROS link.
+#   Instead of paying the static worst case from config.json on every command, the driver
+#   measures real latencies and derives its gaps and timeouts from them:
+#     - TX→ACK   (SET frames; ACKs carry no address, matched FIFO)  → ack_timeout, post_send_gap
+#     - TX→EVENT / GET-reply (per function type)                    → confirm_timeout
+#   Each value is a rolling percentile of the last `window` samples times `margin`, clamped
+#   to a configured [floor, ceiling]. Until `min_samples` samples exist the static value is
+#   used. A timed-out wait counts as a ceiling sample, so the tuned values grow back quickly
+#   when the bus slows down.
+#################################################################################################
+
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+# Defaults for the "timing" config section
+DEFAULT_WINDOW = 64
+DEFAULT_PERCENTILE = 95.0
+DEFAULT_MARGIN = 2.0
+DEFAULT_MIN_SAMPLES = 8
+DEFAULT_ACK_FLOOR_MS = 30
+DEFAULT_GAP_FLOOR_MS = 20
+DEFAULT_CONFIRM_FLOOR_MS = 150
+
+# Pending TX stamps older than this are not matched to an ACK anymore (seconds)
+_ACK_MATCH_WINDOW_S = 2.0
+
+
+class LatencyWindow:
+    """Rolling window of latency samples (ms) with percentile lookup."""
+
+    def __init__(self, size: int = DEFAULT_WINDOW) -> None:
+        """Initialize an empty window holding at most `size` samples."""
+        self._samples: Deque[float] = deque(maxlen=max(1, int(size)))
+
+    def __len__(self) -> int:
+        """Return the number of samples."""
+        return len(self._samples)
+
+    def add(self, ms: float) -> None:
+        """Add one sample."""
+        self._samples.append(float(ms))
+
+    def percentile(self, p: float) -> Optional[float]:
+        """
+        Return the p-th percentile (nearest rank) of the window.
+
+        Returns:
+            Latency in ms, or None if the window is empty.
+        """
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = max(1, math.ceil(p / 100.0 * len(ordered)))
+        return ordered[min(rank, len(ordered)) - 1]
+
+
+class AdaptiveTiming:
+    """Thread-safe latency tracker that tunes gaps and timeouts within floor/ceiling bounds."""
+
+    def __init__(
+        self,
+        ack_timeout_ms: int,
+        post_send_gap_ms: int,
+        confirm_timeout_ms: int,
+        config: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Initialize the engine.
+
+        Args:
+            ack_timeout_ms: Static ACK timeout (used until tuned, default ceiling).
+            post_send_gap_ms: Static post-send gap (used until tuned, default ceiling).
+            confirm_timeout_ms: Static confirmation timeout (used until tuned, default ceiling).
+            config: Optional "timing" config section:
+                enabled, window, percentile, margin, min_samples,
+                ack_floor_ms / ack_ceiling_ms, gap_floor_ms / gap_ceiling_ms,
+                confirm_floor_ms / confirm_ceiling_ms.
+        """
+        cfg = config or {}
+        self.enabled = bool(cfg.get("enabled", True))
+        self.window = int(cfg.get("window", DEFAULT_WINDOW))
+        self.percentile = float(cfg.get("percentile", DEFAULT_PERCENTILE))
+        self.margin = float(cfg.get("margin", DEFAULT_MARGIN))
+        self.min_samples = max(1, int(cfg.get("min_samples", DEFAULT_MIN_SAMPLES)))
+
+        # Static values double as default ceilings: tuning only ever speeds things up
+        self.static = {
+            "ack_timeout_ms": ack_timeout_ms,
+            "post_send_gap_ms": post_send_gap_ms,
+            "confirm_timeout_ms": confirm_timeout_ms,
+        }
+        self.bounds: Dict[str, Tuple[float, float]] = {
+            "ack_timeout_ms": self._bounds(cfg, "ack", DEFAULT_ACK_FLOOR_MS, ack_timeout_ms),
+            "post_send_gap_ms": self._bounds(cfg, "gap", DEFAULT_GAP_FLOOR_MS, post_send_gap_ms),
+            "confirm_timeout_ms": self._bounds(cfg, "confirm", DEFAULT_CONFIRM_FLOOR_MS, confirm_timeout_ms),
+        }
+
+        self._lock = threading.Lock()
+        self._ack = LatencyWindow(self.window)
+        self._event: Dict[int, LatencyWindow] = {}
+        self._pending_tx: Deque[float] = deque()
+
+        # Counters
+        self.ack_samples = 0
+        self.event_samples = 0
+        self.timeouts = 0
+
+    @staticmethod
+    def _bounds(cfg: Dict[str, Any], name: str, floor: float, ceiling: float) -> Tuple[float, float]:
+        lo = float(cfg.get(f"{name}_floor_ms", min(floor, ceiling)))
+        hi = float(cfg.get(f"{name}_ceiling_ms", ceiling))
+        return lo, max(lo, hi)
+
+    #################################################################################################
+    # Measurements
+    #################################################################################################
+    def note_tx(self) -> None:
+        """Record an ACKed frame put on the wire (matched FIFO with the next ACK)."""
+        now = time.monotonic()
+        with self._lock:
+            pending = self._pending_tx
+            while pending and now - pending[0] > _ACK_MATCH_WINDOW_S:
+                pending.popleft()
+            pending.append(now)
+
+    def note_ack(self) -> None:
+        """Record an ACK frame: the oldest pending TX yields one TX→ACK sample."""
+        now = time.monotonic()
+        with self._lock:
+            pending = self._pending_tx
+            while pending:
+                sent = pending.popleft()
+                if now - sent <= _ACK_MATCH_WINDOW_S:
+                    self._ack.add((now - sent) * 1000.0)
+                    self.ack_samples += 1
+                    return
+
+    def record_event(self, func: int, ms: float) -> None:
+        """Record a TX→EVENT latency for a function type."""
+        with self._lock:
+            window = self._event.get(func)
+            if window is None:
+                window = self._event[func] = LatencyWindow(self.window)
+            window.add(ms)
+            self.event_samples += 1
+
+    def record_timeout(self, func: int) -> None:
+        """Record a confirmation wait that timed out (counted as a ceiling sample)."""
+        self.record_event(func, self.bounds["confirm_timeout_ms"][1])
+        with self._lock:
+            self.timeouts += 1
+
+    #################################################################################################
+    # Tuned values
+    #################################################################################################
+    def _tuned(self, name: str, window: Optional[LatencyWindow]) -> float:
+        """Percentile × margin clamped to bounds, or the static value while untrained."""
+        if not self.enabled or window is None or len(window) < self.min_samples:
+            return self.static[name]
+        lo, hi = self.bounds[name]
+        return max(lo, min(hi, window.percentile(self.percentile) * self.margin))
+
+    def ack_timeout_ms(self) -> float:
+        """Return the current ACK timeout."""
+        with self._lock:
+            return self._tuned("ack_timeout_ms", self._ack)
+
+    def post_send_gap_ms(self) -> float:
+        """Return the current gap after a frame (time the MICROS needs to ACK it)."""
+        with self._lock:
+            return self._tuned("post_send_gap_ms", self._ack)
+
+    def confirm_timeout_ms(self, func: int) -> float:
+        """Return the current EVENT / GET-reply timeout for a function type."""
+        with self._lock:
+            return self._tuned("confirm_timeout_ms", self._event.get(func))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return tuned values, percentiles and counters for inspection."""
+        with self._lock:
+            events = {
+                func: {
+                    "samples": len(window),
+                    "p50_ms": window.percentile(50),
+                    "p95_ms": window.percentile(95),
+                    "confirm_timeout_ms": self._tuned("confirm_timeout_ms", window),
+                }
+                for func, window in sorted(self._event.items())
+            }
+            return {
+                "enabled": self.enabled,
+                "percentile": self.percentile,
+                "margin": self.margin,
+                "bounds": dict(self.bounds),
+                "ack": {
+                    "samples": len(self._ack),
+                    "p50_ms": self._ack.percentile(50),
+                    "p95_ms": self._ack.percentile(95),
+                },
+                "ack_timeout_ms": self._tuned("ack_timeout_ms", self._ack),
+                "post_send_gap_ms": self._tuned("post_send_gap_ms", self._ack),
+                "confirm_timeout_ms": events,
+                "ack_samples": self.ack_samples,
+                "event_samples": self.event_samples,
+                "timeouts": self.timeouts,
+            }
@@ -0,0 +1,183 @@
+#################################################################################################
+# File:    waiters.py
+# Version: V07.1
+#
+# Description:
+#   Waiter registry for MICROS confirmations.
+#   The RX dispatcher resolves pending waits directly, keyed by (func, num):
+#     - O(1) lookup per incoming frame (no scanning of unrelated traffic)
+#     - No frames are taken out of order or put back
+#     - Several waits on different devices (or on the same device) can be in flight at once;
+#       one state report resolves every waiter that accepts it
+#   ACK frames carry no device address and resolve the oldest pending ACK waiter (FIFO).
+#################################################################################################
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+Key = Tuple[int, int]
+
+# ACK frames = CMD 0x00 or 0x01
+ACK_CMDS: Tuple[int, ...] = (0x00, 0x01)
+
+
+class Waiter:
+    """A single pending confirmation, resolved by the RX-thread."""
+
+    __slots__ = ("key", "accepts", "predicate", "callback", "cmd", "result", "resolved_at", "_event")
+
+    def __init__(
+        self,
+        key: Optional[Key],
+        accepts: Tuple[int, ...],
+        predicate: Optional[Callable[[int], bool]] = None,
+        callback: Optional[Callable[["Waiter"], None]] = None
+    ) -> None:
+        """
+        Initialize the waiter.
+
+        Args:
+            key: (func, num) the waiter listens to, or None for ACK waiters.
+            accepts: CMD values that may resolve this waiter (e.g. CMD_EVENT, CMD_GET).
+            predicate: Optional check on the reported state; non-matching reports are ignored.
+            callback: Optional function called (outside the registry lock) once resolved.
+        """
+        self.key = key
+        self.accepts = accepts
+        self.predicate = predicate
+        self.callback = callback
+        self.cmd: Optional[int] = None
+        self.result: Optional[int] = None
+        self.resolved_at: Optional[float] = None  # time.monotonic() of the resolving frame
+        self._event = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        """Return True once the waiter has been resolved."""
+        return self._event.is_set()
+
+    def offer(self, cmd: int, state: Optional[int]) -> bool:
+        """
+        Try to resolve the waiter with an incoming report.
+
+        Returns:
+            True if the report was accepted.
+        """
+        if self._event.is_set() or cmd not in self.accepts:
+            return False
+        if self.predicate is not None and not self.predicate(state):
+            return False
+        self.cmd = cmd
+        self.result = state
+        self.resolved_at = time.monotonic()
+        self._event.set()
+        return True
+
+    def wait(self, timeout_ms: float) -> bool:
+        """
+        Block until resolved or timed out.
+
+        Returns:
+            True if resolved, False on timeout.
+        """
+        return self._event.wait(max(0.0, timeout_ms) / 1000.0)
+
+
+class WaiterRegistry:
+    """Thread-safe map of pending waiters keyed by (func, num), plus a FIFO of ACK waiters."""
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self._lock = threading.Lock()
+        self._by_key: Dict[Key, List[Waiter]] = {}
+        self._acks: Deque[Waiter] = deque()
+
+    def __len__(self) -> int:
+        """Return the number of pending waiters (device + ACK)."""
+        with self._lock:
+            return sum(len(v) for v in self._by_key.values()) + len(self._acks)
+
+    def add(
+        self,
+        func: int,
+        num: int,
+        accepts: Tuple[int, ...],
+        predicate: Optional[Callable[[int], bool]] = None,
+        callback: Optional[Callable[[Waiter], None]] = None
+    ) -> Waiter:
+        """
+        Register a waiter for (func, num). Register BEFORE sending the frame that triggers the
+        reply, so a fast response cannot slip through.
+        """
+        waiter = Waiter((func, num), accepts, predicate, callback)
+        with self._lock:
+            self._by_key.setdefault(waiter.key, []).append(waiter)
+        return waiter
+
+    def add_ack(self) -> Waiter:
+        """Register a waiter for the next ACK frame."""
+        waiter = Waiter(None, ACK_CMDS)
+        with self._lock:
+            self._acks.append(waiter)
+        return waiter
+
+    def remove(self, waiter: Waiter) -> None:
+        """Unregister a waiter (resolved or timed out). Safe to call more than once."""
+        with self._lock:
+            if waiter.key is None:
+                try:
+                    self._acks.remove(waiter)
+                except ValueError:
+                    pass
+                return
+
+            entries = self._by_key.get(waiter.key)
+            if not entries:
+                return
+            try:
+                entries.remove(waiter)
+            except ValueError:
+                pass
+            if not entries:
+                del self._by_key[waiter.key]
+
+    def resolve(self, cmd: int, func: int, num: int, state: Optional[int]) -> int:
+        """
+        Offer a state report to every waiter registered for (func, num).
+
+        Returns:
+            Number of waiters resolved.
+        """
+        with self._lock:
+            entries = self._by_key.get((func, num))
+            if not entries:
+                return 0
+            # Callbacks run after the lock is released (they may take other locks)
+            resolved = [w for w in entries if w.offer(cmd, state)]
+            if resolved:
+                remaining = [w for w in entries if not w.done]
+                if remaining:
+                    self._by_key[(func, num)] = remaining
+                else:
+                    del self._by_key[(func, num)]
+
+        for waiter in resolved:
+            if waiter.callback is not None:
+                waiter.callback(waiter)
+        return len(resolved)
+
+    def resolve_ack(self, cmd: int) -> bool:
+        """
+        Resolve the oldest pending ACK waiter with an ACK frame (CMD 0x00 / 0x01).
+
+        Returns:
+            True if a waiter consumed the ACK.
+        """
+        with self._lock:
+            while self._acks:
+                waiter = self._acks.popleft()
+                if waiter.offer(cmd, None):
+                    return True
+        return False
@@ -1,21 +1,34 @@
 
 #################################################################################################
 # File:    teletask_hub.py
-# Version: 1.5 - Fixed threading issue with async_fire from receive thread
+# Version: 2.11 - Mood triggers return a handle; the command worker does not wait for the ACK
 #################################################################################################
 
+import asyncio
 import logging
 import os
-from typing import Dict, Any, Optional, List
+import threading
+import time
+from functools import partial
+from typing import Dict, Any, Optional, List, Tuple
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
 
 from .teletask.micros_rs232 import MicrosRS232
+from .teletask.events import StateEvent
 from .teletask.protocol import (
     FUNC_RELAY, FUNC_DIMMER, FUNC_FLAG,
-    FUNC_LOCMOOD, FUNC_GENMOOD, FUNC_SENSOR
+    FUNC_SENSOR, FUNC_INPUT,
+    STATE_ON, STATE_OFF
 )
+from .teletask.command_worker import (
+    CommandWorker, CommandQueueFull, async_wait_handle, DEFAULT_QUEUE_DEPTH, DEFAULT_COMMAND_TIMEOUT_S
+)
+from .teletask.batch import BatchRun, DEFAULT_ROUNDS, normalize_targets
 from .teletask.device_config import load_device_config_safe, DeviceConfig, DeviceInfo, SensorInfo
+from .teletask.state_store import StateStore, StateChange
+from .teletask.scheduler import PRIORITY_CONFIRMATION
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -24,6 +37,26 @@ TELETASK_CONFIG_DIR = "teletask"
 CONNECTION_CONFIG_FILE = "config.json"
 DEVICES_CONFIG_FILE = "devices.json"
 
+# Default collection window for state updates handed to the HA loop ("hub" config section)
+DEFAULT_BATCH_WINDOW_MS = 5
+
+# Function types whose repeated, unchanged EVENTs are dropped by default ("hub" config section)
+DEFAULT_SUPPRESS_DUPLICATES = (FUNC_RELAY, FUNC_DIMMER, FUNC_FLAG, FUNC_SENSOR)
+
+# Bus event fired for every published state (frontend event monitor)
+EVENT_STATE_UPDATED = "teletask_state_updated"
+
+# Bus event fired when an optimistic command could not be confirmed (state rolled back)
+EVENT_COMMAND_FAILED = "teletask_command_failed"
+
+# Dispatcher signal sent when the state of one device changes (see state_signal)
+SIGNAL_STATE_UPDATED = "teletask_state_updated_{func}_{num}"
+
+
+def state_signal(func: int, num: int) -> str:
+    """Return the dispatcher signal name for the device (func, num)."""
+    return SIGNAL_STATE_UPDATED.format(func=func, num=num)
+
 
 class TeletaskHub:
     """Home Assistant bridge around MicrosRS232 driver."""
@@ -48,8 +81,10 @@ class TeletaskHub:
 
         self.client = MicrosRS232(
             config_path=config_file,
-            log_callback=self._log_to_ha
+            log_callback=self._log_to_ha,
+            log_enabled=self._log_enabled
         )
+        self.client.add_listener(self._on_state_event)
 
         # Load device configuration
         self.device_config: Optional[DeviceConfig] = load_device_config_safe(devices_file)
@@ -64,16 +99,44 @@ class TeletaskHub:
         else:
             _LOGGER.warning("No device config found at %s/%s, using defaults", TELETASK_CONFIG_DIR, DEVICES_CONFIG_FILE)
 
-        # Latest states for HA entities
-        self.relay_state: Dict[int, bool] = {}
-        self.dimmer_state: Dict[int, int] = {}
-        self.flag_state: Dict[int, bool] = {}
-        self.input_state: Dict[int, bool] = {}
-        self.sensor_state: Dict[int, float] = {}
+        # Latest states for HA entities (arrays per function type, versioned)
+        self.state = StateStore(funcs=(FUNC_RELAY, FUNC_DIMMER, FUNC_FLAG, FUNC_SENSOR))
 
         # Running flag
         self.running = False
 
+        # Result of the last initial_sync() (devices, synced, missing, seconds)
+        self.last_sync: Dict[str, Any] = {}
+
+        # Batched thread → loop handoff: updates collected by the event thread, published
+        # by one loop callback per burst
+        hub_cfg = self.client.config.section("hub")
+        self.batch_window_ms = max(0.0, float(hub_cfg.get("batch_window_ms", DEFAULT_BATCH_WINDOW_MS)))
+        self._batch_lock = threading.Lock()
+        self._batch: List[Tuple[int, int, int]] = []
+        self._flush_scheduled = False
+        self.batch_stats: Dict[str, int] = {"batches": 0, "updates": 0, "max_batch": 0}
+
+        # Duplicate suppression: unchanged states of these function types produce no entity
+        # writes and no bus events (true = all types, false = none, or a list of types)
+        suppress = hub_cfg.get("suppress_duplicates", list(DEFAULT_SUPPRESS_DUPLICATES))
+        self.suppress_all = suppress is True
+        self.suppress_funcs = set() if suppress in (True, False, None) else {int(f) for f in suppress}
+        self.duplicates_suppressed: Dict[int, int] = {}
+
+        # One worker thread for entity / service commands (instead of an executor job per call)
+        self.commands = CommandWorker(
+            max_depth=hub_cfg.get("command_queue_depth", DEFAULT_QUEUE_DEPTH),
+            timeout_s=hub_cfg.get("command_timeout_s", DEFAULT_COMMAND_TIMEOUT_S),
+        )
+
+        # Optimistic mode: relay / dimmer / flag commands publish their target at once and are
+        # confirmed in the background; a failed confirmation rolls the state back
+        self.optimistic = bool(hub_cfg.get("optimistic", False))
+        self._optimistic: Dict[Tuple[int, int], int] = {}  # Latest pending command per device
+        self._optimistic_seq = 0
+        self.optimistic_stats: Dict[str, int] = {"applied": 0, "confirmed": 0, "failed": 0, "rolled_back": 0}
+
     def get_configured_relays(self) -> List[DeviceInfo]:
         """Get list of configured relays, or default range if no config."""
         if self.device_config and self.device_config.relays:
@@ -126,78 +189,165 @@ class TeletaskHub:
         """
         self.client.set_mood(num, "ON", mood_type)
 
-    def _log_to_ha(self, msg: str) -> None:
+    def _log_to_ha(self, msg: str, level: int = logging.DEBUG) -> None:
         """
-        Forward driver logs to HA log and parse state updates.
+        Forward driver logs to HA log.
 
         Args:
             msg: Log message from the driver.
+            level: Logging level chosen by the driver (frame dumps and command traces are
+                DEBUG, failures WARNING / ERROR).
+        """
+        _LOGGER.log(level, "[TeleTask] %s", msg)
+
+    def _log_enabled(self, level: int) -> bool:
+        """Tell the driver whether a message at `level` would be logged (checked before formatting)."""
+        return _LOGGER.isEnabledFor(level)
+
+    def _on_state_event(self, event: StateEvent) -> None:
         """
-        _LOGGER.debug("[TeleTask] %s", msg)
+        Apply a parsed state change from the driver.
+
+        Called from the MicrosRS232 event thread for every EVENT frame.
 
-        # Parse state change events (events the driver already parsed)
-        if "RX:" not in msg:
+        Args:
+            event: StateEvent delivered by MicrosRS232.add_listener().
+        """
+        func = event.func
+        num = event.num
+        st = event.state
+
+        changed = self.state.update(func, num, st, event.timestamp)
+        if not changed and (self.suppress_all or func in self.suppress_funcs):
+            # Echo of a state we already published (e.g. after our own SET + fallback GET)
+            self.duplicates_suppressed[func] = self.duplicates_suppressed.get(func, 0) + 1
             return
 
-        # Example: "HH:MM:SS  RX: 02 07 08 01 03 FF xx"
-        try:
-            parts = msg.split("  RX:")
-            if len(parts) < 2:
+        # Schedule HA entity updates (thread-safe)
+        # _on_state_event is called from the MicrosRS232 event thread: collect the update and
+        # wake the loop only for the first one of a burst
+        with self._batch_lock:
+            self._batch.append((func, num, st))
+            if self._flush_scheduled:
                 return
-            hex_str = parts[1].strip()
-            b = [int(x, 16) for x in hex_str.split()]
-        except (ValueError, IndexError) as e:
-            _LOGGER.warning("Failed to parse RX message: %s - %s", msg, e)
-            return
+            self._flush_scheduled = True
+        self.hass.loop.call_soon_threadsafe(self._async_schedule_flush)
+
+    @callback
+    def _async_schedule_flush(self) -> None:
+        """Publish the pending batch now, or after the collection window (runs in the HA event loop)."""
+        if self.batch_window_ms > 0:
+            self.hass.loop.call_later(self.batch_window_ms / 1000.0, self._async_flush_batch)
+        else:
+            self._async_flush_batch()
+
+    @callback
+    def _async_flush_batch(self) -> None:
+        """
+        Publish every collected update in one pass (runs in the HA event loop).
 
-        if len(b) < 6:
+        Each changed entity is notified once per batch (latest state wins); the frontend
+        still gets one teletask_state_updated bus event per reported state.
+        """
+        with self._batch_lock:
+            batch, self._batch = self._batch, []
+            self._flush_scheduled = False
+        if not batch:
             return
 
-        cmd = b[2]
-        func = b[3]
-        num = b[4]
-        st = b[5]
-
-        # EVENT = CMD 8
-        if cmd == 8:
-            if func == FUNC_RELAY:
-                self.relay_state[num] = (st == 255)
-
-            elif func == FUNC_DIMMER:
-                self.dimmer_state[num] = st
-
-            elif func == FUNC_FLAG:
-                self.flag_state[num] = (st == 255)
-
-            elif func == FUNC_SENSOR:
-                # Sensor values are typically raw ADC or scaled values
-                self.sensor_state[num] = float(st)
-
-            # Schedule HA entity updates (thread-safe)
-            # _log_to_ha is called from MicrosRS232 receive thread, so we must use call_soon_threadsafe
-            self.hass.loop.call_soon_threadsafe(
-                self.hass.bus.async_fire,
-                "teletask_state_updated",
-                {
-                    "func": func,
-                    "num": num,
-                    "state": st
-                }
-            )
+        stats = self.batch_stats
+        stats["batches"] += 1
+        stats["updates"] += len(batch)
+        stats["max_batch"] = max(stats["max_batch"], len(batch))
+
+        for func, num in dict.fromkeys((func, num) for func, num, _ in batch):
+            async_dispatcher_send(self.hass, state_signal(func, num))
+
+        for func, num, st in batch:
+            self.hass.bus.async_fire(EVENT_STATE_UPDATED, {"func": func, "num": num, "state": st})
+
+    def get_duplicate_stats(self) -> Dict[str, Any]:
+        """Return duplicate suppression counters (total and per function type)."""
+        per_func = dict(self.duplicates_suppressed)
+        return {"suppressed": sum(per_func.values()), "per_function": per_func}
+
+    def get_batch_stats(self) -> Dict[str, float]:
+        """Return thread → loop handoff counters (batches, updates, max and average batch size)."""
+        stats: Dict[str, float] = dict(self.batch_stats)
+        stats["avg_batch"] = round(stats["updates"] / stats["batches"], 2) if stats["batches"] else 0.0
+        return stats
 
     # ----------------------------------------------------------------------------------------------
     # Lifecycle
     # ----------------------------------------------------------------------------------------------
 
     def start(self) -> None:
-        """Start RX-thread driver and mark hub as running."""
+        """
+        Start RX-thread driver and mark hub as running.
+
+        The initial state sync is not part of start(): async_setup_entry runs it in the
+        background (async_initial_sync) once the platforms are set up.
+        """
         self.running = True
         self.client.connect()
+        self.commands.start()
         _LOGGER.info("TeleTask hub started")
 
+    async def async_initial_sync(self) -> None:
+        """Run initial_sync() in the executor; entities are updated as the states come in."""
+        try:
+            await self.hass.async_add_executor_job(self.initial_sync)
+        except Exception:
+            _LOGGER.exception("TeleTask initial sync failed")
+
+    def initial_sync(self) -> Dict[str, Any]:
+        """
+        Read the current state of every configured relay, dimmer, flag and sensor.
+
+        Uses the driver's pipelined bulk read (bus budget from the "sync" section of
+        config.json) and applies each reply as if it were an EVENT. Runs while the entities
+        are live, so an EVENT that arrived after a device's GET reply wins: the driver's
+        latest reported state is applied, not the GET result itself.
+
+        Returns:
+            Summary dict: devices, synced, missing, seconds.
+        """
+        devices: List[Tuple[int, int]] = (
+            [(FUNC_RELAY, d.num) for d in self.get_configured_relays()]
+            + [(FUNC_DIMMER, d.num) for d in self.get_configured_dimmers()]
+            + [(FUNC_FLAG, d.num) for d in self.get_configured_flags()]
+            + [(FUNC_SENSOR, s.num) for s in self.get_configured_sensors()]
+        )
+
+        t0 = time.monotonic()
+        results = self.client.read_states(devices)
+        now = time.time()
+        synced = 0
+        for (func, num), st in results.items():
+            if st is None or not self.running:
+                continue
+            synced += 1
+            latest = self.client.states.get(func, num)
+            st = st if latest is None else latest
+            self._on_state_event(StateEvent(timestamp=now, func=func, num=num, state=st, raw=b""))
+        elapsed = time.monotonic() - t0
+
+        self.last_sync = {
+            "devices": len(devices),
+            "synced": synced,
+            "missing": len(devices) - synced,
+            "seconds": round(elapsed, 3),
+        }
+        _LOGGER.info(
+            "Initial sync: %d/%d devices in %.2f s",
+            synced, len(devices), elapsed
+        )
+        return self.last_sync
+
     def stop(self) -> None:
         """Stop the driver and mark hub as not running."""
         self.running = False
+        self.commands.stop()
         self.client.disconnect()
         _LOGGER.info("TeleTask hub stopped")
 
@@ -207,7 +357,7 @@ class TeletaskHub:
 
     def get_relay_state(self, num: int) -> bool:
         """Get the current state of a relay."""
-        return self.relay_state.get(num, False)
+        return self.state.get(FUNC_RELAY, num) == 255
 
     def set_relay_state(self, num: int, value: bool) -> None:
         """Set a relay state."""
@@ -215,7 +365,7 @@ class TeletaskHub:
 
     def get_dimmer_value(self, num: int) -> int:
         """Get the current value of a dimmer (0-255)."""
-        return self.dimmer_state.get(num, 0)
+        return self.state.get(FUNC_DIMMER, num) or 0
 
     def set_dimmer_value(self, num: int, val: int) -> None:
         """Set a dimmer value (0-255)."""
@@ -223,19 +373,202 @@ class TeletaskHub:
 
     def get_flag(self, num: int) -> bool:
         """Get the current state of a flag."""
-        return self.flag_state.get(num, False)
+        return self.state.get(FUNC_FLAG, num) == 255
 
     def set_flag(self, num: int, value: bool) -> None:
         """Set a flag state."""
         self.client.set_flag(num, "ON" if value else "OFF")
 
+    # ----------------------------------------------------------------------------------------------
+    # Awaitable commands (run by the hub's command worker; call from the event loop)
+    # ----------------------------------------------------------------------------------------------
+
+    async def async_set_relay_state(self, num: int, value: bool) -> None:
+        """Set a relay state and wait for the confirmation (optimistic mode: publish and return)."""
+        await self._async_set(FUNC_RELAY, num, STATE_ON if value else STATE_OFF)
+
+    async def async_set_dimmer_value(self, num: int, val: int) -> None:
+        """Set a dimmer value (0-255); a newer value for the same dimmer supersedes this one."""
+        await self._async_set(FUNC_DIMMER, num, max(0, min(255, int(val))), coalesce=True)
+
+    async def async_set_flag(self, num: int, value: bool) -> None:
+        """Set a flag state and wait for the confirmation (optimistic mode: publish and return)."""
+        await self._async_set(FUNC_FLAG, num, STATE_ON if value else STATE_OFF)
+
+    async def _async_set(self, func: int, num: int, state: int, coalesce: Optional[bool] = None) -> None:
+        """
+        Queue a SET on the command worker.
+
+        Normally waits for the confirmation. In optimistic mode the target state is published
+        to the store and the entity right away and the confirmation is handled by
+        _async_reconcile() in the background.
+
+        Raises:
+            CommandQueueFull: If the command worker queue is full (optimistic state is undone).
+        """
+        if not self.optimistic:
+            await self.commands.submit(self.client.submit_set, func, num, state, coalesce)
+            return
+
+        key = (func, num)
+        previous = self.state.get(func, num)
+        self._optimistic_seq += 1
+        token = self._optimistic_seq
+        self._optimistic[key] = token
+        self.optimistic_stats["applied"] += 1
+        self._async_publish(func, num, state)
+
+        try:
+            future = self.commands.submit(self.client.submit_set, func, num, state, coalesce)
+        except CommandQueueFull:
+            if self._optimistic.get(key) == token:
+                del self._optimistic[key]
+                if previous is not None:
+                    self._async_publish(func, num, previous)
+            raise
+        future.add_done_callback(partial(self._async_reconcile, func, num, state, previous, token))
+
+    @callback
+    def _async_publish(self, func: int, num: int, state: int) -> None:
+        """
+        Store a state set by the hub itself and notify the entity (runs in the HA event loop).
+
+        The bus event is fired here as well: the device's confirming EVENT carries the same
+        state and is suppressed as a duplicate, so it would never reach the frontend.
+        """
+        if self.state.update(func, num, state):
+            async_dispatcher_send(self.hass, state_signal(func, num))
+            self.hass.bus.async_fire(EVENT_STATE_UPDATED, {"func": func, "num": num, "state": state})
+
+    @callback
+    def _async_reconcile(
+        self, func: int, num: int, state: int, previous: Optional[int], token: int, future: "asyncio.Future"
+    ) -> None:
+        """
+        Settle an optimistic command once its confirmation finished (runs in the HA event loop).
+
+        On failure the bus event EVENT_COMMAND_FAILED is fired. If no newer command for the
+        device is pending and nothing reported another state in the meantime, the previous
+        state is restored; the device is then read back to get its actual state.
+        """
+        key = (func, num)
+        latest = self._optimistic.get(key) == token
+        if latest:
+            del self._optimistic[key]
+
+        error = "cancelled" if future.cancelled() else future.exception()
+        if error is None:
+            self.optimistic_stats["confirmed"] += 1
+            return
+
+        self.optimistic_stats["failed"] += 1
+        _LOGGER.warning("TeleTask func=%d num=%d: state %d not confirmed (%s)", func, num, state, error)
+        self.hass.bus.async_fire(
+            EVENT_COMMAND_FAILED,
+            {"func": func, "num": num, "state": state, "previous": previous, "error": str(error)}
+        )
+        if not latest:
+            return  # A newer command now decides the state
+
+        if previous is not None and self.state.get(func, num) == state:
+            self.optimistic_stats["rolled_back"] += 1
+            self._async_publish(func, num, previous)
+        self.hass.async_create_task(self._async_read_back(func, num))
+
+    async def _async_read_back(self, func: int, num: int) -> None:
+        """
+        Read one device from the bus and apply the reply as if it were an EVENT.
+
+        The GET is queued directly on the TX scheduler and its handle awaited in the loop,
+        so the command worker stays free for entity commands while the reply is pending.
+        """
+        try:
+            handle = self.client.submit_get(func, num, priority=PRIORITY_CONFIRMATION)
+        except RuntimeError as e:
+            _LOGGER.debug("TeleTask read-back of func=%d num=%d failed: %s", func, num, e)
+            return
+        await async_wait_handle(handle)
+        if handle.ok and handle.result is not None:
+            self._on_state_event(
+                StateEvent(timestamp=time.time(), func=func, num=num, state=handle.result, raw=b"")
+            )
+        else:
+            _LOGGER.debug("TeleTask read-back of func=%d num=%d: no reply (%s)", func, num, handle.status)
+
+    async def async_set_mood(self, num: int, state: str = "ON", mood_type: str = "LOCAL") -> None:
+        """Trigger a mood ('ON', 'OFF' or 'TOGGLE'); the worker is free once the frame is queued."""
+        await self.commands.submit(self.client.submit_mood, num, state, mood_type)
+
+    async def async_trigger_mood(self, num: int, mood_type: str = "LOCAL") -> None:
+        """Trigger a mood (set to ON)."""
+        await self.async_set_mood(num, "ON", mood_type)
+
+    async def async_set_many(self, targets: List[Any], rounds: int = DEFAULT_ROUNDS) -> Dict[str, Any]:
+        """
+        Apply a scene: all targets go out as one pipelined burst, are confirmed together and
+        only the failures are re-sent (up to `rounds` sends per target).
+
+        Args:
+            targets: (function, number, state) tuples or dicts (see batch.normalize_targets).
+            rounds: Maximum sends per target.
+
+        Returns:
+            Summary dict: elapsed_ms, rounds, total, confirmed, failed, results (per device).
+
+        Raises:
+            ValueError: If a target is malformed.
+        """
+        run = BatchRun(normalize_targets(targets), rounds)
+        t0 = time.monotonic()
+        while True:
+            todo = run.next_round()
+            if not todo:
+                break
+            # Queuing is quick; the worker is not held while the burst is confirmed
+            handles = await self.commands.submit(self.client.submit_many, todo)
+            for target, handle in zip(todo, handles):
+                run.record(target, handle)
+            await asyncio.gather(*(async_wait_handle(h) for h in handles))
+
+        summary = run.summary(time.monotonic() - t0)
+        _LOGGER.info(
+            "set_many: %d/%d confirmed in %.1f ms (%d rounds)",
+            summary["confirmed"], summary["total"], summary["elapsed_ms"], summary["rounds"]
+        )
+        return summary
+
+    def get_optimistic_stats(self) -> Dict[str, Any]:
+        """Return optimistic mode counters (applied, confirmed, failed, rolled_back, pending)."""
+        stats: Dict[str, Any] = dict(self.optimistic_stats)
+        stats["enabled"] = self.optimistic
+        stats["pending"] = len(self._optimistic)
+        return stats
+
+    def get_command_stats(self) -> Dict[str, int]:
+        """Return command worker counters (pending, high_water, timed_out, rejected, ...)."""
+        return self.commands.stats()
+
     def get_input_state(self, num: int) -> bool:
         """Get the current state of an input (read-only binary sensor)."""
-        return self.input_state.get(num, False)
+        return self.state.get(FUNC_INPUT, num) == 255
 
     def get_sensor_value(self, num: int) -> Optional[float]:
         """Get the current value of an analog sensor."""
-        return self.sensor_state.get(num)
+        # Sensor values are typically raw ADC or scaled values
+        st = self.state.get(FUNC_SENSOR, num)
+        return None if st is None else float(st)
+
+    def get_changes_since(self, version: int) -> Tuple[int, List[StateChange]]:
+        """
+        Get every device state that changed after `version` (frontend, diagnostics).
+
+        Args:
+            version: Version returned by the previous call (0 = everything known).
+
+        Returns:
+            (current version, list of StateChange).
+        """
+        return self.state.changes_since(version)
 
     def get_matter_enabled_devices(self) -> Dict[str, set]:
         """
@@ -0,0 +1,86 @@
+#################################################################################################
+# File:    conftest.py
+#
+# Description:
+#   Shared pytest fixtures. The driver runs against the in-process MICROS emulator
+#   (tools/micros_emulator.py), so no serial port or Home Assistant is needed.
+#################################################################################################
+
+import json
+import os
+import sys
+from typing import Any, Callable, Dict, List, Optional
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(ROOT, "custom_components", "teletask"))
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+
+from micros_emulator import EmulatedPort, MicrosEmulator  # noqa: E402
+from teletask.micros_rs232 import MicrosRS232  # noqa: E402
+
+
+class RecordingEmulator(MicrosEmulator):
+    """Emulator that keeps every frame it received from the host."""
+
+    def __init__(self, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.received: List[bytes] = []
+
+    def handle_frame(self, frame: bytes) -> List[bytes]:
+        self.received.append(bytes(frame))
+        return super().handle_frame(frame)
+
+    def received_cmd(self, cmd: int) -> List[bytes]:
+        """Return the received frames with the given CMD byte."""
+        return [frame for frame in list(self.received) if frame[2] == cmd]
+
+
+class EmulatedDriver(MicrosRS232):
+    """MicrosRS232 whose serial port is an in-process emulator."""
+
+    emulator: RecordingEmulator
+
+    def _open_serial(self):
+        return EmulatedPort(self.emulator, timeout=0.2)
+
+
+@pytest.fixture
+def make_driver(tmp_path) -> Callable[..., EmulatedDriver]:
+    """
+    Factory for started drivers on a fresh emulator; all of them are stopped after the test.
+
+    Args (of the factory):
+        extra: Config sections merged key by key into the default config.
+        start: Start the driver (default True).
+        **emulator: MicrosEmulator keyword arguments.
+    """
+    drivers: List[EmulatedDriver] = []
+
+    def factory(extra: Optional[Dict[str, Any]] = None, start: bool = True, **emulator: Any) -> EmulatedDriver:
+        cfg: Dict[str, Any] = {
+            "serial": {"port": "emulator://"},
+            "reliability": {"retries": 3, "confirm_timeout_ms": 300, "retry_delay_ms": 50, "post_send_gap_ms": 20},
+            "pipeline": {"min_frame_gap_ms": 5},
+        }
+        for name, section in (extra or {}).items():
+            cfg.setdefault(name, {}).update(section)
+        path = tmp_path / f"config{len(drivers)}.json"
+        path.write_text(json.dumps(cfg))
+
+        drv = EmulatedDriver(config_path=str(path))
+        emulator.setdefault("latency_ms", 5.0)
+        emulator.setdefault("baudrate", 0)
+        drv.emulator = RecordingEmulator(**emulator)
+        drv.emulator.start()
+        drivers.append(drv)
+        if start:
+            drv.start()
+        return drv
+
+    yield factory
+
+    for drv in drivers:
+        drv.stop()
+        drv.emulator.stop()
@@ -0,0 +1,136 @@
+"""AsyncMicrosRS232 against the emulator served over TCP (socket:// transport)."""
+
+import asyncio
+import json
+import sys
+
+import pytest
+
+from conftest import RecordingEmulator
+from micros_emulator import TcpLink
+from teletask.micros_async import AsyncMicrosRS232
+from teletask.protocol import CMD_GET, CMD_LOG, CMD_SET, FUNC_DIMMER, FUNC_RELAY, STATE_OFF, STATE_ON
+
+
+@pytest.fixture
+def emulator():
+    emulator = RecordingEmulator(latency_ms=5.0, baudrate=0)
+    link = TcpLink(emulator, port=0)
+    emulator.start()
+    link.start()
+    emulator.url = link.url
+    yield emulator
+    link.close()
+    emulator.stop()
+
+
+@pytest.fixture
+def config_path(tmp_path, emulator):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({
+        "serial": {"port": emulator.url},
+        "reliability": {"retries": 2, "confirm_timeout_ms": 300, "retry_delay_ms": 20, "post_send_gap_ms": 5},
+    }))
+    return str(path)
+
+
+def run(config_path, scenario):
+    """Connect a driver, run scenario(driver) and disconnect again."""
+
+    async def main():
+        drv = AsyncMicrosRS232(config_path)
+        await drv.async_connect()
+        try:
+            return await scenario(drv)
+        finally:
+            await drv.async_disconnect()
+
+    return asyncio.run(main())
+
+
+def test_connect_enables_event_reporting(config_path, emulator):
+    async def scenario(drv):
+        assert drv.connected
+        await asyncio.sleep(0.05)
+
+    run(config_path, scenario)
+    assert len(emulator.received_cmd(CMD_LOG)) == 9
+
+
+def test_set_relay_and_dimmer_are_confirmed(config_path, emulator):
+    async def scenario(drv):
+        await drv.async_set_relay(4, "ON")
+        await drv.async_set_dimmer(2, 128)
+        return await drv.async_get_state(FUNC_RELAY, 4), await drv.async_get_state(FUNC_DIMMER, 2)
+
+    assert run(config_path, scenario) == (STATE_ON, 128)
+    assert emulator.state[(FUNC_RELAY, 4)] == STATE_ON
+    assert len(emulator.received_cmd(CMD_SET)) == 2
+
+
+def test_toggle_reads_the_state_first(config_path, emulator):
+    emulator.state[(FUNC_RELAY, 6)] = STATE_ON
+
+    async def scenario(drv):
+        await drv.async_set_relay(6, "TOGGLE")
+
+    run(config_path, scenario)
+    assert emulator.state[(FUNC_RELAY, 6)] == STATE_OFF
+    assert len(emulator.received_cmd(CMD_GET)) >= 1
+
+
+def test_concurrent_sets_all_confirm(config_path, emulator):
+    async def scenario(drv):
+        await asyncio.gather(*(drv.async_set_relay(num, "ON") for num in range(1, 11)))
+
+    run(config_path, scenario)
+    assert all(emulator.state[(FUNC_RELAY, num)] == STATE_ON for num in range(1, 11))
+
+
+def test_get_state_times_out_without_reply(config_path, emulator):
+    emulator.handle_frame = lambda frame: []  # A MICROS that stays silent
+
+    async def scenario(drv):
+        return await drv.async_get_state(FUNC_RELAY, 1, timeout_ms=50)
+
+    assert run(config_path, scenario) is None
+
+
+def test_listener_gets_spontaneous_events(config_path, emulator):
+    async def scenario(drv):
+        events = []
+        drv.add_listener(events.append)
+        await asyncio.sleep(0.05)
+        emulator.inject_event(FUNC_RELAY, 9, STATE_ON)
+        for _ in range(50):
+            if events:
+                break
+            await asyncio.sleep(0.01)
+        return events
+
+    events = run(config_path, scenario)
+    assert [(e.func, e.num, e.state) for e in events] == [(FUNC_RELAY, 9, STATE_ON)]
+
+
+def test_pending_wait_fails_with_connection_error(config_path, emulator):
+    emulator.handle_frame = lambda frame: []
+
+    async def scenario(drv):
+        pending = asyncio.ensure_future(drv.async_get_state(FUNC_RELAY, 1, timeout_ms=5000))
+        await asyncio.sleep(0.05)
+        await drv.async_disconnect()
+        with pytest.raises(ConnectionError):
+            await pending
+        with pytest.raises(ConnectionError):
+            await drv.async_get_state(FUNC_RELAY, 1)
+
+    run(config_path, scenario)
+
+
+def test_serial_port_needs_pyserial_asyncio_fast(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, "serial_asyncio_fast", None)
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"serial": {"port": "/dev/ttyUSB0"}, "reliability": {}}))
+
+    with pytest.raises(RuntimeError, match="pyserial-asyncio-fast"):
+        asyncio.run(AsyncMicrosRS232(str(path)).async_connect())
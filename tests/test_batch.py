@@ -0,0 +1,91 @@
+"""Scene / batch bookkeeping: target validation and re-send rounds (batch.py)."""
+
+import pytest
+
+from teletask.batch import BatchRun, normalize_targets
+from teletask.protocol import FUNC_DIMMER, FUNC_FLAG, FUNC_RELAY, STATE_OFF, STATE_ON
+from teletask.scheduler import STATUS_CONFIRMED, STATUS_FAILED, STATUS_SUPERSEDED, CommandHandle
+
+
+def test_tuples_dicts_and_names():
+    targets = normalize_targets([
+        (FUNC_RELAY, 1, STATE_ON),
+        {"function": "dimmer", "number": 2, "state": 128},
+        {"func": "Flag", "num": "3", "state": "off"},
+        ("relay", 4, "ON"),
+    ])
+
+    assert targets == [
+        (FUNC_RELAY, 1, STATE_ON), (FUNC_DIMMER, 2, 128), (FUNC_FLAG, 3, STATE_OFF), (FUNC_RELAY, 4, STATE_ON),
+    ]
+
+
+@pytest.mark.parametrize("target, message", [
+    (("lamp", 1, "ON"), "unknown function"),
+    ((FUNC_RELAY, 256, "ON"), "out of range"),
+    ((FUNC_RELAY, -1, "ON"), "out of range"),
+    ((FUNC_RELAY, 1, "DIM"), "invalid target"),
+    ({"function": "relay", "state": "ON"}, "invalid target"),
+    ((FUNC_RELAY, 1), "must be"),
+    (42, "must be"),
+])
+def test_rejects_malformed_targets(target, message):
+    with pytest.raises(ValueError, match=message):
+        normalize_targets([target])
+
+
+def test_state_clamped_to_byte_range():
+    assert normalize_targets([(FUNC_DIMMER, 1, 300), (FUNC_DIMMER, 2, -5)]) == [
+        (FUNC_DIMMER, 1, 255), (FUNC_DIMMER, 2, 0),
+    ]
+
+
+def test_duplicate_device_keeps_last_state_and_position():
+    targets = normalize_targets([(FUNC_RELAY, 1, STATE_ON), (FUNC_RELAY, 2, STATE_ON), ("relay", 1, "OFF")])
+
+    assert targets == [(FUNC_RELAY, 2, STATE_ON), (FUNC_RELAY, 1, STATE_OFF)]
+
+
+def send_round(run, outcomes):
+    """Record one round; outcomes maps target → final handle status."""
+    todo = run.next_round()
+    for target in todo:
+        handle = CommandHandle(*target)
+        handle.attempts = 3
+        run.record(target, handle)
+        handle._finish(outcomes.get(target, STATUS_CONFIRMED), via="EVENT", error="no reply")
+    return todo
+
+
+def test_failures_resent_until_rounds_run_out():
+    a, b, c = (FUNC_RELAY, 1, STATE_ON), (FUNC_RELAY, 2, STATE_ON), (FUNC_DIMMER, 3, 90)
+    run = BatchRun([a, b, c], rounds=2)
+
+    assert send_round(run, {b: STATUS_FAILED, c: STATUS_SUPERSEDED}) == [a, b, c]
+    assert send_round(run, {b: STATUS_FAILED}) == [b]  # Superseded counts as done
+    assert run.next_round() == []  # Two sends per target at most
+
+    summary = run.summary(0.25)
+    assert (summary["elapsed_ms"], summary["rounds"], summary["total"]) == (250.0, 2, 3)
+    assert (summary["confirmed"], summary["failed"]) == (2, 1)
+    by_num = {r["number"]: r for r in summary["results"]}
+    assert by_num[1]["ok"] and by_num[1]["sends"] == 1 and by_num[1]["error"] is None
+    assert not by_num[2]["ok"] and by_num[2]["sends"] == 2 and by_num[2]["status"] == STATUS_FAILED
+    assert by_num[2]["error"] == "no reply"
+    assert by_num[3]["ok"] and by_num[3]["status"] == STATUS_SUPERSEDED
+
+
+def test_run_stops_early_when_all_confirmed():
+    run = BatchRun([(FUNC_RELAY, 1, STATE_ON)], rounds=3)
+    send_round(run, {})
+
+    assert run.next_round() == []
+    assert run.summary(0.0)["rounds"] == 1
+
+
+def test_unsent_target_reported_pending():
+    run = BatchRun([(FUNC_RELAY, 1, STATE_ON)], rounds=0)  # At least one round anyway
+    assert run.rounds == 1
+
+    result = run.summary(0.0)["results"][0]
+    assert (result["ok"], result["status"], result["sends"], result["attempts"]) == (False, "pending", 0, 0)
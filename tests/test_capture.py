@@ -0,0 +1,62 @@
+"""Binary frame capture (teletask/capture.py) and its replay tool."""
+
+import os
+
+from replay_capture import capture_order, replay
+from teletask.capture import DIR_RX, DIR_TX, CaptureWriter, read_capture
+from teletask.framing import compose_frame
+from teletask.protocol import CMD_EVENT, CMD_SET, FUNC_RELAY
+
+
+def event(num: int, state: int = 255) -> bytes:
+    return compose_frame(CMD_EVENT, bytes([FUNC_RELAY, num, state]))
+
+
+def write_capture(path: str, frames, **kwargs) -> CaptureWriter:
+    writer = CaptureWriter(path, **kwargs)
+    writer.start()
+    for direction, frame in frames:
+        writer.record(direction, frame)
+    writer.stop()
+    return writer
+
+
+def test_records_round_trip(tmp_path):
+    path = str(tmp_path / "capture.ttcap")
+    frames = [(DIR_TX, compose_frame(CMD_SET, bytes([FUNC_RELAY, 1, 255]))), (DIR_RX, event(1))]
+    write_capture(path, frames)
+
+    records = list(read_capture(path))
+    assert [(r.direction, r.frame) for r in records] == frames
+    assert records[0].offset_s <= records[1].offset_s
+
+
+def test_start_keeps_previous_capture(tmp_path):
+    path = str(tmp_path / "capture.ttcap")
+    write_capture(path, [(DIR_RX, event(1))])
+    write_capture(path, [(DIR_RX, event(2))])
+
+    assert [r.frame for r in read_capture(path + ".1")] == [event(1)]
+    assert [r.frame for r in read_capture(path)] == [event(2)]
+
+
+def test_size_rotation_keeps_backups(tmp_path):
+    path = str(tmp_path / "capture.ttcap")
+    writer = write_capture(path, [(DIR_RX, event(n % 64 + 1)) for n in range(200)], max_bytes=400, backups=2)
+
+    assert writer.rotations > 2
+    assert os.path.exists(path + ".2")
+    assert not os.path.exists(path + ".3")
+
+
+def test_replay_oldest_first_and_waits_for_delivery(tmp_path):
+    path = str(tmp_path / "capture.ttcap")
+    write_capture(path, [(DIR_RX, event(n)) for n in range(1, 21)])
+    write_capture(path, [(DIR_RX, event(n, 0)) for n in range(1, 21)])
+
+    assert capture_order([path, path + ".1"]) == [path + ".1", path]
+    summary = replay([path, path + ".1"], speed=0)
+
+    assert summary["rx_frames"] == 40
+    assert summary["events_delivered"] == summary["event_stream"]["delivered"]
+    assert summary["events_delivered"] + summary["event_stream"]["coalesced"] == 40
@@ -0,0 +1,97 @@
+"""CommandWorker: asyncio Futures for blocking commands and pipelined CommandHandles."""
+
+import asyncio
+import threading
+
+import pytest
+
+from teletask.command_worker import CommandQueueFull, CommandWorker
+from teletask.scheduler import STATUS_CONFIRMED, STATUS_FAILED, CommandHandle
+
+
+@pytest.fixture
+def worker():
+    worker = CommandWorker(max_depth=2, timeout_s=2.0)
+    worker.start()
+    yield worker
+    worker.stop()
+
+
+def test_depth_counts_commands_awaiting_their_handle(worker):
+    handles = [CommandHandle(1, num, 255) for num in (1, 2)]
+
+    async def scenario():
+        futures = [worker.submit(lambda h=h: h) for h in handles]
+        await asyncio.sleep(0.05)  # Both ran; the worker queue is empty again
+        assert worker.stats()["pending"] == 0
+        with pytest.raises(CommandQueueFull):
+            worker.submit(lambda: None)
+
+        handles[0]._finish(STATUS_CONFIRMED)
+        assert await futures[0] is True
+        third = worker.submit(lambda: "ok")  # A slot is free again
+        assert await third == "ok"
+
+        handles[1]._finish(STATUS_FAILED)
+        with pytest.raises(RuntimeError):
+            await futures[1]
+
+    asyncio.run(scenario())
+    stats = worker.stats()
+    assert stats["outstanding"] == 0
+    assert stats["rejected"] == 1
+    assert stats["completed"] == 2
+    assert stats["failed"] == 1
+
+
+def test_timed_out_command_stays_outstanding_until_done(worker):
+    handle = CommandHandle(1, 1, 255)
+
+    async def scenario():
+        future = worker.submit(lambda: handle, timeout=0.05)
+        with pytest.raises(TimeoutError):
+            await future
+        assert worker.stats()["outstanding"] == 1
+        handle._finish(STATUS_CONFIRMED)
+        await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    assert worker.stats()["outstanding"] == 0
+    assert worker.stats()["timed_out"] == 1
+
+
+def test_counters_consistent_under_load():
+    worker = CommandWorker(max_depth=1000, timeout_s=5.0)
+    worker.start()
+    handles = []
+    lock = threading.Lock()
+
+    def make_handle(num):
+        handle = CommandHandle(1, num, 255)
+        with lock:
+            handles.append(handle)
+        return handle
+
+    def finisher(stop):
+        while not stop.is_set() or handles:
+            with lock:
+                batch, handles[:] = list(handles), []
+            for handle in batch:
+                handle._finish(STATUS_CONFIRMED)
+
+    async def scenario():
+        stop = threading.Event()
+        thread = threading.Thread(target=finisher, args=(stop,))
+        thread.start()
+        futures = [worker.submit(make_handle if i % 2 else (lambda n: n), i) for i in range(500)]
+        await asyncio.gather(*futures)
+        stop.set()
+        thread.join()
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        worker.stop()
+    stats = worker.stats()
+    assert stats["completed"] == 500
+    assert stats["outstanding"] == 0
@@ -0,0 +1,82 @@
+"""MicrosRS232 against the emulator: TX path options and lossy links."""
+
+import time
+
+from teletask.framing import compose_frame
+from teletask.protocol import CMD_EVENT, CMD_SET, FUNC_LOCMOOD, FUNC_RELAY, STATE_OFF, STATE_ON
+
+
+def count_flushes(drv):
+    calls = []
+    reset = drv.ser.reset_input_buffer
+
+    def counting_reset():
+        calls.append(1)
+        reset()
+
+    drv.ser.reset_input_buffer = counting_reset
+    return calls
+
+
+def test_pre_send_flush_runs_on_idle_bus(make_driver):
+    drv = make_driver({"reliability": {"pre_send_flush": True}})
+    flushes = count_flushes(drv)
+
+    for num in (1, 2, 3):
+        assert drv.submit_set(FUNC_RELAY, num, STATE_ON).wait(2.0)
+
+    assert len(flushes) == 3
+
+
+def test_pre_send_flush_skipped_while_replies_pending(make_driver):
+    drv = make_driver({"reliability": {"pre_send_flush": True}}, latency_ms=50.0)
+    flushes = count_flushes(drv)
+
+    handles = [drv.submit_set(FUNC_RELAY, num, STATE_ON) for num in range(1, 5)]
+    assert all(handle.wait(2.0) for handle in handles)
+
+    assert len(flushes) == 1  # Only the first SET went out with nothing in flight
+
+
+def test_pre_send_flush_off(make_driver):
+    drv = make_driver({"reliability": {"pre_send_flush": False}})
+    flushes = count_flushes(drv)
+
+    assert drv.submit_set(FUNC_RELAY, 1, STATE_ON).wait(2.0)
+    assert not flushes
+
+
+def test_sets_confirmed_on_lossy_link(make_driver):
+    faults = {"enabled": True, "seed": 3, "corrupt_checksum": 0.2, "partial_frame": 0.1, "duplicate_event": 0.2}
+    drv = make_driver({"faults": faults})
+
+    handles = [drv.submit_set(FUNC_RELAY, num, STATE_ON if num % 2 else STATE_OFF) for num in range(1, 21)]
+
+    assert all(handle.wait(10.0) for handle in handles)
+    assert any(handle.attempts > 1 or handle.confirmed_via == "GET" for handle in handles)
+    assert sum(drv.ser.stats()["injected"].values()) > 0
+
+
+def test_idle_resync_delivers_frame_behind_noise(make_driver):
+    drv = make_driver()
+    events = []
+    drv.add_listener(events.append)
+
+    drv.ser._deliver(b"\x02\x10" + compose_frame(CMD_EVENT, bytes([FUNC_RELAY, 12, STATE_ON])))
+
+    deadline = time.monotonic() + 2.0
+    while not events and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert [(e.func, e.num, e.state) for e in events] == [(FUNC_RELAY, 12, STATE_ON)]
+
+
+def test_submit_mood_does_not_wait_for_the_ack(make_driver):
+    drv = make_driver(latency_ms=500.0, send_ack=True)
+
+    t0 = time.monotonic()
+    handle = drv.submit_mood(3, "ON", "LOCAL")
+    assert handle.wait(2.0)
+
+    assert time.monotonic() - t0 < 0.3  # Done once written, long before the ACK
+    assert handle.confirmed_via == "TX"
+    assert drv.emulator.received_cmd(CMD_SET)[-1][3:6] == bytes([FUNC_LOCMOOD, 3, STATE_ON])
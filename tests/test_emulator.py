@@ -0,0 +1,16 @@
+"""Local MICROS emulator (tools/micros_emulator.py)."""
+
+import json
+
+from micros_emulator import driver_config
+from teletask.connection_config import load_connection_config
+
+
+def test_printed_config_is_loadable(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps(driver_config("socket://127.0.0.1:10001", 0)))
+
+    cfg = load_connection_config(str(path))
+
+    assert cfg.port == "socket://127.0.0.1:10001"
+    assert cfg.baudrate == 19200
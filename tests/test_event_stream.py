@@ -0,0 +1,91 @@
+"""EventStream: bounded hand-off under the coalesce and drop_oldest policies."""
+
+import threading
+
+import pytest
+
+from teletask.event_stream import POLICY_COALESCE, POLICY_DROP_OLDEST, EventStream
+from teletask.events import StateEvent
+from teletask.protocol import FUNC_DIMMER, FUNC_RELAY
+
+
+def event(num, state, func=FUNC_RELAY):
+    return StateEvent(timestamp=0.0, func=func, num=num, state=state, raw=b"")
+
+
+def drain(stream):
+    out = []
+    while True:
+        ev = stream.get(timeout=0)
+        if ev is None:
+            return out
+        out.append((ev.func, ev.num, ev.state))
+
+
+def test_coalesce_keeps_latest_state_at_first_position():
+    stream = EventStream(max_pending=8, policy=POLICY_COALESCE)
+    for ev in (event(1, 0), event(2, 0), event(1, 255), event(1, 128)):
+        stream.put(ev)
+
+    assert len(stream) == 2
+    assert drain(stream) == [(FUNC_RELAY, 1, 128), (FUNC_RELAY, 2, 0)]
+    stats = stream.stats()
+    assert (stats["received"], stats["coalesced"], stats["dropped"], stats["delivered"]) == (4, 2, 0, 2)
+
+
+def test_coalesce_keys_on_function_and_number():
+    stream = EventStream(policy=POLICY_COALESCE)
+    stream.put(event(1, 255))
+    stream.put(event(1, 40, func=FUNC_DIMMER))
+
+    assert drain(stream) == [(FUNC_RELAY, 1, 255), (FUNC_DIMMER, 1, 40)]
+    assert stream.coalesced == 0
+
+
+def test_coalesce_drops_oldest_device_when_full():
+    stream = EventStream(max_pending=3, policy=POLICY_COALESCE)
+    for num in range(1, 6):
+        stream.put(event(num, 255))
+
+    assert len(stream) == 3
+    assert [num for _, num, _ in drain(stream)] == [3, 4, 5]
+    assert stream.dropped == 2
+    assert stream.high_water == 3
+
+
+def test_drop_oldest_keeps_every_report_up_to_the_bound():
+    stream = EventStream(max_pending=3, policy=POLICY_DROP_OLDEST)
+    for state in (0, 255, 0, 255, 0):
+        stream.put(event(1, state))
+
+    assert drain(stream) == [(FUNC_RELAY, 1, 0), (FUNC_RELAY, 1, 255), (FUNC_RELAY, 1, 0)]
+    stats = stream.stats()
+    assert (stats["received"], stats["dropped"], stats["coalesced"], stats["high_water"]) == (5, 2, 0, 3)
+
+
+def test_clear_counts_pending_as_dropped():
+    stream = EventStream(policy=POLICY_DROP_OLDEST)
+    for num in range(1, 4):
+        stream.put(event(num, 255))
+    stream.clear()
+
+    assert len(stream) == 0
+    assert stream.dropped == 3
+
+
+def test_get_waits_for_put_and_returns_none_after_close():
+    stream = EventStream()
+    threading.Timer(0.05, stream.put, args=(event(7, 255),)).start()
+
+    assert stream.get(timeout=2.0).num == 7
+    stream.close()
+    assert stream.get() is None  # Closed and empty: no blocking
+    stream.reopen()
+    assert stream.get(timeout=0.01) is None
+
+
+def test_rejects_bad_arguments():
+    with pytest.raises(ValueError):
+        EventStream(policy="newest")
+    with pytest.raises(ValueError):
+        EventStream(max_pending=0)
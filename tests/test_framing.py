@@ -0,0 +1,111 @@
+"""FrameParser: resync rules, split reads, buffer compaction and overflow."""
+
+import pytest
+
+from teletask.framing import MAX_FRAME_LEN, FrameParser, compose_frame, parse_state
+from teletask.protocol import CMD_EVENT, FUNC_RELAY, STATE_ON
+
+
+def event(num, state=STATE_ON):
+    return compose_frame(CMD_EVENT, bytes([FUNC_RELAY, num, state]))
+
+
+def test_frame_split_across_reads():
+    parser = FrameParser()
+    frame = event(1)
+
+    for b in frame[:-1]:
+        parser.feed(bytes([b]))
+        assert list(parser.frames_available()) == []
+    parser.feed(frame[-1:])
+
+    assert list(parser.frames_available()) == [frame]
+    assert len(parser) == 0
+
+
+def test_burst_drains_in_one_pass():
+    parser = FrameParser()
+    frames = [event(num) for num in range(1, 11)]
+    parser.feed(b"".join(frames))
+
+    assert list(parser.frames_available()) == frames
+    assert parser.frames == 10
+
+
+def test_leading_garbage_discarded_quiet_bytes_not_counted():
+    parser = FrameParser()
+    parser.feed(b"\x0a\x0d\x55\x66" + event(1))
+
+    assert list(parser.frames_available()) == [event(1)]
+    assert parser.discarded == 2
+
+
+def test_bad_length_skips_only_the_stx():
+    parser = FrameParser()
+    parser.feed(b"\x02\x01" + event(1) + bytes([0x02, MAX_FRAME_LEN + 1]) + event(2))
+
+    assert list(parser.frames_available()) == [event(1), event(2)]
+    assert parser.bad_length == 2
+
+
+def test_bad_checksum_skips_only_the_stx():
+    parser = FrameParser()
+    corrupt = bytearray(event(1))
+    corrupt[-1] ^= 0xFF
+    parser.feed(bytes(corrupt) + event(2))
+
+    assert list(parser.frames_available()) == [event(2)]
+    assert parser.bad_checksum == 1
+
+
+def test_resync_delivers_frame_behind_noise_stx():
+    parser = FrameParser()
+    parser.feed(b"\x02\x10" + event(3))  # LEN 0x10 announces a frame that never completes
+
+    assert list(parser.frames_available()) == []
+    parser.resync()
+
+    assert list(parser.frames_available()) == [event(3)]
+    assert parser.discarded == 2  # The noise STX and its LEN
+    assert len(parser) == 0
+
+
+def test_resync_on_empty_buffer_is_a_noop():
+    parser = FrameParser()
+    parser.resync()
+
+    assert parser.discarded == 0
+
+
+def test_compaction_keeps_partial_tail():
+    parser = FrameParser(capacity=MAX_FRAME_LEN + 1)
+    frames = [event(num) for num in range(1, 11)]
+    stream = b"".join(frames)
+
+    parser.feed(stream[:60])  # Eight frames and four bytes of the ninth
+    assert list(parser.frames_available()) == frames[:8]
+    assert parser.feed(stream[60:]) == 0  # Only fits after moving the tail to the front
+
+    assert list(parser.frames_available()) == frames[8:]
+    assert parser.discarded == 0
+
+
+def test_overflow_keeps_newest_bytes():
+    parser = FrameParser(capacity=MAX_FRAME_LEN + 1)
+    frames = [event(num) for num in range(1, 11)]
+
+    dropped = parser.feed(b"".join(frames))  # 70 bytes into a 65-byte buffer
+
+    assert dropped == 5
+    assert list(parser.frames_available()) == frames[1:]
+    assert parser.discarded == 5 + 2  # Dropped bytes plus the rest of the cut-off frame
+
+
+def test_capacity_must_hold_a_frame():
+    with pytest.raises(ValueError):
+        FrameParser(capacity=MAX_FRAME_LEN)
+
+
+def test_parse_state():
+    assert parse_state(event(7, 128)) == (FUNC_RELAY, 7, 128)
+    assert parse_state(event(7)[:-1] + b"\x00") == (None, None, None)
@@ -0,0 +1,60 @@
+"""Level-aware driver logging (log_callback / log_enabled)."""
+
+import logging
+
+from teletask.protocol import FUNC_RELAY, STATE_ON
+
+
+def test_level_aware_callback_gets_warnings_only(make_driver):
+    lines = []
+    drv = make_driver(
+        {"reliability": {"retries": 1, "confirm_timeout_ms": 100}, "faults": {"enabled": True, "tx_drop_byte": 1.0}}
+    )
+    drv.log_callback = lambda msg, level: lines.append((level, msg))
+    drv.log_enabled = lambda level: level >= logging.WARNING
+
+    assert not drv.submit_set(FUNC_RELAY, 1, STATE_ON).wait(3.0)
+
+    assert (logging.WARNING, "[FAIL] SET not confirmed after retries") in lines
+    assert all(level >= logging.WARNING for level, _ in lines)
+
+
+def test_frames_rendered_only_at_debug(make_driver):
+    lines = []
+    drv = make_driver()
+    drv.log_callback = lambda msg, level: lines.append((level, msg))
+    drv.log_enabled = lambda level: level >= logging.INFO
+
+    assert drv.submit_set(FUNC_RELAY, 1, STATE_ON).wait(2.0)
+    assert not any(level == logging.DEBUG for level, _ in lines)
+
+    drv.log_enabled = lambda level: True
+    assert drv.submit_set(FUNC_RELAY, 2, STATE_ON).wait(2.0)
+    assert any(level == logging.DEBUG and "TX: 02 06 01 01 02 FF" in msg for level, msg in lines)
+
+
+def test_plain_callback_gets_every_message(make_driver):
+    lines = []
+    drv = make_driver()
+    drv.log_callback = lines.append
+
+    assert drv.submit_set(FUNC_RELAY, 1, STATE_ON).wait(2.0)
+    assert "[OK] Confirm via EVENT" in lines
+
+
+def test_warns_when_min_frame_gap_overrides_post_send_gap(make_driver):
+    lines = []
+    drv = make_driver({"pipeline": {"min_frame_gap_ms": 50}}, start=False)
+    drv.log_callback = lines.append
+    drv.start()
+
+    assert any(line.startswith("[WARN] pipeline.min_frame_gap_ms (50) exceeds") for line in lines)
+
+
+def test_no_gap_warning_by_default(make_driver):
+    lines = []
+    drv = make_driver(start=False)
+    drv.log_callback = lines.append
+    drv.start()
+
+    assert not any("min_frame_gap_ms" in line for line in lines)
@@ -0,0 +1,42 @@
+"""State reads (MicrosRS232.read_states, submit_get)."""
+
+import time
+
+from teletask.protocol import FUNC_RELAY, STATE_ON
+
+
+def test_reads_every_device(make_driver):
+    drv = make_driver()
+    for num in (1, 3):
+        drv.emulator.state[(FUNC_RELAY, num)] = STATE_ON
+
+    states = drv.read_states([(FUNC_RELAY, num) for num in range(1, 5)], budget_s=2.0)
+
+    assert states == {(FUNC_RELAY, 1): STATE_ON, (FUNC_RELAY, 2): 0, (FUNC_RELAY, 3): STATE_ON, (FUNC_RELAY, 4): 0}
+
+
+def test_budget_cancels_pending_gets(make_driver):
+    drv = make_driver({"sync": {"max_in_flight": 4}}, latency_ms=1000.0)
+
+    t0 = time.monotonic()
+    states = drv.read_states([(FUNC_RELAY, num) for num in range(1, 21)], budget_s=0.2)
+
+    assert time.monotonic() - t0 < 0.5
+    assert set(states.values()) == {None}
+    stats = drv.scheduler_stats()
+    assert stats["queued"] == 0
+    assert stats["active"] == 0
+
+    # The bus is free again for user commands
+    assert drv.submit_set(FUNC_RELAY, 30, STATE_ON).wait(3.0)
+
+
+def test_submit_get_returns_handle_with_state(make_driver):
+    drv = make_driver(latency_ms=50.0)
+    drv.emulator.state[(FUNC_RELAY, 7)] = STATE_ON
+
+    handle = drv.submit_get(FUNC_RELAY, 7)
+
+    assert not handle.done  # Queued; the caller is not blocked for the reply
+    assert handle.wait(2.0)
+    assert handle.result == STATE_ON
@@ -0,0 +1,279 @@
+"""TxScheduler state machine, driven by a fake bus (no emulator, replies resolved by hand)."""
+
+import threading
+import time
+from typing import List
+
+import pytest
+
+from teletask.framing import compose_frame
+from teletask.protocol import CMD_EVENT, CMD_GET, CMD_LOG, CMD_SET, FUNC_RELAY, STATE_OFF, STATE_ON
+from teletask.scheduler import (
+    PRIORITY_BACKGROUND,
+    STATUS_CANCELLED,
+    STATUS_FAILED,
+    STATUS_SUPERSEDED,
+    TxScheduler,
+)
+from teletask.timing import AdaptiveTiming
+from teletask.waiters import WaiterRegistry
+
+
+class FakeBus:
+    """Records written frames; the test answers them through the waiter registry."""
+
+    def __init__(self) -> None:
+        self.frames: List[bytes] = []
+        self.times: List[float] = []
+        self._cond = threading.Condition()
+
+    def write(self, frame: bytes) -> None:
+        with self._cond:
+            self.frames.append(bytes(frame))
+            self.times.append(time.monotonic())
+            self._cond.notify_all()
+
+    def wait_frames(self, count: int, timeout: float = 1.0) -> List[bytes]:
+        with self._cond:
+            self._cond.wait_for(lambda: len(self.frames) >= count, timeout)
+            return list(self.frames)
+
+    def sent(self, cmd: int) -> List[bytes]:
+        with self._cond:
+            return [frame for frame in self.frames if frame[2] == cmd]
+
+
+@pytest.fixture
+def bus():
+    return FakeBus()
+
+
+@pytest.fixture
+def waiters():
+    return WaiterRegistry()
+
+
+@pytest.fixture
+def make_scheduler(bus, waiters):
+    schedulers: List[TxScheduler] = []
+
+    def factory(**kwargs) -> TxScheduler:
+        kwargs.setdefault("min_frame_gap_ms", 0)
+        kwargs.setdefault("confirm_timeout_ms", 200)
+        kwargs.setdefault("retry_delay_ms", 10)
+        scheduler = TxScheduler(bus.write, waiters, **kwargs)
+        scheduler.start()
+        schedulers.append(scheduler)
+        return scheduler
+
+    yield factory
+
+    for scheduler in schedulers:
+        scheduler.stop()
+
+
+def test_background_gets_leave_a_slot_for_interactive(bus, make_scheduler):
+    scheduler = make_scheduler(max_in_flight=4, confirm_timeout_ms=5000)
+    gets = [scheduler.submit_get(FUNC_RELAY, num, priority=PRIORITY_BACKGROUND) for num in range(1, 11)]
+    bus.wait_frames(3)
+    time.sleep(0.05)
+    assert len(bus.sent(CMD_GET)) == 3  # max_in_flight - 1
+
+    scheduler.submit_set(FUNC_RELAY, 20, STATE_ON)
+    frames = bus.wait_frames(4)
+    assert frames[3] == compose_frame(CMD_SET, bytes([FUNC_RELAY, 20, STATE_ON]))
+    assert not any(handle.done for handle in gets)
+
+
+def test_single_slot_still_serves_background(bus, make_scheduler, waiters):
+    scheduler = make_scheduler(max_in_flight=1)
+    handle = scheduler.submit_get(FUNC_RELAY, 1, priority=PRIORITY_BACKGROUND)
+    bus.wait_frames(1)
+    waiters.resolve(CMD_GET, FUNC_RELAY, 1, STATE_OFF)
+
+    assert handle.wait(1.0)
+    assert handle.result == STATE_OFF
+
+
+def test_plain_frames_do_not_use_slots(bus, make_scheduler):
+    scheduler = make_scheduler(max_in_flight=1, confirm_timeout_ms=5000)
+    scheduler.submit_set(FUNC_RELAY, 1, STATE_ON)
+    log = scheduler.submit_frame(compose_frame(CMD_LOG, bytes([FUNC_RELAY, 1])))
+
+    assert log.wait(1.0)
+    assert bus.sent(CMD_LOG)
+    assert scheduler.stats()["active"] == 1
+
+
+def test_set_confirmed_by_event(bus, make_scheduler, waiters):
+    scheduler = make_scheduler()
+    handle = scheduler.submit_set(FUNC_RELAY, 1, STATE_ON)
+    bus.wait_frames(1)
+    waiters.resolve(CMD_EVENT, FUNC_RELAY, 1, STATE_ON)
+
+    assert handle.wait(1.0)
+    assert handle.confirmed_via == "EVENT"
+    assert handle.attempts == 1
+
+
+def test_fallback_get_confirms_set_without_event(bus, make_scheduler, waiters):
+    scheduler = make_scheduler(confirm_timeout_ms=50)
+    handle = scheduler.submit_set(FUNC_RELAY, 1, STATE_ON)
+    frames = bus.wait_frames(2)  # SET, then the fallback GET after the EVENT timeout
+    assert frames[1] == compose_frame(CMD_GET, bytes([FUNC_RELAY, 1]))
+    waiters.resolve(CMD_GET, FUNC_RELAY, 1, STATE_ON)
+
+    assert handle.wait(1.0)
+    assert handle.confirmed_via == "GET"
+
+
+def test_set_fails_after_retries(bus, make_scheduler):
+    scheduler = make_scheduler(retries=2, confirm_timeout_ms=20)
+    done = []
+    handle = scheduler.submit_set(FUNC_RELAY, 1, STATE_ON)
+    handle.add_done_callback(done.append)
+
+    assert handle.wait(2.0) is False
+    assert handle.status == STATUS_FAILED
+    assert handle.attempts == 2
+    assert len(bus.sent(CMD_SET)) == 2
+    assert len(bus.sent(CMD_GET)) == 2
+    assert done == [handle]
+    assert scheduler.stats()["failed"] == 1
+
+
+def test_wrong_event_state_falls_back_to_get(bus, make_scheduler, waiters):
+    scheduler = make_scheduler(confirm_timeout_ms=1000)
+    handle = scheduler.submit_set(FUNC_RELAY, 1, STATE_ON)
+    bus.wait_frames(1)
+    waiters.resolve(CMD_EVENT, FUNC_RELAY, 1, STATE_OFF)
+    bus.wait_frames(2)
+    waiters.resolve(CMD_GET, FUNC_RELAY, 1, STATE_ON)
+
+    assert handle.wait(1.0)
+    assert handle.confirmed_via == "GET"
+
+
+def test_same_device_commands_are_serialized(bus, make_scheduler, waiters):
+    scheduler = make_scheduler(confirm_timeout_ms=5000)
+    first = scheduler.submit_set(FUNC_RELAY, 1, STATE_ON)
+    second = scheduler.submit_set(FUNC_RELAY, 1, STATE_OFF)
+    bus.wait_frames(1)
+    time.sleep(0.05)
+    assert len(bus.sent(CMD_SET)) == 1  # Second waits for the first to be confirmed
+
+    waiters.resolve(CMD_EVENT, FUNC_RELAY, 1, STATE_ON)
+    bus.wait_frames(2)
+    waiters.resolve(CMD_EVENT, FUNC_RELAY, 1, STATE_OFF)
+
+    assert first.wait(1.0) and second.wait(1.0)
+
+
+def test_coalesce_supersedes_queued_and_in_flight_sets(bus, make_scheduler, waiters):
+    scheduler = make_scheduler(confirm_timeout_ms=5000)
+    first = scheduler.submit_set(FUNC_RELAY, 1, 10, coalesce=True)
+    bus.wait_frames(1)
+    second = scheduler.submit_set(FUNC_RELAY, 1, 20, coalesce=True)
+    third = scheduler.submit_set(FUNC_RELAY, 1, 30, coalesce=True)
+
+    assert first.status == STATUS_SUPERSEDED
+    assert second.status == STATUS_SUPERSEDED
+    bus.wait_frames(2)
+    waiters.resolve(CMD_EVENT, FUNC_RELAY, 1, 30)
+    assert third.wait(1.0)
+    assert [frame[5] for frame in bus.sent(CMD_SET)] == [10, 30]
+    assert scheduler.stats()["superseded"] == 2
+
+
+def test_interactive_overtakes_queued_background(bus, make_scheduler):
+    scheduler = make_scheduler(max_in_flight=8, confirm_timeout_ms=5000, min_frame_gap_ms=20)
+    for num in range(1, 6):
+        scheduler.submit_get(FUNC_RELAY, num, priority=PRIORITY_BACKGROUND)
+    bus.wait_frames(1)
+    scheduler.submit_set(FUNC_RELAY, 20, STATE_ON)
+    frames = bus.wait_frames(6)
+
+    assert frames[0][2] == CMD_GET  # Already on its way when the SET arrived
+    assert frames[1] == compose_frame(CMD_SET, bytes([FUNC_RELAY, 20, STATE_ON]))
+
+
+def test_starved_background_gets_a_frame(bus, make_scheduler):
+    scheduler = make_scheduler(max_in_flight=64, confirm_timeout_ms=5000, min_frame_gap_ms=10, starvation_ms=50)
+    scheduler.submit_get(FUNC_RELAY, 1, priority=PRIORITY_BACKGROUND)
+    for num in range(1, 31):
+        scheduler.submit_set(FUNC_RELAY + 1, num, STATE_ON)
+    bus.wait_frames(31, timeout=2.0)
+
+    position = next(i for i, frame in enumerate(bus.frames) if frame[2] == CMD_GET)
+    assert position < 30  # Sent before the interactive burst was done
+    assert scheduler.stats()["promoted"] >= 1
+
+
+def test_in_flight_window_limits_unconfirmed_commands(bus, make_scheduler, waiters):
+    scheduler = make_scheduler(max_in_flight=3, confirm_timeout_ms=5000)
+    handles = [scheduler.submit_set(FUNC_RELAY, num, STATE_ON) for num in range(1, 7)]
+    bus.wait_frames(3)
+    time.sleep(0.05)
+    assert len(bus.frames) == 3
+
+    waiters.resolve(CMD_EVENT, FUNC_RELAY, 1, STATE_ON)
+    bus.wait_frames(4)
+    assert handles[0].wait(1.0)
+    assert scheduler.stats()["max_active"] == 3
+
+
+def test_stop_cancels_pending_commands(bus, make_scheduler):
+    scheduler = make_scheduler(max_in_flight=1, confirm_timeout_ms=5000)
+    active = scheduler.submit_set(FUNC_RELAY, 1, STATE_ON)
+    queued = scheduler.submit_set(FUNC_RELAY, 2, STATE_ON)
+    bus.wait_frames(1)
+    scheduler.stop()
+
+    assert active.status == STATUS_CANCELLED
+    assert queued.status == STATUS_CANCELLED
+    with pytest.raises(RuntimeError):
+        scheduler.submit_set(FUNC_RELAY, 3, STATE_ON)
+
+
+def test_cancel_frees_the_slot(bus, make_scheduler, waiters):
+    scheduler = make_scheduler(max_in_flight=1, confirm_timeout_ms=5000)
+    get = scheduler.submit_get(FUNC_RELAY, 1)
+    bus.wait_frames(1)
+    set_ = scheduler.submit_set(FUNC_RELAY, 2, STATE_ON)
+    time.sleep(0.05)
+    assert len(bus.frames) == 1  # The only slot is taken by the GET
+
+    assert scheduler.cancel(get)
+    assert get.status == STATUS_CANCELLED
+    bus.wait_frames(2)
+    waiters.resolve(CMD_EVENT, FUNC_RELAY, 2, STATE_ON)
+    assert set_.wait(1.0)
+    assert scheduler.cancel(set_) is False
+
+
+def frame_gaps_ms(bus, count):
+    bus.wait_frames(count)
+    return [(b - a) * 1000.0 for a, b in zip(bus.times, bus.times[1:])]
+
+
+def test_untrained_gap_is_post_send_gap(bus, make_scheduler):
+    timing = AdaptiveTiming(ack_timeout_ms=300, post_send_gap_ms=80, confirm_timeout_ms=800)
+    scheduler = make_scheduler(timing=timing, min_frame_gap_ms=10, confirm_timeout_ms=5000)
+    for num in (1, 2, 3):
+        scheduler.submit_get(FUNC_RELAY, num)
+
+    assert min(frame_gaps_ms(bus, 3)) >= 75
+
+
+def test_tuned_gap_applies_to_commands_with_min_gap_as_floor(bus, make_scheduler):
+    timing = AdaptiveTiming(ack_timeout_ms=300, post_send_gap_ms=200, confirm_timeout_ms=800,
+                            config={"min_samples": 1, "gap_floor_ms": 1})
+    for _ in range(8):
+        timing._ack.add(2.0)  # Tuned gap: 4 ms
+    scheduler = make_scheduler(timing=timing, min_frame_gap_ms=30, confirm_timeout_ms=5000)
+    for num in (1, 2, 3):
+        scheduler.submit_set(FUNC_RELAY, num, STATE_ON)
+
+    gaps = frame_gaps_ms(bus, 3)
+    assert min(gaps) >= 25  # min_frame_gap_ms wins over the (smaller) tuned gap
+    assert max(gaps) < 150  # ...and the static 200 ms is not used once tuned
@@ -0,0 +1,72 @@
+"""StateStore: array-backed slots, versioning and change deltas."""
+
+import pytest
+
+from teletask.protocol import FUNC_DIMMER, FUNC_FLAG, FUNC_RELAY
+from teletask.state_store import SLOTS, StateChange, StateStore
+
+
+def test_set_and_get():
+    store = StateStore([FUNC_RELAY])
+
+    assert store.get(FUNC_RELAY, 5) is None
+    assert store.update(FUNC_RELAY, 5, 255, timestamp=10.0)
+    assert store.update(FUNC_RELAY, 0, 0, timestamp=11.0)  # 0 is a state, not "unknown"
+
+    assert store.get(FUNC_RELAY, 5) == 255
+    assert store.get(FUNC_RELAY, 0) == 0
+    assert store.get(FUNC_RELAY, SLOTS) is None
+    assert store.values(FUNC_RELAY) == {0: 0, 5: 255}
+    assert store.last_changed(FUNC_RELAY, 5) == 10.0
+
+
+def test_version_bumps_only_on_change():
+    store = StateStore()
+    store.update(FUNC_RELAY, 1, 255, timestamp=1.0)
+    assert store.version == 1
+
+    assert not store.update(FUNC_RELAY, 1, 255, timestamp=2.0)  # Repeat of the cached value
+    assert store.version == 1
+    assert store.last_changed(FUNC_RELAY, 1) == 1.0
+    assert store.last_seen(FUNC_RELAY, 1) == 2.0
+
+    assert store.update(FUNC_RELAY, 1, 0, timestamp=3.0)
+    assert store.version == 2
+    assert store.stats() == {"version": 2, "updates": 3, "changes": 2, "function_types": 1}
+
+
+def test_changes_since_returns_delta_in_version_order():
+    store = StateStore()
+    store.update(FUNC_DIMMER, 9, 100, timestamp=1.0)
+    store.update(FUNC_RELAY, 2, 255, timestamp=2.0)
+    version, changes = store.changes_since(0)
+    assert version == 2
+    assert [(c.func, c.num, c.state) for c in changes] == [(FUNC_DIMMER, 9, 100), (FUNC_RELAY, 2, 255)]
+
+    store.update(FUNC_RELAY, 2, 255)  # No change: not in the next delta
+    store.update(FUNC_DIMMER, 9, 50, timestamp=3.0)
+    version, changes = store.changes_since(version)
+    assert version == 3
+    assert changes == [StateChange(FUNC_DIMMER, 9, 50, 3.0, 3)]
+
+    assert store.changes_since(version) == (3, [])
+
+
+def test_new_function_types_allocated_lazily():
+    store = StateStore([FUNC_RELAY])
+    assert store.stats()["function_types"] == 1
+    assert store.get(FUNC_FLAG, 1) is None
+    assert store.values(FUNC_FLAG) == {}
+    assert store.stats()["function_types"] == 1  # Reads do not allocate
+
+    store.update(FUNC_FLAG, 1, 255)
+    assert store.get(FUNC_FLAG, 1) == 255
+    assert store.stats()["function_types"] == 2
+
+
+def test_rejects_out_of_range_device():
+    store = StateStore()
+    with pytest.raises(IndexError):
+        store.update(FUNC_RELAY, SLOTS, 255)
+    with pytest.raises(IndexError):
+        store.update(FUNC_RELAY, -1, 255)
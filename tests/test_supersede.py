@@ -0,0 +1,95 @@
+"""Supersede (pipeline.supersede): a newer SET replaces older SETs, never GETs or plain frames."""
+
+import threading
+import time
+
+from teletask.protocol import CMD_LOG, FUNC_RELAY, STATE_OFF, STATE_ON
+from teletask.scheduler import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    STATUS_CONFIRMED,
+    STATUS_SUPERSEDED,
+)
+
+
+def wait_idle(drv, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        stats = drv.scheduler_stats()
+        if not stats["queued"] and not stats["active"]:
+            return
+        time.sleep(0.01)
+    raise AssertionError(f"scheduler not idle: {drv.scheduler_stats()}")
+
+
+def test_set_after_connect_keeps_log_frames(make_driver):
+    drv = make_driver(start=False)
+    drv.connect()
+    handle = drv.submit_set(FUNC_RELAY, 1, STATE_ON)
+
+    assert handle.wait(2.0)
+    wait_idle(drv)
+    logs = {(frame[3], frame[4]) for frame in drv.emulator.received_cmd(CMD_LOG)}
+    assert (FUNC_RELAY, 1) in logs  # LOG enable for relays has the same bytes as relay 1
+    assert drv.scheduler_stats()["superseded"] == 0
+
+
+def test_interactive_get_survives_set_for_same_device(make_driver):
+    drv = make_driver()
+    drv.emulator.state[(FUNC_RELAY, 5)] = STATE_OFF
+    # get_relay(): single-attempt interactive GET, then a SET for the same relay
+    get = drv._scheduler.submit_get(FUNC_RELAY, 5, retries=1, priority=PRIORITY_INTERACTIVE)
+    set_ = drv.submit_set(FUNC_RELAY, 5, STATE_ON)
+
+    assert get.wait(2.0)
+    assert get.result == STATE_OFF
+    assert set_.wait(2.0)
+    assert drv.scheduler_stats()["superseded"] == 0
+
+
+def test_background_get_survives_set_for_same_device(make_driver):
+    drv = make_driver()
+    # read_states(): background GET, then a SET for the same relay
+    get = drv._scheduler.submit_get(FUNC_RELAY, 7, priority=PRIORITY_BACKGROUND)
+    set_ = drv.submit_set(FUNC_RELAY, 7, STATE_ON)
+
+    assert set_.wait(2.0)
+    assert get.wait(2.0)
+    assert get.status == STATUS_CONFIRMED
+    assert get.result is not None
+
+
+def test_read_states_not_cancelled_by_set(make_driver):
+    drv = make_driver()
+    drv.emulator.state[(FUNC_RELAY, 7)] = STATE_ON
+    states = {}
+
+    reader = threading.Thread(target=lambda: states.update(drv.read_states([(FUNC_RELAY, 7)], budget_s=2.0)))
+    reader.start()
+    while not drv.scheduler_stats()["submitted"]:
+        time.sleep(0.001)
+    set_ = drv.submit_set(FUNC_RELAY, 7, STATE_ON)
+    reader.join(3.0)
+
+    assert set_.wait(2.0)
+    assert states[(FUNC_RELAY, 7)] == STATE_ON
+
+
+def test_newer_set_supersedes_older_set(make_driver):
+    drv = make_driver()
+    first = drv.submit_set(FUNC_RELAY, 3, STATE_ON)
+    second = drv.submit_set(FUNC_RELAY, 3, STATE_OFF)
+
+    assert second.wait(2.0)
+    assert first.wait(2.0) is False
+    assert first.status == STATUS_SUPERSEDED
+    assert drv.emulator.state[(FUNC_RELAY, 3)] == STATE_OFF
+
+
+def test_pending_target_ignores_gets_and_frames(make_driver):
+    drv = make_driver()
+    drv.function_log(FUNC_RELAY, True)
+    drv._scheduler.submit_get(FUNC_RELAY, 1)
+    assert drv._scheduler.pending_target(FUNC_RELAY, 1) is None
+    drv.submit_set(FUNC_RELAY, 1, STATE_ON)
+    assert drv._scheduler.pending_target(FUNC_RELAY, 1) == STATE_ON
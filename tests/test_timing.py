@@ -0,0 +1,96 @@
+"""AdaptiveTiming: percentile window, floor / ceiling clamping and the untrained fallback."""
+
+from teletask.protocol import FUNC_DIMMER, FUNC_RELAY
+from teletask.timing import LatencyWindow, AdaptiveTiming
+
+
+def make_timing(**config):
+    return AdaptiveTiming(ack_timeout_ms=300, post_send_gap_ms=140, confirm_timeout_ms=800, config=config)
+
+
+def train_ack(timing, ms, count):
+    for _ in range(count):
+        timing._ack.add(ms)
+
+
+def test_percentile_is_nearest_rank():
+    window = LatencyWindow(100)
+    assert window.percentile(95) is None
+    for ms in range(1, 101):
+        window.add(ms)
+
+    assert window.percentile(50) == 50
+    assert window.percentile(95) == 95
+    assert window.percentile(100) == 100
+    assert window.percentile(0) == 1
+
+
+def test_window_keeps_only_the_newest_samples():
+    window = LatencyWindow(4)
+    for ms in (500, 500, 10, 10, 10, 10):
+        window.add(ms)
+
+    assert len(window) == 4
+    assert window.percentile(100) == 10
+
+
+def test_static_values_until_warmed_up():
+    timing = make_timing(min_samples=8)
+    train_ack(timing, 10, 7)
+    timing.record_event(FUNC_RELAY, 20)
+
+    assert timing.post_send_gap_ms() == 140
+    assert timing.ack_timeout_ms() == 300
+    assert timing.confirm_timeout_ms(FUNC_RELAY) == 800
+
+    train_ack(timing, 10, 1)
+    assert timing.post_send_gap_ms() == 20  # 10 ms × margin 2
+
+
+def test_tuned_values_clamped_to_floor_and_ceiling():
+    timing = make_timing(min_samples=1, gap_floor_ms=30, confirm_ceiling_ms=600)
+    train_ack(timing, 5, 8)
+    timing.record_event(FUNC_RELAY, 1000)
+
+    assert timing.post_send_gap_ms() == 30  # 5 × 2 = 10, raised to the floor
+    assert timing.confirm_timeout_ms(FUNC_RELAY) == 600  # 2000, capped at the ceiling
+
+    train_ack(timing, 400, 64)
+    assert timing.post_send_gap_ms() == 140  # Static value is the default ceiling
+
+
+def test_confirm_timeout_per_function():
+    timing = make_timing(min_samples=2)
+    for _ in range(2):
+        timing.record_event(FUNC_RELAY, 50)
+
+    assert timing.confirm_timeout_ms(FUNC_RELAY) == 150  # 100 ms raised to the confirm floor
+    assert timing.confirm_timeout_ms(FUNC_DIMMER) == 800  # No samples for dimmers yet
+
+
+def test_timeouts_count_as_ceiling_samples():
+    timing = make_timing(min_samples=1, percentile=50)
+    timing.record_event(FUNC_RELAY, 100)
+    timing.record_timeout(FUNC_RELAY)
+    timing.record_timeout(FUNC_RELAY)
+
+    assert timing.timeouts == 2
+    assert timing.confirm_timeout_ms(FUNC_RELAY) == 800
+
+
+def test_ack_matched_fifo_with_tx():
+    timing = make_timing()
+    timing.note_ack()  # No TX pending: ignored
+    timing.note_tx()
+    timing.note_tx()
+    timing.note_ack()
+
+    assert timing.ack_samples == 1
+    assert len(timing._pending_tx) == 1
+
+
+def test_disabled_uses_static_values():
+    timing = make_timing(enabled=False, min_samples=1)
+    train_ack(timing, 5, 8)
+
+    assert timing.post_send_gap_ms() == 140
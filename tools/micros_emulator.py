@@ -0,0 +1,449 @@
+#################################################################################################
+# File:    micros_emulator.py
+# Version: 1.2
+#
+# Description:
+#   Local TELETASK MICROS emulator for benchmarks and load testing.
+#   Speaks the same frame format as the driver (STX | LEN | CMD | payload | CHK):
+#     - SET   → state update + EVENT report (optional ACK frame first)
+#     - GET   → GET-reply (or EVENT, like some MICROS firmware) with the current state
+#     - LOG   → accepted silently
+#   Timing model: every frame occupies the line for len × 10 bits at the configured baudrate,
+#   and the MICROS answers `latency_ms` after a command has been fully received.
+#
+#   Spontaneous EVENTs (wall switches, timers) can be generated at a configurable mean rate.
+#
+#   Links:
+#     - EmulatedPort  pyserial-compatible object wired straight to the emulator (in-process)
+#     - PtyLink       pseudo-terminal (POSIX); the driver opens the printed /dev/pts/N path
+#     - TcpLink       TCP server; the driver opens socket://host:port
+#   The pty and TCP links need no driver changes: MicrosRS232 opens them like a real port.
+#
+# Usage:
+#   python tools/micros_emulator.py [--tcp 127.0.0.1:10001 | --pty] [--latency-ms 15]
+#                                   [--baudrate 19200] [--ack] [--event-rate 0.5]
+#################################################################################################
+
+import argparse
+import heapq
+import json
+import os
+import random
+import socket
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "custom_components", "teletask"))
+
+from teletask.framing import FrameParser, compose_frame  # noqa: E402
+from teletask.protocol import CMD_EVENT, CMD_GET, CMD_LOG, CMD_SET, FUNC_RELAY, STATE_OFF, STATE_ON  # noqa: E402
+
+# Devices that report spontaneous EVENTs by default (relays 1-32)
+DEFAULT_EVENT_DEVICES: Tuple[Tuple[int, int], ...] = tuple((FUNC_RELAY, num) for num in range(1, 33))
+
+
+class MicrosEmulator:
+    """Protocol engine of the emulated MICROS (state table + timed replies)."""
+
+    def __init__(
+        self,
+        latency_ms: float = 15.0,
+        baudrate: int = 19200,
+        send_ack: bool = False,
+        get_reply_cmd: int = CMD_GET,
+        event_rate_hz: float = 0.0,
+        event_devices: Sequence[Tuple[int, int]] = DEFAULT_EVENT_DEVICES
+    ) -> None:
+        """
+        Initialize the emulator.
+
+        Args:
+            latency_ms: Processing time between a received command and its reply.
+            baudrate: Simulated line speed (0 = infinitely fast).
+            send_ack: Send an ACK frame (CMD 0x00) before each SET's EVENT.
+            get_reply_cmd: CMD used for GET replies (CMD_GET or CMD_EVENT).
+            event_rate_hz: Mean rate of spontaneous EVENTs (0 = none). Each one toggles a
+                random device from event_devices; intervals are exponentially distributed.
+            event_devices: (func, num) pairs used for spontaneous EVENTs.
+        """
+        self.latency_ms = latency_ms
+        self.baudrate = baudrate
+        self.send_ack = send_ack
+        self.get_reply_cmd = get_reply_cmd
+        self.event_rate_hz = event_rate_hz
+        self.event_devices = list(event_devices)
+
+        self.state: Dict[Tuple[int, int], int] = {}
+        self._parser = FrameParser()
+        self._sink: Optional[Callable[[bytes], None]] = None
+
+        self._cond = threading.Condition()
+        self._heap: List[Tuple[float, int, bytes]] = []
+        self._seq = 0
+        self._rx_line_free = 0.0
+        self._tx_line_free = 0.0
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._event_thread: Optional[threading.Thread] = None
+
+        # Counters
+        self.frames_in = 0
+        self.frames_out = 0
+        self.events_injected = 0
+
+    #################################################################################################
+    # Lifecycle
+    #################################################################################################
+    def attach(self, sink: Callable[[bytes], None]) -> None:
+        """Set the function that receives bytes sent by the MICROS."""
+        self._sink = sink
+
+    def start(self) -> None:
+        """Start the reply thread (and the spontaneous event generator if enabled)."""
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="micros-emulator", daemon=True)
+        self._thread.start()
+        if self.event_rate_hz > 0 and self.event_devices:
+            self._event_thread = threading.Thread(target=self._generate_events, name="micros-events", daemon=True)
+            self._event_thread.start()
+
+    def stop(self) -> None:
+        """Stop the reply thread."""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=1.0)
+        if self._event_thread:
+            self._event_thread.join(timeout=1.0)
+            self._event_thread = None
+
+    def reset_link(self) -> None:
+        """Drop a partially received frame (new host connection)."""
+        with self._cond:
+            self._parser.reset()
+
+    def stats(self) -> Dict[str, int]:
+        """Return emulator counters as a dict."""
+        with self._cond:
+            return {
+                "frames_in": self.frames_in,
+                "frames_out": self.frames_out,
+                "events_injected": self.events_injected,
+                "devices": len(self.state),
+            }
+
+    #################################################################################################
+    # Host → MICROS
+    #################################################################################################
+    def _wire_time(self, nbytes: int) -> float:
+        return nbytes * 10.0 / self.baudrate if self.baudrate else 0.0
+
+    def receive(self, data: bytes) -> None:
+        """Accept bytes written by the host and schedule the replies."""
+        now = time.monotonic()
+        with self._cond:
+            # The host's bytes occupy the line before the MICROS sees the frame
+            self._rx_line_free = max(now, self._rx_line_free) + self._wire_time(len(data))
+            received_at = self._rx_line_free
+
+            self._parser.feed(data)
+            for frame in self._parser.frames_available():
+                self.frames_in += 1
+                for reply in self.handle_frame(frame):
+                    self._schedule(reply, received_at + self.latency_ms / 1000.0)
+
+    def handle_frame(self, frame: bytes) -> List[bytes]:
+        """Apply one command and return the reply frames."""
+        cmd = frame[2]
+        if cmd == CMD_SET and len(frame) >= 7:
+            func, num, st = frame[3], frame[4], frame[5]
+            self.state[(func, num)] = st
+            replies = [compose_frame(0x00, b"")] if self.send_ack else []
+            replies.append(compose_frame(CMD_EVENT, bytes([func, num, st])))
+            return replies
+
+        if cmd == CMD_GET and len(frame) >= 6:
+            func, num = frame[3], frame[4]
+            st = self.state.get((func, num), 0)
+            return [compose_frame(self.get_reply_cmd, bytes([func, num, st]))]
+
+        if cmd == CMD_LOG:
+            return []
+
+        return []
+
+    def inject_event(self, func: int, num: int, state: int) -> None:
+        """Report a spontaneous state change (e.g. a wall switch)."""
+        with self._cond:
+            self.state[(func, num)] = state
+            self.events_injected += 1
+            self._schedule(compose_frame(CMD_EVENT, bytes([func, num, state])), time.monotonic())
+
+    def _generate_events(self) -> None:
+        """Toggle random devices at event_rate_hz (Poisson arrivals)."""
+        rng = random.Random()
+        while True:
+            delay = rng.expovariate(self.event_rate_hz)
+            with self._cond:
+                if not self._running:
+                    return
+                self._cond.wait(delay)
+                if not self._running:
+                    return
+                func, num = rng.choice(self.event_devices)
+                current = self.state.get((func, num), STATE_OFF)
+            self.inject_event(func, num, STATE_OFF if current else STATE_ON)
+
+    #################################################################################################
+    # MICROS → host
+    #################################################################################################
+    def _schedule(self, frame: bytes, ready_at: float) -> None:
+        """Queue a reply on the TX line (caller holds the condition)."""
+        start = max(ready_at, self._tx_line_free)
+        self._tx_line_free = start + self._wire_time(len(frame))
+        self._seq += 1
+        heapq.heappush(self._heap, (self._tx_line_free, self._seq, frame))
+        self._cond.notify()
+
+    def _run(self) -> None:
+        """Deliver replies to the sink when their transmission completes."""
+        while True:
+            with self._cond:
+                if not self._running:
+                    return
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                due = self._heap[0][0]
+                now = time.monotonic()
+                if due > now:
+                    self._cond.wait(due - now)
+                    continue
+                _, _, frame = heapq.heappop(self._heap)
+                self.frames_out += 1
+            if self._sink is not None:
+                self._sink(frame)
+
+
+class EmulatedPort:
+    """pyserial-compatible port connected to a MicrosEmulator (in-process)."""
+
+    def __init__(self, emulator: MicrosEmulator, timeout: float = 1.0) -> None:
+        """Initialize the port and attach it to the emulator."""
+        self.emulator = emulator
+        self.timeout = timeout
+        self._buf = bytearray()
+        self._cond = threading.Condition()
+        self.is_open = True
+        emulator.attach(self._deliver)
+
+    def _deliver(self, data: bytes) -> None:
+        with self._cond:
+            self._buf += data
+            self._cond.notify_all()
+
+    @property
+    def in_waiting(self) -> int:
+        with self._cond:
+            return len(self._buf)
+
+    def read(self, size: int = 1) -> bytes:
+        with self._cond:
+            if not self._buf and self.is_open:
+                self._cond.wait(self.timeout)
+            out = bytes(self._buf[:size])
+            del self._buf[:size]
+            return out
+
+    def write(self, data: bytes) -> int:
+        self.emulator.receive(bytes(data))
+        return len(data)
+
+    def reset_input_buffer(self) -> None:
+        with self._cond:
+            self._buf.clear()
+
+    def setDTR(self, value: bool = True) -> None:
+        pass
+
+    def setRTS(self, value: bool = True) -> None:
+        pass
+
+    def close(self) -> None:
+        with self._cond:
+            self.is_open = False
+            self._cond.notify_all()
+
+
+class PtyLink:
+    """Serves the emulator on a pseudo-terminal (POSIX only); the driver opens `path`."""
+
+    def __init__(self, emulator: MicrosEmulator) -> None:
+        """Create the pty pair and attach it to the emulator (call start() to serve)."""
+        import pty
+        import tty
+
+        self.emulator = emulator
+        self._master, self._slave = pty.openpty()
+        tty.setraw(self._slave)  # No echo / line editing: bytes pass unchanged
+        self.path = os.ttyname(self._slave)
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        emulator.attach(self._send)
+
+    def _send(self, data: bytes) -> None:
+        try:
+            os.write(self._master, data)
+        except OSError:
+            pass
+
+    def start(self) -> None:
+        """Start forwarding host bytes to the emulator."""
+        self._running = True
+        self._thread = threading.Thread(target=self._serve, name="micros-pty", daemon=True)
+        self._thread.start()
+
+    def _serve(self) -> None:
+        while self._running:
+            try:
+                data = os.read(self._master, 4096)
+            except OSError:
+                return
+            if data:
+                self.emulator.receive(data)
+
+    def close(self) -> None:
+        """Close both ends of the pty."""
+        self._running = False
+        for fd in (self._slave, self._master):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+class TcpLink:
+    """Serves the emulator on a TCP port (one host connection at a time); the driver opens `url`."""
+
+    def __init__(self, emulator: MicrosEmulator, host: str = "127.0.0.1", port: int = 10001) -> None:
+        """Bind the server socket and attach it to the emulator (port 0 = pick a free port)."""
+        self.emulator = emulator
+        self._server = socket.create_server((host, port))
+        self.host = host
+        self.port = self._server.getsockname()[1]
+        self._conn: Optional[socket.socket] = None
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        emulator.attach(self._send)
+
+    @property
+    def url(self) -> str:
+        """Return the pyserial URL for this link."""
+        return f"socket://{self.host}:{self.port}"
+
+    def _send(self, data: bytes) -> None:
+        conn = self._conn
+        if conn is None:
+            return  # No host connected: the MICROS talks to an empty line
+        try:
+            conn.sendall(data)
+        except OSError:
+            pass
+
+    def start(self) -> None:
+        """Start accepting host connections."""
+        self._running = True
+        self._thread = threading.Thread(target=self._serve, name="micros-tcp", daemon=True)
+        self._thread.start()
+
+    def _serve(self) -> None:
+        while self._running:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.emulator.reset_link()
+            self._conn = conn
+            try:
+                while True:
+                    data = conn.recv(4096)
+                    if not data:
+                        break
+                    self.emulator.receive(data)
+            except OSError:
+                pass
+            finally:
+                self._conn = None
+                conn.close()
+
+    def close(self) -> None:
+        """Stop serving and drop the host connection."""
+        self._running = False
+        conn = self._conn
+        if conn is not None:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self._server.close()
+
+
+def driver_config(port: str, baudrate: int) -> Dict[str, Any]:
+    """Return a complete config.json for a driver connecting to the emulator on `port`."""
+    return {
+        "serial": {"port": port, "baudrate": baudrate or 19200, "timeout": 1.0},
+        "reliability": {"retries": 3, "confirm_timeout_ms": 800, "retry_delay_ms": 250, "post_send_gap_ms": 140},
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Local TELETASK MICROS emulator (pty or TCP).")
+    link = ap.add_mutually_exclusive_group()
+    link.add_argument("--tcp", default="127.0.0.1:10001", metavar="HOST:PORT", help="serve on a TCP port (default)")
+    link.add_argument("--pty", action="store_true", help="serve on a pseudo-terminal (POSIX)")
+    ap.add_argument("--latency-ms", type=float, default=15.0, help="reply latency after a full command")
+    ap.add_argument("--baudrate", type=int, default=19200, help="simulated line speed (0 = unlimited)")
+    ap.add_argument("--ack", action="store_true", help="send an ACK frame before each SET's EVENT")
+    ap.add_argument("--get-reply-event", action="store_true", help="answer GETs with EVENT frames")
+    ap.add_argument("--event-rate", type=float, default=0.0, help="spontaneous EVENTs per second")
+    ap.add_argument("--event-relays", type=int, default=32, help="relays 1..N used for spontaneous EVENTs")
+    args = ap.parse_args()
+
+    emulator = MicrosEmulator(
+        latency_ms=args.latency_ms,
+        baudrate=args.baudrate,
+        send_ack=args.ack,
+        get_reply_cmd=CMD_EVENT if args.get_reply_event else CMD_GET,
+        event_rate_hz=args.event_rate,
+        event_devices=[(FUNC_RELAY, num) for num in range(1, args.event_relays + 1)],
+    )
+    if args.pty:
+        server = PtyLink(emulator)
+        port = server.path
+    else:
+        host, _, tcp_port = args.tcp.rpartition(":")
+        server = TcpLink(emulator, host or "127.0.0.1", int(tcp_port))
+        port = server.url
+
+    emulator.start()
+    server.start()
+    print(f"MICROS emulator on {port} (latency={args.latency_ms}ms baudrate={args.baudrate} "
+          f"event_rate={args.event_rate}/s)")
+    print(f"config.json: {json.dumps(driver_config(port, args.baudrate))}")
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        emulator.stop()
+        print(f"stats: {emulator.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+#################################################################################################
+# File:    replay_capture.py
+# Version: 1.1
+#
+# Description:
+#   Replays a binary frame capture (teletask/capture.py) through the driver.
+#   Every RX record is fed to MicrosRS232._handle_incoming_frame at the original spacing,
+#   accelerated, or as fast as possible; TX records are counted but not sent anywhere.
+#   The driver's state listener path runs as in production: events go through the bounded
+#   EventStream and the event thread to a listener that applies them the way TeletaskHub
+#   does (StateStore update, unchanged states counted as suppressible duplicates).
+#   Turns captured production traffic into a reproducible benchmark.
+#   Files are replayed oldest first (by the start time in their header), so the rotated set
+#   can be passed in any order, e.g. capture.ttcap*.
+#
+# Usage:
+#   python tools/replay_capture.py capture.ttcap [capture.ttcap.1 ...] [--speed 1 | 10 | 0]
+#                                  [--json]
+#################################################################################################
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "custom_components", "teletask"))
+
+from teletask.capture import DIR_RX, read_capture, read_header  # noqa: E402
+from teletask.events import StateEvent  # noqa: E402
+from teletask.micros_rs232 import MicrosRS232  # noqa: E402
+from teletask.state_store import StateStore  # noqa: E402
+
+
+class _IdlePort:
+    """Serial stand-in that never receives anything (frames are injected by the replay)."""
+
+    in_waiting = 0
+
+    def __init__(self, timeout: float = 0.2) -> None:
+        self._closed = threading.Event()
+        self.timeout = timeout
+
+    def read(self, size: int = 1) -> bytes:
+        self._closed.wait(self.timeout)
+        return b""
+
+    def write(self, data: bytes) -> int:
+        return len(data)
+
+    def reset_input_buffer(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self._closed.set()
+
+
+class ReplayDriver(MicrosRS232):
+    """MicrosRS232 without a port."""
+
+    def _open_serial(self):
+        return _IdlePort()
+
+
+class HubModel:
+    """State listener that applies events the way TeletaskHub._on_state_event does."""
+
+    def __init__(self) -> None:
+        self.state = StateStore()
+        self.events = 0
+        self.duplicates = 0
+        self._lock = threading.Lock()
+
+    def on_event(self, event: StateEvent) -> None:
+        changed = self.state.update(event.func, event.num, event.state, event.timestamp)
+        with self._lock:
+            self.events += 1
+            self.duplicates += not changed
+
+    def applied(self) -> int:
+        """Return the number of events applied so far."""
+        with self._lock:
+            return self.events
+
+
+def make_driver() -> ReplayDriver:
+    fd, path = tempfile.mkstemp(suffix=".json")
+    with os.fdopen(fd, "w") as f:
+        json.dump({"serial": {"port": "replay://"}, "reliability": {}}, f)
+    try:
+        return ReplayDriver(config_path=path)
+    finally:
+        os.remove(path)
+
+
+def capture_order(paths: List[str]) -> List[str]:
+    """
+    Return the capture files oldest first (capture.N ... capture.1, capture).
+
+    Raises:
+        ValueError: If a file is not a capture file.
+    """
+    return sorted(paths, key=lambda path: read_header(path)[0])
+
+
+def replay(paths: List[str], speed: float) -> Dict[str, Any]:
+    """Feed the captures (oldest first) through a driver; return the replay summary."""
+    paths = capture_order(paths)
+    drv = make_driver()
+    hub = HubModel()
+    drv.add_listener(hub.on_event)
+    drv.start()
+
+    rx = tx = 0
+    span_s = 0.0
+    t0 = time.perf_counter()
+    try:
+        for path in paths:
+            file_start = time.perf_counter()
+            last_offset = 0.0
+            for record in read_capture(path):
+                last_offset = record.offset_s
+                if speed > 0:
+                    delay = file_start + record.offset_s / speed - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                if record.direction == DIR_RX:
+                    rx += 1
+                    drv._handle_incoming_frame(record.frame)
+                else:
+                    tx += 1
+            span_s += last_offset
+        fed_s = time.perf_counter() - t0
+
+        # Wait until the listener applied every event the stream will deliver (an event leaves
+        # the queue before the listener runs, so an empty queue is not enough)
+        deadline = time.monotonic() + 5.0
+        while time.monotonic() < deadline:
+            stream = drv.event_stats()
+            if hub.applied() >= stream["received"] - stream["dropped"] - stream["coalesced"]:
+                break
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - t0
+        events = drv.event_stats()
+    finally:
+        drv.stop()
+
+    return {
+        "files": len(paths),
+        "speed": speed,
+        "rx_frames": rx,
+        "tx_frames": tx,
+        "capture_span_s": round(span_s, 3),
+        "feed_s": round(fed_s, 3),
+        "elapsed_s": round(elapsed, 3),
+        "rx_frames_per_s": round(rx / fed_s) if fed_s else 0,
+        "events_delivered": hub.events,
+        "state_changes": hub.state.stats()["changes"],
+        "duplicates": hub.duplicates,
+        "event_stream": events,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Replay a TeleTask frame capture through the driver")
+    ap.add_argument("captures", nargs="+", help="capture files (rotated set in any order; replayed oldest first)")
+    ap.add_argument("--speed", type=float, default=1.0, help="1 = original timing, 10 = 10x faster, 0 = no delays")
+    ap.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = ap.parse_args()
+
+    try:
+        summary = replay(args.captures, args.speed)
+    except (OSError, ValueError) as e:
+        sys.exit(f"replay failed: {e}")
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+    for key, value in summary.items():
+        print(f"{key:18s} {value}")
+
+
+if __name__ == "__main__":
+    main()